@@ -1,3 +1,28 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
 
-# Register your models here.
+from classrooms.admin import ScalableAdmin
+from .models import CustomUser, DeviceToken
+
+
+@admin.register(CustomUser)
+class CustomUserAdmin(UserAdmin, ScalableAdmin):
+    list_display = ('username', 'full_name', 'email', 'role', 'display_title', 'is_active')
+    list_filter = ('role', 'is_active')
+    # search_fields مطلوبة لـ autocomplete في الكورسات والمواعيد
+    search_fields = ('username', 'full_name', 'email')
+    fieldsets = UserAdmin.fieldsets + (
+        ("بيانات العرض", {'fields': ('role', 'full_name', 'phone', 'display_title')}),
+    )
+    add_fieldsets = UserAdmin.add_fieldsets + (
+        ("بيانات العرض", {'fields': ('email', 'role', 'full_name', 'display_title')}),
+    )
+
+
+@admin.register(DeviceToken)
+class DeviceTokenAdmin(ScalableAdmin):
+    list_display = ('name', 'created_by', 'created_at', 'revoked_at')
+    list_select_related = ('created_by',)
+    readonly_fields = ('created_at',)
+    autocomplete_fields = ('created_by',)
+    # الإلغاء والحذف من هنا بيوصلوا لكل العمليات عن طريق signals في accounts/authentication.py
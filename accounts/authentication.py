@@ -0,0 +1,162 @@
+import uuid
+from copy import copy
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache as shared_cache
+from django.db.models.signals import post_delete, post_save
+from django.utils.translation import gettext_lazy as _
+from rest_framework import authentication, exceptions
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from classrooms.cache import LocalLRU
+from .models import CustomUser, DeviceToken
+
+# ✅ كاش صغير للمستخدمين داخل كل عملية: الطلبات المتكررة بنفس التوكن ما بتقراش جدول المستخدمين
+USER_CACHE_TTL = getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+_user_cache = LocalLRU(max_entries=2048)
+_device_cache = LocalLRU(max_entries=1)
+_revision_cache = LocalLRU(max_entries=1)
+# أي تعديل في مستخدم بيغير الرقم ده في الكاش المشترك، فكل العمليات بتسيب نسختها القديمة خلال ثانية
+USERS_REVISION_KEY = 'accounts:users-revision'
+USERS_REVISION_TTL = 1
+
+DEVICE_TOKEN_SALT = 'accounts.device-token'
+DEVICE_KEYWORD = 'Device'
+ACTIVE_DEVICES_KEY = 'accounts:active-devices'
+ACTIVE_DEVICES_TTL = 5
+
+# كل scope بيسمح بقراءة مسارات معينة بس
+DEVICE_SCOPES = getattr(settings, 'DEVICE_TOKEN_SCOPES', {
+    'display:read': (
+        '/api/schedules/',
+        '/api/classrooms/',
+        '/api/courses/',
+        '/api/tables/',
+        '/api/table-schedules/',
+        '/api/sync/',
+        '/api/search/',
+        '/api/calendar/',
+        '/api/accounts/doctors/',
+    ),
+})
+
+
+def users_revision():
+    revision = _revision_cache.get(USERS_REVISION_KEY)
+    if revision is None:
+        revision = shared_cache.get(USERS_REVISION_KEY)
+        if revision is None:
+            shared_cache.add(USERS_REVISION_KEY, uuid.uuid4().hex[:12], timeout=None)
+            revision = shared_cache.get(USERS_REVISION_KEY)
+        _revision_cache.set(USERS_REVISION_KEY, revision, ttl=USERS_REVISION_TTL)
+    return revision
+
+
+def evict_user(sender, instance, **kwargs):
+    # مستخدم اتوقف أو دوره اتغير: العمليات التانية لازم ما تكملش بالنسخة القديمة لحد ما الـ TTL يخلص
+    _user_cache.delete(instance.pk)
+    shared_cache.set(USERS_REVISION_KEY, uuid.uuid4().hex[:12], timeout=None)
+    _revision_cache.clear()
+
+
+def refresh_devices(sender, instance, **kwargs):
+    refresh_active_devices()
+
+
+def connect_signals():
+    post_save.connect(evict_user, sender=CustomUser, dispatch_uid='accounts_evict_user_save')
+    post_delete.connect(evict_user, sender=CustomUser, dispatch_uid='accounts_evict_user_delete')
+    # أي إنشاء أو إلغاء أو حذف توكن (API، لوحة الإدارة، shell) بيحدّث قايمة الأجهزة المسموحة
+    post_save.connect(refresh_devices, sender=DeviceToken, dispatch_uid='accounts_refresh_devices_save')
+    post_delete.connect(refresh_devices, sender=DeviceToken, dispatch_uid='accounts_refresh_devices_delete')
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = (user_id, users_revision())
+        user = _user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            _user_cache.set(key, user, ttl=USER_CACHE_TTL)
+        # نسخة لكل طلب عشان أي تعديل في view ما يلمسش النسخة المشتركة
+        return copy(user)
+
+
+def make_device_token(device):
+    return signing.dumps({'d': device.pk, 's': device.scopes}, salt=DEVICE_TOKEN_SALT, compress=True)
+
+
+def active_device_ids():
+    # قايمة الأجهزة المسموحة (مش الملغية): توكن لجهاز اتمسح أو اتلغى ما بيعديش
+    active = _device_cache.get(ACTIVE_DEVICES_KEY)
+    if active is None:
+        active = shared_cache.get(ACTIVE_DEVICES_KEY)
+        if active is None:
+            active = refresh_active_devices()
+        _device_cache.set(ACTIVE_DEVICES_KEY, active, ttl=ACTIVE_DEVICES_TTL)
+    return active
+
+
+def refresh_active_devices():
+    active = frozenset(DeviceToken.objects.filter(revoked_at__isnull=True).values_list('pk', flat=True))
+    shared_cache.set(ACTIVE_DEVICES_KEY, active, timeout=None)
+    _device_cache.delete(ACTIVE_DEVICES_KEY)
+    return active
+
+
+class DeviceUser:
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+    is_staff = False
+    is_superuser = False
+    role = 'Device'
+    pk = id = None
+
+    def __init__(self, device_id, scopes):
+        self.device_id = device_id
+        self.scopes = tuple(scopes)
+        self.username = f"device-{device_id}"
+
+    def __str__(self):
+        return self.username
+
+
+class DeviceTokenAuthentication(authentication.BaseAuthentication):
+    """Authorization: Device <token> — توكن موقّع، التحقق منه ما بيحتاجش قاعدة البيانات."""
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].decode() != DEVICE_KEYWORD:
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid device token header.'))
+
+        try:
+            payload = signing.loads(auth[1].decode(), salt=DEVICE_TOKEN_SALT)
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed(_('Invalid device token.'))
+
+        if payload['d'] not in active_device_ids():
+            raise exceptions.AuthenticationFailed(_('Device token has been revoked.'))
+
+        # أجهزة العرض للقراءة فقط وفي حدود الـ scopes بتاعتها
+        if request.method not in SAFE_METHODS:
+            raise exceptions.PermissionDenied(_('Device tokens are read-only.'))
+        allowed = tuple(prefix for scope in payload['s'] for prefix in DEVICE_SCOPES.get(scope, ()))
+        if not request.path.startswith(allowed):
+            raise exceptions.PermissionDenied(_('Device token is not scoped for this endpoint.'))
+
+        return DeviceUser(payload['d'], payload['s']), payload
+
+    def authenticate_header(self, request):
+        return DEVICE_KEYWORD
@@ -0,0 +1,51 @@
+from django.core.cache import cache as shared_cache
+from django.db.models.signals import post_delete, post_save
+
+from classrooms.cache import LocalLRU
+from .models import CustomUser
+
+# ✅ دليل الدكاترة: قايمة صغيرة بتتقري كتير وبتتغير نادراً، فبتتخزن في الكاش وبتتمسح مع أي حفظ لمستخدم
+DIRECTORY_KEY = 'accounts:doctor-directory'
+DIRECTORY_FIELDS = (
+    'id', 'username', 'email', 'role', 'display_title', 'full_name', 'first_name', 'last_name',
+)
+DIRECTORY_TTL = 5       # كل عملية تعيد قراءة النسخة المشتركة كل 5 ثواني على الأكثر
+
+_directory_cache = LocalLRU(max_entries=1)
+
+
+def _directory():
+    directory = _directory_cache.get(DIRECTORY_KEY)
+    if directory is None:
+        directory = shared_cache.get(DIRECTORY_KEY)
+        if directory is None:
+            directory = refresh_directory()
+        _directory_cache.set(DIRECTORY_KEY, directory, ttl=DIRECTORY_TTL)
+    return directory
+
+
+def refresh_directory():
+    rows = CustomUser.objects.filter(role='Doctor').order_by('pk').values(*DIRECTORY_FIELDS)
+    directory = {row['id']: row for row in rows}
+    shared_cache.set(DIRECTORY_KEY, directory, timeout=None)
+    _directory_cache.delete(DIRECTORY_KEY)
+    return directory
+
+
+def doctor_directory():
+    """قائمة الدكاترة (dicts بالحقول DIRECTORY_FIELDS) مرتبة بالـ id."""
+    return list(_directory().values())
+
+
+def get_doctor(pk):
+    return _directory().get(pk)
+
+
+def invalidate_directory(sender, instance, **kwargs):
+    shared_cache.delete(DIRECTORY_KEY)
+    _directory_cache.delete(DIRECTORY_KEY)
+
+
+def connect_signals():
+    post_save.connect(invalidate_directory, sender=CustomUser, dispatch_uid='accounts_directory_save')
+    post_delete.connect(invalidate_directory, sender=CustomUser, dispatch_uid='accounts_directory_delete')
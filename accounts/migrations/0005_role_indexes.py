@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+def normalize_roles(apps, schema_editor):
+    # الأدوار القديمة ممكن تكون "doctor" أو "ADMIN": نوحدها عشان الفلتر بقى مطابقة تامة
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    for role in ('Doctor', 'Admin'):
+        CustomUser.objects.filter(role__iexact=role).exclude(role=role).update(role=role)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_devicetoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_roles, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('role', 'Doctor')), fields=['username'], name='user_doctor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('role', 'Admin')), fields=['username'], name='user_admin_idx'),
+        ),
+    ]
@@ -17,5 +17,34 @@ class CustomUser(AbstractUser):
     # ✅ لقب العرض (دكتور / مهندس / محاضر)
     display_title = models.CharField(max_length=20, blank=True, null=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # ✅ index جزئي لكل دور: قوائم الدكاترة والأدمنز ما بتقراش جدول المستخدمين كله
+            models.Index(fields=['username'], condition=models.Q(role='Doctor'), name='user_doctor_idx'),
+            models.Index(fields=['username'], condition=models.Q(role='Admin'), name='user_admin_idx'),
+        ]
+
     def __str__(self):
         return self.username
+
+
+# ✅ توكن طويل المدى لشاشات العرض (كشك / TV) بصلاحيات محددة وقابل للإلغاء
+class DeviceToken(models.Model):
+    name = models.CharField(max_length=100, verbose_name="اسم الجهاز")
+    scopes = models.JSONField(default=list, verbose_name="الصلاحيات")
+    created_by = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='device_tokens'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def is_revoked(self):
+        return self.revoked_at is not None
+
+    def __str__(self):
+        return f"{self.name}{' (ملغي)' if self.is_revoked else ''}"
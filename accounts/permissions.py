@@ -0,0 +1,9 @@
+from rest_framework import permissions
+
+
+class IsAdminRole(permissions.BasePermission):
+    message = '⚠️ صلاحيات غير كافية (Admin فقط)'
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and getattr(user, 'role', None) == 'Admin')
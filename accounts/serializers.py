@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import CustomUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .models import CustomUser, DeviceToken
+from .authentication import DEVICE_SCOPES
 from django.contrib.auth.password_validation import validate_password
 
 # ✅ قائمة الأدوار المسموحة
@@ -74,3 +76,35 @@ class AdminSerializer(serializers.ModelSerializer):
         user.set_password(password)
         user.save()
         return user
+
+
+# ✅ التوكن بيحمل بيانات الدور واللقب والاسم عشان الواجهة ما تحتاجش تطلب /profile/ كل مرة
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['username'] = user.username
+        token['role'] = user.role
+        token['display_title'] = user.display_title or ''
+        token['full_name'] = user.full_name
+        return token
+
+
+class DeviceTokenSerializer(serializers.ModelSerializer):
+    scopes = serializers.ListField(child=serializers.CharField(), required=False)
+
+    class Meta:
+        model = DeviceToken
+        fields = ['id', 'name', 'scopes', 'created_at', 'revoked_at']
+        read_only_fields = ['id', 'created_at', 'revoked_at']
+
+    def validate_scopes(self, value):
+        unknown = [scope for scope in value if scope not in DEVICE_SCOPES]
+        if unknown:
+            raise serializers.ValidationError(f"صلاحيات غير معروفة: {unknown}")
+        return value
+
+    def create(self, validated_data):
+        validated_data.setdefault('scopes', ['display:read'])
+        validated_data['created_by'] = self.context['request'].user
+        return DeviceToken.objects.create(**validated_data)
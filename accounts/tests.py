@@ -1,3 +1,105 @@
+from django.core.cache import cache as shared_cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+from . import authentication, directory
+from .models import CustomUser, DeviceToken
+
+
+def bearer(user):
+    return {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+
+class DeviceTokenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create(username='admin', email='admin@x.edu', role='Admin')
+
+    def setUp(self):
+        shared_cache.delete(authentication.ACTIVE_DEVICES_KEY)
+        authentication._device_cache.clear()
+
+    def _issue(self):
+        response = self.client.post(reverse('device-token-list'), {'name': 'Lobby', 'scopes': ['display:read']},
+                                    content_type='application/json', **bearer(self.admin))
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def _tables(self, token):
+        return self.client.get(reverse('table-list'), HTTP_AUTHORIZATION=f"Device {token}").status_code
+
+    def test_device_token_reads_but_cannot_write(self):
+        token = self._issue()['token']
+        self.assertEqual(self._tables(token), 200)
+        response = self.client.post(reverse('table-list'), {'name': 'x'}, HTTP_AUTHORIZATION=f"Device {token}")
+        self.assertEqual(response.status_code, 403)
+
+    def test_revoked_token_is_rejected(self):
+        device = self._issue()
+        self.client.post(reverse('device-token-revoke', args=[device['id']]), **bearer(self.admin))
+        self.assertEqual(self._tables(device['token']), 401)
+
+    def test_deleted_token_stays_rejected(self):
+        device = self._issue()
+        self.client.post(reverse('device-token-revoke', args=[device['id']]), **bearer(self.admin))
+        response = self.client.delete(reverse('device-token-detail', args=[device['id']]), **bearer(self.admin))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(DeviceToken.objects.exists())
+        self.assertEqual(self._tables(device['token']), 401)
+
+    def test_forged_token_is_rejected(self):
+        self.assertEqual(self._tables('not-a-token'), 401)
+
+
+class ClaimsJWTUserCacheTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='admin', email='admin@x.edu', role='Admin')
+        self.request = APIRequestFactory().get('/', **bearer(self.user))
+
+    def _role(self):
+        user, _ = authentication.ClaimsJWTAuthentication().authenticate(self.request)
+        return user.role
+
+    def test_save_evicts_user_everywhere(self):
+        self.assertEqual(self._role(), 'Admin')
+        revision = authentication.users_revision()
+        self.user.role = 'Doctor'
+        self.user.save()
+        self.assertNotEqual(shared_cache.get(authentication.USERS_REVISION_KEY), revision)
+        self.assertEqual(self._role(), 'Doctor')
+
+    def test_other_process_eviction_reaches_local_cache(self):
+        self.assertEqual(self._role(), 'Admin')
+        # تعديل من غير signals في العملية دي: النسخة المحلية لسه شغالة
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self._role(), 'Admin')
+        # عملية تانية حفظت المستخدم (غيرت المراجعة المشتركة) وانتهت مهلة القراءة المحلية
+        shared_cache.set(authentication.USERS_REVISION_KEY, 'other-process')
+        authentication._revision_cache.clear()
+        with self.assertRaises(AuthenticationFailed):
+            self._role()
+
+
+class DoctorDirectoryTests(TestCase):
+    def setUp(self):
+        directory.refresh_directory()
+        self.doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor', full_name='Dr. A')
+        CustomUser.objects.create(username='admin', email='admin@x.edu', role='Admin')
+
+    def test_doctor_list_comes_from_directory(self):
+        self.client.get(reverse('doctor_list'))
+        with self.assertNumQueries(0):
+            data = self.client.get(reverse('doctor_list')).json()
+        self.assertEqual([row['username'] for row in data], ['doc'])
+
+    def test_user_save_refreshes_directory(self):
+        self.assertEqual(directory.get_doctor(self.doctor.pk)['full_name'], 'Dr. A')
+        self.doctor.full_name = 'Dr. B'
+        self.doctor.save()
+        self.assertEqual(directory.get_doctor(self.doctor.pk)['full_name'], 'Dr. B')
+        self.doctor.role = 'Admin'
+        self.doctor.save()
+        self.assertIsNone(directory.get_doctor(self.doctor.pk))
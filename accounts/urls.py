@@ -1,4 +1,5 @@
-from django.urls import path
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .views import (
     # تسجيل وإنشاء الحساب
@@ -18,9 +19,15 @@ from .views import (
     DoctorListView,
 
     # ✅ view مؤقت لتغيير كلمة المرور
-    reset_admin_password
+    reset_admin_password,
+
+    # توكنات شاشات العرض
+    DeviceTokenViewSet,
 )
 
+router = DefaultRouter()
+router.register(r'devices', DeviceTokenViewSet, basename='device-token')
+
 urlpatterns = [
     # ✅ endpoint مؤقت لتحديث كلمة مرور Naif
     path('dev/reset-password/', reset_admin_password),
@@ -44,4 +51,7 @@ urlpatterns = [
 
     # عرض قائمة الدكاترة
     path('doctors/', DoctorListView.as_view(), name='doctor_list'),
+
+    # توكنات شاشات العرض (Admin فقط)
+    path('', include(router.urls)),
 ]
@@ -1,13 +1,19 @@
-from rest_framework import generics, permissions, status
+from rest_framework import generics, permissions, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
-from .models import CustomUser
+from .models import CustomUser, DeviceToken
+from .permissions import IsAdminRole
+from .authentication import make_device_token
+from .directory import doctor_directory
 from classrooms.models import ClassSchedule, Classroom
-from .serializers import RegisterSerializer, UserSerializer
+from .serializers import RegisterSerializer, UserSerializer, DeviceTokenSerializer
 from classrooms.serializers import ClassScheduleSerializer, ClassroomSerializer
+from classrooms.cache import CacheInvalidationMixin
 from datetime import datetime
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
 
@@ -72,7 +78,7 @@ class DoctorScheduleToday(APIView):
             return Response({'detail': '⚠️ ليس لديك صلاحية كـ Doctor'}, status=403)
 
         today_code = get_day_code()
-        schedule = ClassSchedule.objects.filter(doctor=user, day=today_code)
+        schedule = ClassSchedule.objects.filter(course__doctor=user, day=today_code).with_related()
         serializer = ClassScheduleSerializer(schedule, many=True)
         return Response(serializer.data)
 
@@ -88,8 +94,8 @@ class DoctorCurrentLecture(APIView):
         now = datetime.now().time()
         today_code = get_day_code()
 
-        current_lecture = ClassSchedule.objects.filter(
-            doctor=user,
+        current_lecture = ClassSchedule.objects.with_related().filter(
+            course__doctor=user,
             day=today_code,
             start_time__lte=now,
             end_time__gte=now
@@ -111,24 +117,24 @@ class AdminProfileView(APIView):
         return Response(UserSerializer(request.user).data)
 
 
-class AdminLectureListCreateView(generics.ListCreateAPIView):
+class AdminLectureListCreateView(CacheInvalidationMixin, generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ClassScheduleSerializer
 
     def get_queryset(self):
         if self.request.user.role != 'Admin':
             return ClassSchedule.objects.none()
-        return ClassSchedule.objects.all()
+        return ClassSchedule.objects.with_related()
 
 
-class AdminLectureDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AdminLectureDetailView(CacheInvalidationMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ClassScheduleSerializer
 
     def get_queryset(self):
         if self.request.user.role != 'Admin':
             return ClassSchedule.objects.none()
-        return ClassSchedule.objects.all()
+        return ClassSchedule.objects.with_related()
 
 
 # ✅ تعديل هنا لدعم العرض بدون تسجيل دخول
@@ -147,13 +153,43 @@ class DoctorListView(generics.ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = UserSerializer
 
-    def get_queryset(self):
+    def _allowed(self):
         user = self.request.user
-        if not user.is_authenticated:
-            return CustomUser.objects.filter(role='Doctor')
-        if getattr(user, 'role', None) == 'Admin':
+        return not user.is_authenticated or getattr(user, 'role', None) in ('Admin', 'Device')
+
+    def get_queryset(self):
+        if self._allowed():
             return CustomUser.objects.filter(role='Doctor')
         return CustomUser.objects.none()
+
+    def list(self, request, *args, **kwargs):
+        # ✅ القائمة من دليل الدكاترة المخزن: من غير استعلام في الحالة العادية
+        if not self._allowed():
+            return Response([])
+        fields = UserSerializer.Meta.fields
+        return Response([{field: entry[field] for field in fields} for entry in doctor_directory()])
+
+
+# ✅ توكنات شاشات العرض: الأدمن بيصدرها ويلغيها، والتوكن بيظهر مرة واحدة بس وقت الإنشاء
+class DeviceTokenViewSet(viewsets.ModelViewSet):
+    queryset = DeviceToken.objects.all().order_by('-created_at')
+    serializer_class = DeviceTokenSerializer
+    permission_classes = [IsAdminRole]
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        device = DeviceToken.objects.get(pk=response.data['id'])
+        response.data['token'] = make_device_token(device)
+        return response
+
+    @action(detail=True, methods=['post'])
+    def revoke(self, request, pk=None):
+        device = self.get_object()
+        if not device.is_revoked:
+            device.revoked_at = timezone.now()
+            device.save(update_fields=['revoked_at'])
+        return Response(self.get_serializer(device).data)
         
         
         
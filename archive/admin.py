@@ -0,0 +1,34 @@
+from django.contrib import admin
+
+from classrooms.admin import ScalableAdmin
+from .models import ArchivedAppointment, ArchivedLecture, ArchivedTable
+
+
+class ReadOnlyArchiveAdmin(ScalableAdmin):
+    # ✅ الأرشيف بيتكتب من archive_history بس
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedTable)
+class ArchivedTableAdmin(ReadOnlyArchiveAdmin):
+    list_display = ('name', 'original_id', 'lecture_count', 'retired_at', 'archived_at')
+    search_fields = ('name',)
+
+
+@admin.register(ArchivedLecture)
+class ArchivedLectureAdmin(ReadOnlyArchiveAdmin):
+    list_display = ('course_code', 'course_name', 'doctor_name', 'classroom_name', 'day', 'start_time', 'table')
+    list_filter = ('day',)
+    list_select_related = ('table',)
+    search_fields = ('course_code', 'course_name', 'doctor_name')
+
+
+@admin.register(ArchivedAppointment)
+class ArchivedAppointmentAdmin(ReadOnlyArchiveAdmin):
+    list_display = ('doctor_name', 'appointment_date', 'appointment_time', 'location', 'available')
+    date_hierarchy = 'appointment_date'
+    search_fields = ('doctor_name', 'location')
@@ -0,0 +1,163 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from classrooms.cache import invalidate
+from classrooms.changelog import record_bulk, suppressed
+from classrooms.models import ChangeLog, ClassSchedule, DoctorAppointment, Table, TableSchedule
+from .models import ArchivedAppointment, ArchivedLecture, ArchivedTable
+
+# ✅ نقل الجداول القديمة والمواعيد اللي فاتت للأرشيف على دفعات (كل دفعة transaction قصيرة)
+TABLES_AFTER_DAYS = getattr(settings, 'ARCHIVE_TABLES_AFTER_DAYS', 180)
+APPOINTMENTS_AFTER_DAYS = getattr(settings, 'ARCHIVE_APPOINTMENTS_AFTER_DAYS', 90)
+BATCH_SIZE = getattr(settings, 'ARCHIVE_BATCH_SIZE', 1000)
+
+LECTURE_FIELDS = (
+    'pk', 'is_active', 'class_schedule_id', 'class_schedule__day', 'class_schedule__start_time',
+    'class_schedule__end_time', 'class_schedule__is_canceled', 'class_schedule__note',
+    'class_schedule__course__code', 'class_schedule__course__name', 'class_schedule__course__doctor_id',
+    'class_schedule__course__doctor__full_name', 'class_schedule__course__doctor__username',
+    'class_schedule__classroom_id', 'class_schedule__classroom__name',
+)
+APPOINTMENT_FIELDS = (
+    'pk', 'doctor_id', 'doctor__full_name', 'doctor__username', 'location', 'appointment_date',
+    'appointment_time', 'available', 'description',
+)
+
+
+def tables_to_archive(days=TABLES_AFTER_DAYS):
+    # جداول اتشالت من النشر من أكتر من days يوم. المسودات (retired_at فاضي) وجداول القاعات ما بتتأرشفش
+    cutoff = timezone.now() - timedelta(days=days)
+    return Table.objects.filter(active=False, classroom__isnull=True, retired_at__lt=cutoff).order_by('retired_at')
+
+
+def archive_table(table, batch_size=BATCH_SIZE):
+    """ينقل الجدول ومحاضراته للأرشيف ويمسحهم. المحاضرات المربوطة بجدول تاني بتفضل مكانها."""
+    with transaction.atomic():
+        table = Table.objects.select_for_update().get(pk=table.pk)
+        if table.active:
+            raise ValueError("⚠️ لا يمكن أرشفة الجدول النشط")
+        archived = ArchivedTable.objects.create(
+            original_id=table.pk, name=table.name, description=table.description, retired_at=table.retired_at,
+        )
+
+        link_ids, lecture_ids, batch = [], [], []
+        links = TableSchedule.objects.filter(table=table).values(*LECTURE_FIELDS).order_by('class_schedule_id')
+        for row in links.iterator(chunk_size=batch_size):
+            link_ids.append(row['pk'])
+            lecture_ids.append(row['class_schedule_id'])
+            batch.append(ArchivedLecture(
+                table=archived,
+                original_id=row['class_schedule_id'],
+                day=row['class_schedule__day'],
+                start_time=row['class_schedule__start_time'],
+                end_time=row['class_schedule__end_time'],
+                is_canceled=row['class_schedule__is_canceled'],
+                is_active=row['is_active'],
+                note=row['class_schedule__note'],
+                course_code=row['class_schedule__course__code'],
+                course_name=row['class_schedule__course__name'],
+                doctor_id=row['class_schedule__course__doctor_id'],
+                doctor_name=row['class_schedule__course__doctor__full_name']
+                or row['class_schedule__course__doctor__username'] or '',
+                classroom_id=row['class_schedule__classroom_id'],
+                classroom_name=row['class_schedule__classroom__name'] or '',
+            ))
+            if len(batch) >= batch_size:
+                ArchivedLecture.objects.bulk_create(batch)
+                batch = []
+        ArchivedLecture.objects.bulk_create(batch)
+        archived.lecture_count = len(link_ids)
+        archived.save(update_fields=['lecture_count'])
+
+        # المحاضرة بتتمسح بس لو مالهاش مكان في أي جدول تاني
+        shared = set(
+            TableSchedule.objects.filter(class_schedule_id__in=lecture_ids).exclude(table=table)
+            .values_list('class_schedule_id', flat=True)
+        )
+        orphans = [pk for pk in lecture_ids if pk not in shared]
+        with suppressed():
+            TableSchedule.objects.filter(table=table).delete()
+            for start in range(0, len(orphans), batch_size):
+                ClassSchedule.objects.filter(pk__in=orphans[start:start + batch_size]).delete()
+            table.delete()
+        # صف واحد في سجل المزامنة لكل نوع بدل صف لكل محاضرة
+        record_bulk(TableSchedule, link_ids, ChangeLog.OP_DELETE, archived=True)
+        record_bulk(ClassSchedule, orphans, ChangeLog.OP_DELETE, archived=True)
+
+    invalidate()
+    return {'table': archived.original_id, 'archive_id': archived.pk, 'lectures': len(link_ids),
+            'deleted_lectures': len(orphans)}
+
+
+def archive_tables(days=TABLES_AFTER_DAYS, table_ids=None, batch_size=BATCH_SIZE, progress=None):
+    # الجداول المختارة بالاسم بتعدي على نفس شروط tables_to_archive (ما عدا المدة)
+    if table_ids:
+        tables = Table.objects.filter(pk__in=table_ids, active=False, classroom__isnull=True, retired_at__isnull=False)
+    else:
+        tables = tables_to_archive(days)
+    tables = list(tables)
+    results = []
+    for index, table in enumerate(tables, start=1):
+        results.append(archive_table(table, batch_size=batch_size))
+        if progress:
+            progress(int(index / len(tables) * 100), f"archived {table.name}")
+    return results
+
+
+def archive_appointments(days=APPOINTMENTS_AFTER_DAYS, batch_size=BATCH_SIZE, progress=None):
+    """ينقل المواعيد الأقدم من days يوم على دفعات؛ يرجع عدد المواعيد اللي اتنقلت."""
+    cutoff = timezone.localdate() - timedelta(days=days)
+    old = DoctorAppointment.objects.filter(appointment_date__lt=cutoff)
+    total = old.count()
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                old.select_for_update(skip_locked=True, of=('self',)).order_by('pk')
+                .values(*APPOINTMENT_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            ArchivedAppointment.objects.bulk_create([
+                ArchivedAppointment(
+                    original_id=row['pk'],
+                    doctor_id=row['doctor_id'],
+                    doctor_name=row['doctor__full_name'] or row['doctor__username'] or '',
+                    location=row['location'],
+                    appointment_date=row['appointment_date'],
+                    appointment_time=row['appointment_time'],
+                    available=row['available'],
+                    description=row['description'],
+                )
+                for row in rows
+            ])
+            ids = [row['pk'] for row in rows]
+            with suppressed():
+                DoctorAppointment.objects.filter(pk__in=ids).delete()
+            record_bulk(DoctorAppointment, ids, ChangeLog.OP_DELETE, archived=True)
+        moved += len(rows)
+        if progress and total:
+            progress(min(int(moved / total * 100), 100), f"{moved}/{total} appointments")
+
+    if moved:
+        invalidate()
+    return moved
+
+
+def archived_lectures(archived_table, params):
+    queryset = archived_table.lectures.all()
+    day = params.get('day')
+    if day:
+        queryset = queryset.filter(day=day)
+    for param, field in (('doctor', 'doctor_id'), ('classroom', 'classroom_id')):
+        value = params.get(param)
+        if value:
+            queryset = queryset.filter(**{field: int(value)})
+    query = params.get('q')
+    if query:
+        queryset = queryset.filter(Q(course_name__icontains=query) | Q(course_code__icontains=query))
+    return queryset
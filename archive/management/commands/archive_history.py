@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from archive import archiving
+
+
+class Command(BaseCommand):
+    help = "Move retired tables and past doctor appointments into the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables-after-days', type=int, default=archiving.TABLES_AFTER_DAYS)
+        parser.add_argument('--appointments-after-days', type=int, default=archiving.APPOINTMENTS_AFTER_DAYS)
+        parser.add_argument('--table', type=int, action='append', dest='tables',
+                            help="archive this inactive table now (repeatable)")
+        parser.add_argument('--batch-size', type=int, default=archiving.BATCH_SIZE)
+        parser.add_argument('--skip-appointments', action='store_true')
+
+    def handle(self, *args, **options):
+        tables = archiving.archive_tables(
+            days=options['tables_after_days'], table_ids=options['tables'], batch_size=options['batch_size'],
+        )
+        for result in tables:
+            self.stdout.write(
+                f"🗄️ table {result['table']}: {result['lectures']} lectures archived, "
+                f"{result['deleted_lectures']} removed"
+            )
+        moved = 0
+        if not options['skip_appointments']:
+            moved = archiving.archive_appointments(
+                days=options['appointments_after_days'], batch_size=options['batch_size'],
+            )
+        self.stdout.write(self.style.SUCCESS(f"✅ tables: {len(tables)}, appointments: {moved}"))
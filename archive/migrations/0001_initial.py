@@ -0,0 +1,73 @@
+# Generated by Django 4.2.15 on 2026-10-19 19:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True)),
+                ('name', models.CharField(max_length=255, verbose_name='اسم الجدول')),
+                ('description', models.TextField(blank=True, null=True)),
+                ('retired_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الإيقاف')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الأرشفة')),
+                ('lecture_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-archived_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True)),
+                ('doctor_id', models.BigIntegerField()),
+                ('doctor_name', models.CharField(blank=True, max_length=150)),
+                ('location', models.CharField(max_length=255)),
+                ('appointment_date', models.DateField()),
+                ('appointment_time', models.TimeField()),
+                ('available', models.BooleanField()),
+                ('description', models.TextField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-appointment_date', 'appointment_time'],
+                'indexes': [models.Index(fields=['doctor_id', 'appointment_date'], name='archived_appt_doctor_date_idx'), models.Index(fields=['appointment_date'], name='archived_appt_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedLecture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField()),
+                ('day', models.CharField(max_length=3)),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('is_canceled', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('note', models.CharField(blank=True, max_length=255, null=True)),
+                ('course_code', models.CharField(max_length=20)),
+                ('course_name', models.CharField(max_length=100)),
+                ('doctor_id', models.BigIntegerField(blank=True, null=True)),
+                ('doctor_name', models.CharField(blank=True, max_length=150)),
+                ('classroom_id', models.BigIntegerField(blank=True, null=True)),
+                ('classroom_name', models.CharField(blank=True, max_length=100)),
+                ('table', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lectures', to='archive.archivedtable')),
+            ],
+            options={
+                'ordering': ['table', 'day', 'start_time'],
+                'indexes': [models.Index(fields=['table', 'day', 'start_time'], name='archived_lecture_slot_idx'), models.Index(fields=['doctor_id', 'table'], name='archived_lecture_doctor_idx')],
+            },
+        ),
+    ]
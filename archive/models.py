@@ -0,0 +1,67 @@
+from django.db import models
+
+
+# ✅ الأرشيف: نسخ مسطحة (من غير FKs) للجداول القديمة ومحاضراتها والمواعيد اللي فاتت،
+# عشان الجداول الشغالة (table_schedules / المواعيد) تفضل صغيرة. القراءة بس من /api/archive/
+class ArchivedTable(models.Model):
+    original_id = models.BigIntegerField(unique=True)
+    name = models.CharField(max_length=255, verbose_name="اسم الجدول")
+    description = models.TextField(blank=True, null=True)
+    retired_at = models.DateTimeField(null=True, blank=True, verbose_name="تاريخ الإيقاف")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الأرشفة")
+    lecture_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-archived_at']
+
+    def __str__(self):
+        return f"🗄️ {self.name}"
+
+
+class ArchivedLecture(models.Model):
+    table = models.ForeignKey(ArchivedTable, on_delete=models.CASCADE, related_name='lectures')
+    original_id = models.BigIntegerField()
+    day = models.CharField(max_length=3)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    is_canceled = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=True)    # is_active بتاع الربط في الجدول
+    note = models.CharField(max_length=255, blank=True, null=True)
+    course_code = models.CharField(max_length=20)
+    course_name = models.CharField(max_length=100)
+    doctor_id = models.BigIntegerField(null=True, blank=True)
+    doctor_name = models.CharField(max_length=150, blank=True)
+    classroom_id = models.BigIntegerField(null=True, blank=True)
+    classroom_name = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        ordering = ['table', 'day', 'start_time']
+        indexes = [
+            models.Index(fields=['table', 'day', 'start_time'], name='archived_lecture_slot_idx'),
+            models.Index(fields=['doctor_id', 'table'], name='archived_lecture_doctor_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.course_name} ({self.day} {self.start_time})"
+
+
+class ArchivedAppointment(models.Model):
+    original_id = models.BigIntegerField(unique=True)
+    doctor_id = models.BigIntegerField()
+    doctor_name = models.CharField(max_length=150, blank=True)
+    location = models.CharField(max_length=255)
+    appointment_date = models.DateField()
+    appointment_time = models.TimeField()
+    available = models.BooleanField()
+    description = models.TextField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-appointment_date', 'appointment_time']
+        indexes = [
+            models.Index(fields=['doctor_id', 'appointment_date'], name='archived_appt_doctor_date_idx'),
+            models.Index(fields=['appointment_date'], name='archived_appt_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"موعد {self.doctor_name or self.doctor_id} بتاريخ {self.appointment_date}"
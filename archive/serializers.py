@@ -0,0 +1,21 @@
+from rest_framework import serializers
+
+from .models import ArchivedAppointment, ArchivedLecture, ArchivedTable
+
+
+class ArchivedTableSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedTable
+        fields = ['id', 'original_id', 'name', 'description', 'retired_at', 'archived_at', 'lecture_count']
+
+
+class ArchivedLectureSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedLecture
+        exclude = ['table']
+
+
+class ArchivedAppointmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedAppointment
+        fields = '__all__'
@@ -0,0 +1,18 @@
+from jobs.registry import report_progress, task
+
+from . import archiving
+
+
+# ✅ الأرشفة بتتنفذ في run_worker (حدود التزامن 1 عشان عمليتين ما يمسكوش نفس الصفوف)
+@task(concurrency=1)
+def archive_tables(days=None, table_ids=None):
+    days = archiving.TABLES_AFTER_DAYS if days is None else days
+    results = archiving.archive_tables(days=days, table_ids=table_ids, progress=report_progress)
+    return {'status': 'tables archived', 'tables': results}
+
+
+@task(concurrency=1)
+def archive_appointments(days=None):
+    days = archiving.APPOINTMENTS_AFTER_DAYS if days is None else days
+    moved = archiving.archive_appointments(days=days, progress=report_progress)
+    return {'status': 'appointments archived', 'appointments': moved}
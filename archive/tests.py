@@ -0,0 +1,86 @@
+from datetime import time, timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import CustomUser
+from classrooms.models import (
+    ChangeLog, Classroom, ClassSchedule, Course, DoctorAppointment, OfficeHourRule, Table, TableSchedule,
+)
+from . import archiving
+from .models import ArchivedAppointment, ArchivedTable
+
+
+class ArchivingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor', full_name='Dr. Old')
+        room = Classroom.objects.create(name='Hall', capacity='100')
+        course = Course.objects.create(name='Math', code='M1', doctor=cls.doctor, classroom=room, num_students='30')
+        cls.old = Table.objects.create(name='Fall', retired_at=timezone.now() - timedelta(days=400))
+        cls.draft = Table.objects.create(name='Draft')
+        cls.only_old = ClassSchedule.objects.create(course=course, classroom=room, day='MON',
+                                                    start_time=time(9), end_time=time(10))
+        cls.shared = ClassSchedule.objects.create(course=course, classroom=room, day='TUE',
+                                                  start_time=time(9), end_time=time(10))
+        TableSchedule.objects.create(table=cls.old, class_schedule=cls.only_old)
+        TableSchedule.objects.create(table=cls.old, class_schedule=cls.shared)
+        TableSchedule.objects.create(table=cls.draft, class_schedule=cls.shared)
+        today = timezone.localdate()
+        for days in (200, 100, 1):
+            DoctorAppointment.objects.create(doctor=cls.doctor, location='Office', appointment_date=today - timedelta(days=days),
+                                             appointment_time=time(11))
+
+    def test_retired_table_moves_to_archive(self):
+        self.assertEqual(list(archiving.tables_to_archive(180)), [self.old])
+        results = archiving.archive_tables(180, batch_size=1)
+        self.assertEqual(results[0]['lectures'], 2)
+        self.assertFalse(Table.objects.filter(pk=self.old.pk).exists())
+        # المحاضرة المشتركة مع المسودة فضلت مكانها
+        self.assertEqual(set(ClassSchedule.objects.values_list('pk', flat=True)), {self.shared.pk})
+        archived = ArchivedTable.objects.get(original_id=self.old.pk)
+        self.assertEqual(archived.lecture_count, 2)
+        self.assertEqual(set(archived.lectures.values_list('doctor_name', flat=True)), {'Dr. Old'})
+        log = ChangeLog.objects.get(model='classschedule', op=ChangeLog.OP_DELETE)
+        self.assertEqual(log.data['ids'], [self.only_old.pk])
+
+    def test_selected_tables_use_the_same_guards(self):
+        retired_room_table = Table.objects.create(name='Room', classroom=Classroom.objects.get(name='Hall'),
+                                                  retired_at=timezone.now() - timedelta(days=400))
+        ids = [self.draft.pk, retired_room_table.pk, self.old.pk]
+        self.assertEqual([row['table'] for row in archiving.archive_tables(table_ids=ids)], [self.old.pk])
+        self.assertEqual(set(Table.objects.values_list('pk', flat=True)), {self.draft.pk, retired_room_table.pk})
+
+    def test_expand_does_not_recreate_archived_appointments(self):
+        today = timezone.localdate()
+        rule = OfficeHourRule.objects.create(
+            doctor=self.doctor, day='SUN', start_time=time(10), end_time=time(11), slot_minutes=60,
+            location='Office', valid_from=today - timedelta(days=200), valid_until=today + timedelta(days=30),
+        )
+        url = reverse('office-hour-expand', args=[rule.pk])
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(self.doctor).access_token}"}
+        data = {'from': (today - timedelta(days=180)).isoformat(), 'to': today.isoformat()}
+        self.assertEqual(self.client.post(url, data, content_type='application/json', **auth).status_code, 201)
+        cutoff = today - timedelta(days=archiving.APPOINTMENTS_AFTER_DAYS)
+        generated = DoctorAppointment.objects.filter(location='Office', appointment_time=time(10))
+        self.assertTrue(generated.exists())
+        self.assertFalse(generated.filter(appointment_date__lt=cutoff).exists())
+
+    def test_past_appointments_move_in_batches(self):
+        self.assertEqual(archiving.archive_appointments(days=90, batch_size=1), 2)
+        self.assertEqual(DoctorAppointment.objects.count(), 1)
+        self.assertEqual(ArchivedAppointment.objects.filter(doctor_id=self.doctor.pk).count(), 2)
+
+    def test_archive_api_is_read_only_and_scoped(self):
+        archiving.archive_appointments(days=90)
+        other = CustomUser.objects.create(username='doc2', email='doc2@x.edu', role='Doctor')
+        url = reverse('archived-appointment-list')
+
+        def auth(user):
+            return {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+        self.assertEqual(self.client.get(url, **auth(self.doctor)).json()['count'], 2)
+        self.assertEqual(self.client.post(url, {}, **auth(self.doctor)).status_code, 405)
+        self.assertEqual(self.client.get(url, **auth(other)).json()['count'], 0)
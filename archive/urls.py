@@ -0,0 +1,12 @@
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+
+from .views import ArchivedAppointmentViewSet, ArchivedTableViewSet
+
+router = SimpleRouter()
+router.register(r'tables', ArchivedTableViewSet, basename='archived-table')
+router.register(r'appointments', ArchivedAppointmentViewSet, basename='archived-appointment')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
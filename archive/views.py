@@ -0,0 +1,65 @@
+from django.utils.dateparse import parse_date
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.permissions import IsAuthenticated
+
+from .archiving import archived_lectures
+from .models import ArchivedAppointment, ArchivedTable
+from .serializers import ArchivedAppointmentSerializer, ArchivedLectureSerializer, ArchivedTableSerializer
+
+
+class ArchivePagination(LimitOffsetPagination):
+    # الأرشيف بيكبر كل ترم: مفيش رد من غير حد أقصى
+    default_limit = 500
+    max_limit = 5000
+
+
+# ✅ الأرشيف للقراءة بس: /api/archive/tables/ و /api/archive/tables/<id>/lectures/?day=&doctor=&classroom=&q=
+class ArchivedTableViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ArchivedTable.objects.all()
+    serializer_class = ArchivedTableSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ArchivePagination
+    read_replica_actions = ('list', 'retrieve', 'lectures')
+
+    @action(detail=True, methods=['get'])
+    def lectures(self, request, pk=None):
+        try:
+            queryset = archived_lectures(self.get_object(), request.query_params)
+        except ValueError:
+            raise ValidationError({'error': 'doctor and classroom must be integers'})
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(ArchivedLectureSerializer(page, many=True).data)
+
+
+# /api/archive/appointments/?doctor=&from=YYYY-MM-DD&to=YYYY-MM-DD (الدكتور بيشوف مواعيده بس)
+class ArchivedAppointmentViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = ArchivedAppointmentSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ArchivePagination
+    read_replica_actions = ('list', 'retrieve')
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = ArchivedAppointment.objects.all()
+        role = getattr(user, 'role', None)
+        if role == 'Doctor':
+            queryset = queryset.filter(doctor_id=user.pk)
+        elif role != 'Admin':
+            return queryset.none()
+
+        params = self.request.query_params
+        try:
+            if params.get('doctor'):
+                queryset = queryset.filter(doctor_id=int(params['doctor']))
+            for param, lookup in (('from', 'appointment_date__gte'), ('to', 'appointment_date__lte')):
+                if params.get(param):
+                    value = parse_date(params[param])
+                    if value is None:
+                        raise ValueError
+                    queryset = queryset.filter(**{lookup: value})
+        except ValueError:
+            raise ValidationError({'error': 'doctor must be an integer and from/to dates YYYY-MM-DD'})
+        return queryset
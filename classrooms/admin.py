@@ -1,3 +1,161 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
-# Register your models here.
+from .bulk import bulk_cancel
+from .cache import invalidate
+from .changelog import record_bulk
+from .models import (
+    ChangeLog,
+    Classroom,
+    ClassSchedule,
+    Course,
+    DoctorAppointment,
+    OfficeHourRule,
+    Table,
+    TableSchedule,
+)
+
+# فوق العدد ده بنكتفي بتقدير PostgreSQL بدل COUNT(*) على الجدول كله
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    # ✅ COUNT(*) على جدول كبير بدون فلتر بطيء: نستخدم reltuples من pg_class
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # من غير COUNT تاني للجدول كله جنب نتيجة الفلتر
+    list_per_page = 50
+
+    # ✅ أي حفظ أو حذف من لوحة الإدارة لازم يظهر على الشاشات فوراً (مش بعد مدة الكاش)
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidate()
+
+
+@admin.register(Classroom)
+class ClassroomAdmin(ScalableAdmin):
+    list_display = ('name', 'location', 'capacity')
+    search_fields = ('name', 'location')
+
+
+@admin.register(Course)
+class CourseAdmin(ScalableAdmin):
+    list_display = ('code', 'name', 'doctor', 'classroom', 'num_students')
+    list_select_related = ('doctor', 'classroom')
+    search_fields = ('code', 'name')
+    autocomplete_fields = ('doctor', 'classroom')
+
+
+@admin.register(ClassSchedule)
+class ClassScheduleAdmin(ScalableAdmin):
+    list_display = ('__str__', 'day', 'start_time', 'end_time', 'is_canceled')
+    list_select_related = ('course', 'classroom')
+    list_filter = ('day', 'is_canceled')
+    search_fields = ('course__code', 'course__name', 'classroom__name')
+    autocomplete_fields = ('course', 'classroom')
+    actions = ('cancel_lectures', 'restore_lectures')
+
+    @admin.action(description="إلغاء المحاضرات المحددة")
+    def cancel_lectures(self, request, queryset):
+        ids = bulk_cancel(queryset, note='', canceled=True)
+        invalidate()
+        self.message_user(request, f"✅ تم إلغاء {len(ids)} محاضرة.", messages.SUCCESS)
+
+    @admin.action(description="استرجاع المحاضرات المحددة")
+    def restore_lectures(self, request, queryset):
+        ids = bulk_cancel(queryset, canceled=False)
+        invalidate()
+        self.message_user(request, f"✅ تم استرجاع {len(ids)} محاضرة.", messages.SUCCESS)
+
+
+@admin.register(Table)
+class TableAdmin(ScalableAdmin):
+    list_display = ('name', 'classroom', 'active')
+    list_select_related = ('classroom',)
+    list_filter = ('active',)
+    search_fields = ('name',)
+    autocomplete_fields = ('classroom',)
+
+
+@admin.register(TableSchedule)
+class TableScheduleAdmin(ScalableAdmin):
+    list_display = ('__str__', 'is_active')
+    list_select_related = ('table', 'class_schedule__course')
+    list_filter = ('is_active',)
+    search_fields = ('table__name', 'class_schedule__course__code')
+    autocomplete_fields = ('table', 'class_schedule')
+
+
+@admin.register(DoctorAppointment)
+class DoctorAppointmentAdmin(ScalableAdmin):
+    list_display = ('__str__', 'appointment_date', 'appointment_time', 'available')
+    list_select_related = ('doctor',)
+    list_filter = ('available',)
+    search_fields = ('doctor__username', 'location')
+    autocomplete_fields = ('doctor',)
+    actions = ('mark_available', 'mark_unavailable')
+
+    def _set_available(self, request, queryset, available):
+        ids = list(queryset.values_list('pk', flat=True))
+        DoctorAppointment.objects.filter(pk__in=ids).update(available=available)
+        record_bulk(DoctorAppointment, ids, ChangeLog.OP_UPDATE, {'available': available})
+        invalidate()
+        self.message_user(request, f"✅ تم تحديث {len(ids)} موعد.", messages.SUCCESS)
+
+    @admin.action(description="جعل المواعيد المحددة متاحة")
+    def mark_available(self, request, queryset):
+        self._set_available(request, queryset, True)
+
+    @admin.action(description="جعل المواعيد المحددة غير متاحة")
+    def mark_unavailable(self, request, queryset):
+        self._set_available(request, queryset, False)
+
+
+@admin.register(OfficeHourRule)
+class OfficeHourRuleAdmin(ScalableAdmin):
+    list_display = ('doctor', 'day', 'start_time', 'end_time', 'valid_from', 'valid_until')
+    list_select_related = ('doctor',)
+    list_filter = ('day',)
+    autocomplete_fields = ('doctor',)
+
+
+@admin.register(ChangeLog)
+class ChangeLogAdmin(ScalableAdmin):
+    # سجل التغييرات append-only: عرض بس
+    list_display = ('revision', 'model', 'object_id', 'op', 'created_at')
+    list_filter = ('model', 'op')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,165 @@
+from .models import ClassSchedule
+
+# ✅ تقارير الاستخدام محسوبة بـ pandas/numpy على DataFrame واحد (استعلام واحد للجدول كله)
+# pandas بيتعمل له import جوه الدوال بس عشان ما يبطأش تشغيل السيرفر
+
+WEEK_DAYS = ('SUN', 'MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT')   # الأسبوع الجامعي بيبدأ الأحد
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = len(WEEK_DAYS) * MINUTES_PER_DAY
+RESOLUTIONS = (5, 10, 15, 30, 60, 120)
+DEFAULT_RESOLUTION = 30
+CANCELLATION_GROUPS = ('doctor', 'classroom', 'day')
+REPORTS = ('heatmap', 'seat-fill', 'doctor-load', 'cancellations')
+SEAT_FILL_COLUMNS = ('classroom_id', 'classroom', 'capacity', 'lectures', 'weekly_minutes', 'avg_fill', 'max_fill', 'overbooked')
+DOCTOR_LOAD_COLUMNS = ('doctor_id', 'doctor', 'lectures', 'courses', 'teaching_days', 'weekly_minutes', 'weekly_hours', 'students')
+
+FRAME_FIELDS = (
+    ('lecture_id', 'pk'),
+    ('classroom_id', 'classroom_id'),
+    ('classroom', 'classroom__name'),
+    ('capacity', 'classroom__capacity'),
+    ('course_id', 'course_id'),
+    ('course', 'course__name'),
+    ('num_students', 'course__num_students'),
+    ('doctor_id', 'course__doctor_id'),
+    ('doctor_username', 'course__doctor__username'),
+    ('doctor_full_name', 'course__doctor__full_name'),
+    ('day', 'day'),
+    ('start_time', 'start_time'),
+    ('end_time', 'end_time'),
+    ('is_canceled', 'is_canceled'),
+)
+
+
+def _minutes(pd, times):
+    # TimeField -> دقائق من بداية اليوم
+    return (pd.to_timedelta(times.astype(str)).dt.total_seconds() // 60).astype('int64')
+
+
+def _number(pd, values):
+    # السعة وعدد الطلاب CharField: بناخد أول رقم في النص ("50 طالب" -> 50)
+    return pd.to_numeric(values.astype(str).str.extract(r'(\d+)', expand=False), errors='coerce')
+
+
+def load_frame(table):
+    import pandas as pd
+
+    rows = ClassSchedule.objects.in_table(table).order_by().values_list(*(path for _, path in FRAME_FIELDS))
+    frame = pd.DataFrame.from_records(list(rows), columns=[name for name, _ in FRAME_FIELDS])
+    if frame.empty:
+        frame['day_index'] = frame['start'] = frame['end'] = frame['duration'] = pd.Series(dtype='int64')
+        frame['capacity'] = frame['num_students'] = frame['fill'] = pd.Series(dtype='float64')
+        frame['doctor'] = pd.Series(dtype='object')
+        return frame
+
+    frame['doctor'] = frame['doctor_full_name'].where(frame['doctor_full_name'].fillna('') != '', frame['doctor_username'])
+    frame['day_index'] = frame['day'].map({day: i for i, day in enumerate(WEEK_DAYS)}).astype('int64')
+    offset = frame['day_index'] * MINUTES_PER_DAY
+    frame['start'] = offset + _minutes(pd, frame['start_time'])
+    frame['end'] = offset + _minutes(pd, frame['end_time'])
+    frame['duration'] = (frame['end'] - frame['start']).clip(lower=0)
+    frame['capacity'] = _number(pd, frame['capacity'])
+    frame['num_students'] = _number(pd, frame['num_students'])
+    frame['fill'] = frame['num_students'] / frame['capacity'].where(frame['capacity'] > 0)
+    return frame
+
+
+def _table(columns, frame):
+    # شكل موحد للـ JSON والـ CSV: أعمدة + صفوف
+    frame = frame.astype(object).where(frame.notna(), None)
+    return {'columns': list(columns), 'rows': frame[list(columns)].values.tolist()}
+
+
+def _label(minute):
+    day, minute = divmod(int(minute), MINUTES_PER_DAY)
+    return f"{WEEK_DAYS[day]} {minute // 60:02d}:{minute % 60:02d}"
+
+
+def occupancy_heatmap(frame, resolution=DEFAULT_RESOLUTION):
+    """نسبة إشغال كل قاعة في كل خانة زمنية من الأسبوع (0..1، وأكبر من 1 = تعارض)."""
+    import numpy as np
+    import pandas as pd
+
+    active = frame[~frame['is_canceled'] & (frame['duration'] > 0)]
+    rooms = active[['classroom_id', 'classroom']].drop_duplicates('classroom_id').sort_values('classroom_id')
+    bins = MINUTES_PER_WEEK // resolution
+    labels = [_label(minute) for minute in range(0, MINUTES_PER_WEEK, resolution)]
+
+    # مصفوفة فروق على مستوى الدقيقة ثم cumsum: عدد المحاضرات في القاعة في كل دقيقة
+    room_index = pd.Index(rooms['classroom_id']).get_indexer(active['classroom_id'])
+    diff = np.zeros((len(rooms), MINUTES_PER_WEEK + 1), dtype=np.int32)
+    np.add.at(diff, (room_index, active['start'].to_numpy()), 1)
+    np.add.at(diff, (room_index, active['end'].to_numpy()), -1)
+    per_minute = diff[:, :MINUTES_PER_WEEK].cumsum(axis=1)
+    values = per_minute.reshape(len(rooms), bins, resolution).mean(axis=2).round(3)
+
+    result = pd.DataFrame(values, columns=labels)
+    result.insert(0, 'classroom', rooms['classroom'].to_numpy())
+    result.insert(0, 'classroom_id', rooms['classroom_id'].to_numpy())
+    return _table(result.columns, result)
+
+
+def seat_fill(frame):
+    """عدد الطلاب مقابل سعة القاعة لكل قاعة."""
+    import pandas as pd
+
+    active = frame[~frame['is_canceled']]
+    if active.empty:
+        return _table(SEAT_FILL_COLUMNS, pd.DataFrame(columns=SEAT_FILL_COLUMNS))
+    active = active.assign(overbooked=active['fill'] > 1)
+    result = active.groupby(['classroom_id', 'classroom'], sort=True).agg(
+        capacity=('capacity', 'max'),
+        lectures=('lecture_id', 'count'),
+        weekly_minutes=('duration', 'sum'),
+        avg_fill=('fill', 'mean'),
+        max_fill=('fill', 'max'),
+        overbooked=('overbooked', 'sum'),
+    ).reset_index()
+    result[['avg_fill', 'max_fill']] = result[['avg_fill', 'max_fill']].round(3)
+    return _table(SEAT_FILL_COLUMNS, result)
+
+
+def doctor_load(frame):
+    """ساعات التدريس الأسبوعية لكل دكتور."""
+    import pandas as pd
+
+    active = frame[~frame['is_canceled'] & frame['doctor_id'].notna()]
+    if active.empty:
+        return _table(DOCTOR_LOAD_COLUMNS, pd.DataFrame(columns=DOCTOR_LOAD_COLUMNS))
+    result = active.groupby(['doctor_id', 'doctor'], sort=True).agg(
+        lectures=('lecture_id', 'count'),
+        courses=('course_id', 'nunique'),
+        teaching_days=('day', 'nunique'),
+        weekly_minutes=('duration', 'sum'),
+        students=('num_students', 'sum'),
+    ).reset_index()
+    result['weekly_hours'] = (result['weekly_minutes'] / 60).round(2)
+    result = result.sort_values(['weekly_minutes', 'doctor_id'], ascending=[False, True])
+    return _table(DOCTOR_LOAD_COLUMNS, result)
+
+
+def cancellation_rates(frame, by='doctor'):
+    """نسبة المحاضرات الملغاة حسب الدكتور أو القاعة أو اليوم."""
+    import pandas as pd
+
+    keys = {'doctor': ['doctor_id', 'doctor'], 'classroom': ['classroom_id', 'classroom'], 'day': ['day_index', 'day']}[by]
+    columns = (*keys, 'lectures', 'canceled', 'rate')
+    if frame.empty:
+        return _table(columns, pd.DataFrame(columns=columns))
+    result = frame.groupby(keys, sort=True).agg(
+        lectures=('lecture_id', 'count'),
+        canceled=('is_canceled', 'sum'),
+    ).reset_index()
+    result['rate'] = (result['canceled'] / result['lectures']).round(3)
+    return _table(columns, result)
+
+
+def build_report(table, report, resolution=DEFAULT_RESOLUTION, by='doctor'):
+    frame = load_frame(table)
+    if report == 'heatmap':
+        return occupancy_heatmap(frame, resolution)
+    if report == 'seat-fill':
+        return seat_fill(frame)
+    if report == 'doctor-load':
+        return doctor_load(frame)
+    return cancellation_rates(frame, by)
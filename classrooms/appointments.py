@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+from .cache import invalidate_scope
+from .changelog import record_bulk, record_inserts
+from .models import ChangeLog, ClassScheduleQuerySet, DoctorAppointment
+
+# كود اليوم → رقم اليوم في datetime.weekday()
+DAY_TO_WEEKDAY = {code: weekday for weekday, code in ClassScheduleQuerySet.WEEKDAY_MAP.items()}
+
+MAX_EXPAND_DAYS = 200
+AVAILABILITY_SCOPE = 'availability'
+
+
+def rule_slots(rule, start_date, end_date):
+    start_date = max(start_date, rule.valid_from)
+    end_date = min(end_date, rule.valid_until)
+    weekday = DAY_TO_WEEKDAY[rule.day]
+    step = timedelta(minutes=rule.slot_minutes)
+
+    day = start_date + timedelta(days=(weekday - start_date.weekday()) % 7)
+    while day <= end_date:
+        slot = datetime.combine(day, rule.start_time)
+        end = datetime.combine(day, rule.end_time)
+        while slot + step <= end:
+            yield day, slot.time()
+            slot += step
+        day += timedelta(days=7)
+
+
+def expand_rule(rule, start_date, end_date):
+    """يولد مواعيد القاعدة في الفترة بـ bulk_create، ويتجاهل المواعيد الموجودة بالفعل."""
+    slots = list(rule_slots(rule, start_date, end_date))
+    if not slots:
+        return []
+
+    in_range = DoctorAppointment.objects.filter(
+        doctor_id=rule.doctor_id,
+        appointment_date__range=(slots[0][0], slots[-1][0]),
+    )
+    existing = set(in_range.values_list('appointment_date', 'appointment_time'))
+    new_slots = {(day, time) for day, time in slots if (day, time) not in existing}
+    if not new_slots:
+        return []
+    # ✅ ignore_conflicts + unique (doctor, date, time): توليدين متزامنين لنفس القاعدة ما بيكرروش المواعيد
+    DoctorAppointment.objects.bulk_create([
+        DoctorAppointment(
+            doctor_id=rule.doctor_id,
+            location=rule.location,
+            appointment_date=day,
+            appointment_time=time,
+            available=True,
+            description=rule.description,
+        )
+        for day, time in sorted(new_slots)
+    ], batch_size=1000, ignore_conflicts=True)
+    # مع ignore_conflicts الـ pk ما بيرجعش، فبنقرا الصفوف الجديدة تاني
+    created = [
+        appointment for appointment in in_range.order_by('appointment_date', 'appointment_time')
+        if (appointment.appointment_date, appointment.appointment_time) in new_slots
+    ]
+    record_inserts(created)
+    invalidate_scope(AVAILABILITY_SCOPE)
+    return created
+
+
+def available_slots(start_date, end_date, doctor_id=None):
+    queryset = DoctorAppointment.objects.filter(
+        available=True,
+        appointment_date__range=(start_date, end_date),
+    ).select_related('doctor')
+    if doctor_id:
+        queryset = queryset.filter(doctor_id=doctor_id)
+    return queryset
+
+
+def book(appointment_id):
+    # ✅ UPDATE ... WHERE available: أول طلب بس هو اللي بيحجز حتى لو الطلبات متزامنة
+    booked = DoctorAppointment.objects.filter(pk=appointment_id, available=True).update(available=False)
+    if booked:
+        record_bulk(DoctorAppointment, [appointment_id], ChangeLog.OP_UPDATE, {'available': False})
+        # الحجز بيغير المواعيد المتاحة بس، مش كل الكاش
+        invalidate_scope(AVAILABILITY_SCOPE)
+    return bool(booked)
@@ -0,0 +1,77 @@
+from collections import defaultdict
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .changelog import record_bulk
+from .locks import lock_room_days
+from .models import ChangeLog, Classroom, ClassSchedule
+from .rollover import check_overlaps
+
+
+def lectures_in_scope(table=None, day=None, classroom_id=None, doctor_id=None, require_filter=True):
+    if require_filter and not any([table, day, classroom_id, doctor_id]):
+        raise serializers.ValidationError("⚠️ لازم تحدد جدول أو يوم أو قاعة أو دكتور.")
+    queryset = ClassSchedule.objects.all()
+    if table:
+        queryset = queryset.filter(pk__in=table.table_schedules.values('class_schedule_id'))
+    if day:
+        queryset = queryset.filter(day=day)
+    if classroom_id:
+        queryset = queryset.filter(classroom_id=classroom_id)
+    if doctor_id:
+        queryset = queryset.filter(course__doctor_id=doctor_id)
+    return queryset
+
+
+def bulk_cancel(scope, note='', canceled=True):
+    """إلغاء (أو استرجاع) كل المحاضرات في النطاق بـ UPDATE واحد وحدث واحد في سجل التغييرات."""
+    fields = {'is_canceled': canceled, 'note': note if canceled else None}
+    with transaction.atomic():
+        ids = sorted(scope.select_for_update(of=('self',)).values_list('pk', flat=True))
+        ClassSchedule.objects.filter(pk__in=ids).update(**fields)
+        record_bulk(ClassSchedule, ids, ChangeLog.OP_UPDATE, fields)
+    return ids
+
+
+def bulk_move(scope, classroom_map):
+    """نقل محاضرات قاعة لقاعة تانية (صيانة مثلاً) بعد التأكد إن مفيش تعارض في القاعات الجديدة."""
+    classroom_map = {int(k): int(v) for k, v in classroom_map.items() if int(k) != int(v)}
+    if not classroom_map:
+        raise serializers.ValidationError({'classroom_map': '⚠️ لازم تحدد قاعة واحدة على الأقل.'})
+    missing = set(classroom_map.values()) - set(
+        Classroom.objects.filter(pk__in=classroom_map.values()).values_list('pk', flat=True)
+    )
+    if missing:
+        raise serializers.ValidationError({'classroom_map': f"⚠️ عناصر غير موجودة: {sorted(missing)}"})
+
+    fields = ('pk', 'classroom_id', 'day', 'start_time', 'end_time')
+    with transaction.atomic():
+        moving = list(scope.filter(classroom_id__in=classroom_map).select_for_update(of=('self',)).values(*fields))
+        moving_ids = {row['pk'] for row in moving}
+        # نفس أقفال الـ serializer: إضافة محاضرة في قاعة مستهدفة بتستنى لحد ما النقل يخلص
+        lock_room_days({(classroom_map[row['classroom_id']], row['day']) for row in moving})
+
+        # المحاضرات اللي هتفضل في القاعات الجديدة: أي محاضرة مش بتتنقل، حتى لو قاعتها مصدر في الـ map
+        # (محاضرات بره النطاق ما بتتحركش)
+        targets = set(classroom_map.values())
+        staying = ClassSchedule.objects.filter(classroom_id__in=targets).exclude(pk__in=moving_ids).values(*fields)
+
+        rows = [
+            {**row, 'source_id': row['pk'], 'classroom_id': classroom_map[row['classroom_id']]}
+            for row in moving
+        ]
+        rows += [{**row, 'source_id': row['pk']} for row in staying]
+        check_overlaps(rows)
+
+        by_target = defaultdict(list)
+        for row in moving:
+            by_target[classroom_map[row['classroom_id']]].append(row['pk'])
+        for target, ids in by_target.items():
+            ClassSchedule.objects.filter(pk__in=ids).update(classroom_id=target)
+
+        record_bulk(
+            ClassSchedule, moving_ids, ChangeLog.OP_UPDATE,
+            classroom_map={str(k): v for k, v in classroom_map.items()},
+        )
+    return sorted(moving_ids)
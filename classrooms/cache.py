@@ -0,0 +1,256 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from django.core.cache import cache as shared_cache
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from university_display.db_routers import mark_recent_write, replica_may_be_stale
+
+# ✅ طبقتين كاش: LRU محلي صغير داخل كل عملية + كاش مشترك (CACHES['default']) بين العمليات
+LOCAL_MAX_ENTRIES = 512
+LOCAL_TTL = 30          # ثواني
+SHARED_TTL = 300        # ثواني
+REVISION_TTL = 1        # كل عملية تعيد قراءة رقم المراجعة المشترك كل ثانية على الأكثر
+BUILD_LOCK_TTL = 10     # مدة قفل إعادة البناء بين العمليات
+BUILD_WAIT = 2.0        # أقصى انتظار لعملية تانية بتبني نفس المفتاح
+FINGERPRINT_TTL = 24 * 60 * 60  # صور الجداول وملفات التقويم
+
+REVISION_KEY = 'display:revision'
+
+
+class LocalLRU:
+    def __init__(self, max_entries=LOCAL_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=LOCAL_TTL):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalLRU()
+
+# أقفال مقسمة (striped) بدل قفل لكل مفتاح عشان الذاكرة تفضل محدودة
+_build_locks = [threading.Lock() for _ in range(64)]
+
+
+def _lock_for(key):
+    return _build_locks[hash(key) % len(_build_locks)]
+
+
+def get_revision(key=REVISION_KEY):
+    revision = local_cache.get(key)
+    if revision is None:
+        revision = shared_cache.get(key)
+        if revision is None:
+            shared_cache.add(key, uuid.uuid4().hex[:12], timeout=None)
+            revision = shared_cache.get(key)
+        local_cache.set(key, revision, ttl=REVISION_TTL)
+    return revision
+
+
+def scoped_revision(scope):
+    # مراجعة جزء واحد (زي المواعيد المتاحة) فوق المراجعة العامة: أي invalidate() عام بيغيرها برضه
+    return f"{get_revision()}-{get_revision(f'{REVISION_KEY}:{scope}')}"
+
+
+def shared_revision():
+    # المراجعة المشتركة من غير الكاش المحلي: للمقارنة قبل وبعد بناء طويل
+    return shared_cache.get(REVISION_KEY)
+
+
+def invalidate_scope(scope):
+    """تغيير بيأثر على جزء واحد بس (حجز موعد): باقي الكاش يفضل زي ما هو."""
+    key = f"{REVISION_KEY}:{scope}"
+    mark_recent_write()
+    revision = uuid.uuid4().hex[:12]
+    shared_cache.set(key, revision, timeout=None)
+    local_cache.set(key, revision, ttl=REVISION_TTL)
+    return revision
+
+
+def invalidate():
+    # قبل المراجعة الجديدة: أي حد هيبني بيها من replica لازم يشوف إن فيه كتابة لسه ما وصلتش
+    mark_recent_write()
+    # قيمة جديدة عشوائية (مش incr) عشان عمليتين متزامنتين ما يرجعوش لنفس المراجعة
+    revision = uuid.uuid4().hex[:12]
+    shared_cache.set(REVISION_KEY, revision, timeout=None)
+    local_cache.clear()
+    local_cache.set(REVISION_KEY, revision, ttl=REVISION_TTL)
+    return revision
+
+
+def make_key(prefix, params=None, revision=None):
+    revision = revision or get_revision()
+    params = sorted((params or {}).items())
+    digest = hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+    return f"display:{prefix}:{revision}:{digest}"
+
+
+def get_cached(key):
+    value = local_cache.get(key)
+    if value is None:
+        value = shared_cache.get(key)
+        if value is not None:
+            local_cache.set(key, value)
+    return value
+
+
+def get_or_build(key, builder, timeout=SHARED_TTL):
+    """builder() يرجع (value, cacheable). طلب واحد بس بيبني والباقي بيستنوا النتيجة."""
+    value = get_cached(key)
+    if value is not None:
+        return value
+
+    with _lock_for(key):
+        # يمكن thread تاني خلص البناء واحنا مستنيين القفل
+        value = local_cache.get(key)
+        if value is not None:
+            return value
+
+        lock_key = f"{key}:building"
+        if not shared_cache.add(lock_key, 1, timeout=BUILD_LOCK_TTL):
+            # عملية تانية بتبني نفس المفتاح، نستنى النتيجة بدل ما نضرب قاعدة البيانات
+            deadline = time.monotonic() + BUILD_WAIT
+            while time.monotonic() < deadline:
+                value = shared_cache.get(key)
+                if value is not None:
+                    local_cache.set(key, value)
+                    return value
+                time.sleep(0.05)
+            lock_key = None
+
+        try:
+            value, cacheable = builder()
+            if cacheable:
+                shared_cache.set(key, value, timeout=timeout)
+                local_cache.set(key, value)
+            return value
+        finally:
+            if lock_key:
+                shared_cache.delete(lock_key)
+
+
+def prime(key, value, timeout=SHARED_TTL):
+    shared_cache.set(key, value, timeout=timeout)
+    local_cache.set(key, value)
+
+
+def get_fingerprinted(prefix, params, load, build, timeout=FINGERPRINT_TTL):
+    """load() يرجع الصفوف، build(rows) يرجع الـ body. يرجع (body, fingerprint).
+
+    مراجعة الكاش بتوصل لـ fingerprint الصفوف، والـ body متخزن بالـ fingerprint: أي كتابة في مكان تاني
+    بتكلف استعلام load واحد بس، والـ body ما بيتبنيش تاني إلا لو الصفوف نفسها اتغيرت.
+    """
+    pointer_key = make_key(prefix, params)
+    fingerprint = shared_cache.get(pointer_key)
+    rows = None
+    if fingerprint is None:
+        rows = load()
+        fingerprint = hashlib.sha1(repr((prefix, sorted(params.items()), rows)).encode()).hexdigest()
+        shared_cache.set(pointer_key, fingerprint, timeout=timeout)
+
+    body_key = f"display:{prefix}:body:{fingerprint}"
+    body = local_cache.get(body_key)
+    if body is None:
+        body = shared_cache.get(body_key)
+        if body is None:
+            body = build(load() if rows is None else rows)
+            shared_cache.set(body_key, body, timeout=timeout)
+        local_cache.set(body_key, body)
+    return body, fingerprint
+
+
+def view_cache_prefix(basename, action, pk=None):
+    return f"{basename}:{action}:{pk or ''}"
+
+
+def cache_response(timeout=SHARED_TTL):
+    """ديكوريتور لـ list/retrieve في الـ ViewSets: المفتاح = المسار + الباراميترات + مراجعة الكاش."""
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            prefix = view_cache_prefix(self.basename, self.action, kwargs.get(self.lookup_field))
+            params = {k: request.query_params.getlist(k) for k in request.query_params}
+            # format بيتعامل معاه الـ renderer بعد كده، مش جزء من البيانات
+            params.pop('format', None)
+            # ?today=1 بيتحول ليوم النهارده: بعد نص الليل المفتاح بيتغير بدل ما الشاشة تفضل على امبارح
+            if params.get('today') == ['1']:
+                params['today'] = [timezone.localdate().isoformat()]
+            key = make_key(prefix, params)
+
+            # تخفيف الحمل (university_display/throttling.py): الرد من الكاش بس من غير قاعدة البيانات
+            retry_after = getattr(request, 'load_shedding', None)
+            if retry_after:
+                data = get_cached(key)
+                if data is None:
+                    return Response({'error': 'الخادم مشغول، حاول مرة أخرى'}, status=503,
+                                    headers={'Retry-After': str(retry_after)})
+                return Response(data)
+
+            status_holder = {}
+
+            def build():
+                response = view_method(self, request, *args, **kwargs)
+                status_holder['response'] = response
+                # رد اتبنى من replica ممكن تكون متأخرة عن آخر كتابة: يتبعت بس ما يتخزنش
+                return response.data, response.status_code == 200 and not replica_may_be_stale()
+
+            data = get_or_build(key, build, timeout=timeout)
+            response = status_holder.get('response')
+            if response is not None:
+                return response
+            return Response(data)
+        return wrapper
+    return decorator
+
+
+class CacheInvalidationMixin:
+    # ✅ أي كتابة ناجحة (create/update/destroy أو action بـ POST) بتغير مراجعة الكاش
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # cache_primed: الـ action غيّر المراجعة وسخّن الكاش بنفسه (زي نشر الجدول)
+        if request.method not in SAFE_METHODS and response.status_code < 400 \
+                and not getattr(response, 'cache_primed', False):
+            invalidate()
+        return response
+
+
+class CachedReadMixin:
+    @cache_response()
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response()
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
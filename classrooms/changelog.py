@@ -0,0 +1,178 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, Max, Min, OuterRef
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import ChangeLog, Classroom, ClassSchedule, Course, DoctorAppointment, TableSchedule
+
+# الموديلات اللي بنسجل تغييراتها للمزامنة
+TRACKED_MODELS = (ClassSchedule, TableSchedule, Course, Classroom, DoctorAppointment)
+
+# أقصى عدد تغييرات في رد واحد من /api/sync/
+SYNC_PAGE_SIZE = 500
+# أرقام المراجعة من sequence: ممكن رقم أصغر يتعمله commit بعد رقم أكبر.
+# التغييرات الأحدث من المهلة دي (أو من أقدم transaction لسه مفتوحة) ما بتترجعش لحد ما تستقر
+SYNC_SAFETY_LAG = timedelta(seconds=getattr(settings, 'SYNC_SAFETY_LAG_SECONDS', 2))
+
+_suppressed = ContextVar('changelog_suppressed', default=False)
+
+
+def serialize_instance(instance):
+    # نسخة مسطحة من الصف (حقول + *_id) عشان الرد يبقى صغير
+    return {
+        field.attname: field.value_from_object(instance)
+        for field in instance._meta.concrete_fields
+    }
+
+
+def record_change(instance, op):
+    data = {} if op == ChangeLog.OP_DELETE else serialize_instance(instance)
+    return ChangeLog.objects.create(
+        model=instance._meta.model_name,
+        object_id=instance.pk,
+        op=op,
+        data=data,
+    )
+
+
+def record_inserts(instances):
+    # صف لكل عنصر بس في INSERT واحد (للنسخ الجماعي بـ bulk_create)
+    return ChangeLog.objects.bulk_create([
+        ChangeLog(
+            model=instance._meta.model_name,
+            object_id=instance.pk,
+            op=ChangeLog.OP_INSERT,
+            data=serialize_instance(instance),
+        )
+        for instance in instances
+    ], batch_size=1000)
+
+
+def record_bulk(model, ids, op, fields=None, **extra):
+    # ✅ تغيير جماعي = صف واحد في السجل (ids + الحقول المعدلة) بدل صف لكل محاضرة
+    ids = sorted(ids)
+    if not ids:
+        return None
+    data = {'ids': ids, **extra}
+    if fields:
+        data['fields'] = fields
+    return ChangeLog.objects.create(model=model._meta.model_name, op=op, data=data)
+
+
+@contextmanager
+def suppressed():
+    # إيقاف التسجيل التلقائي مؤقتاً (العمليات الجماعية بتسجل بنفسها عن طريق record_bulk)
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
+
+
+def _on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or _suppressed.get():
+        return
+    record_change(instance, ChangeLog.OP_INSERT if created else ChangeLog.OP_UPDATE)
+
+
+def _on_delete(sender, instance, **kwargs):
+    if _suppressed.get():
+        return
+    record_change(instance, ChangeLog.OP_DELETE)
+
+
+def connect_signals():
+    for model in TRACKED_MODELS:
+        post_save.connect(_on_save, sender=model, dispatch_uid=f'changelog_save_{model._meta.model_name}')
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f'changelog_delete_{model._meta.model_name}')
+
+
+def current_revision():
+    return ChangeLog.objects.aggregate(rev=Max('revision'))['rev'] or 0
+
+
+def _oldest_open_write():
+    # بداية أقدم transaction تانية كتبت حاجة ولسه ما خلصتش (PostgreSQL بس)
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT min(xact_start) FROM pg_stat_activity "
+            "WHERE backend_xid IS NOT NULL AND pid <> pg_backend_pid()"
+        )
+        return cursor.fetchone()[0]
+
+
+def safe_revision(since=0):
+    """أعلى مراجعة مضمون إن كل اللي قبلها اتعمله commit: اللي بعدها ممكن يكون فيه فجوات لسه هتتملى."""
+    cutoff = timezone.now() - SYNC_SAFETY_LAG
+    oldest = _oldest_open_write()
+    if oldest is not None:
+        cutoff = min(cutoff, oldest)
+    unsettled = ChangeLog.objects.filter(revision__gt=since, created_at__gte=cutoff).aggregate(
+        rev=Min('revision'))['rev']
+    return unsettled - 1 if unsettled is not None else current_revision()
+
+
+def compaction_horizon():
+    marker = ChangeLog.objects.filter(op=ChangeLog.OP_COMPACT).order_by('-revision').first()
+    return marker.data.get('horizon', 0) if marker else 0
+
+
+def _entry(change):
+    entry = {'rev': change.revision, 'model': change.model, 'op': change.op}
+    if change.object_id is not None:
+        entry['id'] = change.object_id
+    if change.data:
+        entry['data'] = change.data
+    return entry
+
+
+def changes_since(since, limit=SYNC_PAGE_SIZE, models=None):
+    head = current_revision()
+    # العميل أقدم من آخر ضغط للسجل أو جاي من قاعدة بيانات تانية → لازم يعيد التحميل كامل
+    if since < compaction_horizon() or since > head:
+        return {'resync_required': True, 'revision': safe_revision(), 'changes': [], 'has_more': False}
+
+    # الـ cursor عمره ما يعدي الحد الآمن، فالعميل ما بيفوتش مراجعة اتعملها commit متأخر
+    horizon = max(safe_revision(since), since)
+    queryset = ChangeLog.objects.filter(revision__gt=since, revision__lte=horizon).exclude(op=ChangeLog.OP_COMPACT)
+    if models:
+        queryset = queryset.filter(model__in=models)
+
+    page = list(queryset.order_by('revision')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    revision = page[-1].revision if has_more else horizon
+    return {
+        'resync_required': False,
+        'revision': revision,
+        'changes': [_entry(change) for change in page],
+        'has_more': has_more,
+    }
+
+
+def compact(retention_days=30):
+    """يضغط السجل: يبقي آخر تغيير لكل صف ويحذف ما هو أقدم من مدة الاحتفاظ."""
+    with transaction.atomic():
+        # 1) حذف التغييرات اللي اتغطت بتغيير أحدث لنفس الصف (بدون فقد معلومات)
+        newer = ChangeLog.objects.filter(
+            model=OuterRef('model'), object_id=OuterRef('object_id'), revision__gt=OuterRef('revision')
+        )
+        superseded = ChangeLog.objects.filter(object_id__isnull=False).filter(Exists(newer)).delete()[0]
+
+        # 2) حذف القديم تماماً وتسجيل الحد الأدنى اللي بعده لازم مزامنة كاملة
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        expired = ChangeLog.objects.filter(created_at__lt=cutoff)
+        horizon = expired.aggregate(rev=Max('revision'))['rev']
+        pruned = 0
+        if horizon:
+            pruned = expired.delete()[0]
+            ChangeLog.objects.create(op=ChangeLog.OP_COMPACT, model='', data={'horizon': horizon})
+
+    return {'superseded': superseded, 'pruned': pruned}
@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+import re
+
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from .cache import LocalLRU
+
+# ✅ ضغط الردود (brotli أو gzip) مع حفظ النسخة المضغوطة بالـ ETag:
+# شاشات العرض بتطلب نفس البيانات كل شوية، فالضغط بيتعمل مرة واحدة لكل نسخة في كل عملية.
+# الضغط بيحصل مع أول طلب مش وقت تسخين الكاش: الـ body نفسه بيختلف حسب الـ renderer (JSON / msgpack / columnar)
+MIN_SIZE = 512
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/msgpack', 'application/cbor', 'text/csv', 'text/calendar',
+)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+_compressed = LocalLRU(max_entries=256)
+_ACCEPT_ENCODING = re.compile(r'\s*([a-z*-]+)\s*(?:;\s*q\s*=\s*([^;,\s]*))?\s*$')
+_QVALUE = re.compile(r'(?:0(?:\.\d{0,3})?|1(?:\.0{0,3})?)')
+
+
+def _accepted_encodings(header):
+    qvalues = {}
+    for part in header.lower().split(','):
+        match = _ACCEPT_ENCODING.match(part)
+        if not match:
+            continue
+        # q غلط (زي gzip;q=abc) = الترميز مش مقبول
+        qvalue = match.group(2)
+        qvalues[match.group(1)] = 1.0 if qvalue is None else float(qvalue) if _QVALUE.fullmatch(qvalue) else 0.0
+    # * = أي ترميز مش مذكور بالاسم (br;q=0, * = gzip بس)
+    return {
+        encoding for encoding in ('br', 'gzip')
+        if qvalues.get(encoding, qvalues.get('*', 0.0)) > 0
+    }
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return _brotli().compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.status_code != 200 or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+
+        etag = response.get('ETag')
+        if not etag:
+            etag = f'"{hashlib.sha1(response.content).hexdigest()}"'
+            response['ETag'] = etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        # الشاشة عندها نفس النسخة: 304 من غير body
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            tags = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+            if '*' in tags or etag.removeprefix('W/') in tags:
+                response.status_code = 304
+                response.content = b''
+                del response['Content-Type']
+                return response
+
+        if len(response.content) < MIN_SIZE:
+            return response
+        accepted = _accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        encoding = 'br' if 'br' in accepted and _brotli() else 'gzip' if 'gzip' in accepted else None
+        if encoding is None:
+            return response
+
+        key = f"{encoding}:{etag}"
+        body = _compressed.get(key)
+        if body is None:
+            body = compress(response.content, encoding)
+            _compressed.set(key, body, ttl=300)
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        # نفس الـ ETag للنسخة المضغوطة وغير المضغوطة = weak
+        if not etag.startswith('W/'):
+            response['ETag'] = f"W/{etag}"
+        return response
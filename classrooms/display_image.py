@@ -0,0 +1,163 @@
+import io
+import os
+import re
+from datetime import date
+from functools import lru_cache
+
+from django.conf import settings
+
+from .cache import get_fingerprinted
+from .models import ClassSchedule, ClassScheduleQuerySet, Table
+
+# ✅ صورة جاهزة لجدول القاعة في يوم: الأجهزة الرخيصة (e-ink / شاشات من غير متصفح) بتجيب صورة واحدة بس
+FONT_PATH = getattr(settings, 'DISPLAY_FONT_PATH', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
+LOGO_PATH = getattr(settings, 'DISPLAY_LOGO_PATH', os.path.join(settings.BASE_DIR, 'static', 'logo.jpg'))
+IMAGE_TYPES = {'png': 'image/png', 'bmp': 'image/bmp'}
+DEFAULT_SIZE = (800, 480)
+IMAGE_SIZES = frozenset(
+    tuple(int(side) for side in size.lower().split('x'))
+    for size in getattr(settings, 'DISPLAY_IMAGE_SIZES', ['800x480'])
+) | {DEFAULT_SIZE}
+DAY_NAMES = {
+    'SUN': 'الأحد', 'MON': 'الاثنين', 'TUE': 'الثلاثاء', 'WED': 'الأربعاء',
+    'THU': 'الخميس', 'FRI': 'الجمعة', 'SAT': 'السبت',
+}
+
+_ARABIC = re.compile('[\u0600-\u06ff]')
+_LTR_RUNS = re.compile(r'[A-Za-z0-9][A-Za-z0-9.:/_-]*|[^A-Za-z0-9]+')
+_MIRROR = str.maketrans('()[]{}<>', ')(][}{><')
+
+
+def today_code():
+    return ClassScheduleQuerySet.WEEKDAY_MAP[date.today().weekday()]
+
+
+def room_day_rows(classroom, day):
+    table = Table.objects.filter(active=True).first()
+    if table is None:
+        return []
+    return list(
+        ClassSchedule.objects.in_table(table)
+        .filter(classroom=classroom, day=day)
+        .order_by('start_time', 'pk')
+        .values_list(
+            'start_time', 'end_time', 'course__name', 'course__code',
+            'course__doctor__display_title', 'course__doctor__full_name', 'course__doctor__username',
+            'is_canceled', 'note',
+        )
+    )
+
+
+@lru_cache(maxsize=16)
+def _font(size):
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype(FONT_PATH, size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+@lru_cache(maxsize=8)
+def _logo(height):
+    from PIL import Image
+
+    try:
+        logo = Image.open(LOGO_PATH).convert('RGB')
+    except OSError:
+        return None
+    logo.thumbnail((height * 3, height))
+    return logo
+
+
+def _visual(text):
+    # من غير libraqm بيلو بيرسم الحروف بالترتيب المنطقي (شمال -> يمين): ترتيب bidi مبسط لسطر RTL،
+    # الكلمات الإنجليزية والأرقام بتفضل زي ما هي والباقي بيتعكس (مع قلب الأقواس)
+    from PIL import features
+
+    if not _ARABIC.search(text) or features.check('raqm'):
+        return text
+    runs = _LTR_RUNS.findall(text)
+    return ''.join(run if run[0].isascii() and run[0].isalnum() else run[::-1].translate(_MIRROR)
+                   for run in reversed(runs))
+
+
+def _fit(draw, text, font, max_width):
+    # قص النص بـ … لو أعرض من المساحة المتاحة
+    visual = _visual(text)
+    if draw.textlength(visual, font=font) <= max_width:
+        return visual
+    while text and draw.textlength(_visual(text + '…'), font=font) > max_width:
+        text = text[:-1]
+    return _visual(text + '…')
+
+
+def _doctor(row):
+    title, full_name, username = row[4], row[5], row[6]
+    name = full_name or username or ''
+    return f"{title} {name}".strip() if title else name
+
+
+def render(classroom, day, rows, size, image_type):
+    from PIL import Image, ImageDraw
+
+    width, height = size
+    image = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(image)
+    margin = max(width // 40, 4)
+
+    # الهيدر: اللوجو + اسم القاعة + اليوم
+    header = max(height // 6, 24)
+    logo = _logo(header - margin)
+    if logo is not None:
+        image.paste(logo, (margin, margin // 2))
+    title_font = _font(max(header // 2, 10))
+    title_width = width - 3 * margin - (logo.width if logo is not None else 0)
+    draw.text((width - margin, header // 2), _fit(draw, f"{classroom.name} - {DAY_NAMES.get(day, day)}", title_font, title_width),
+              font=title_font, fill='black', anchor='rm')
+    draw.line((margin, header, width - margin, header), fill='black', width=max(height // 240, 1))
+
+    if not rows:
+        draw.text((width // 2, (header + height) // 2), _visual("لا توجد محاضرات"),
+                  font=_font(max(header // 2, 10)), fill='black', anchor='mm')
+    else:
+        row_height = max((height - header - margin) // max(len(rows), 4), 12)
+        font = _font(max(int(row_height * 0.4), 8))
+        small = _font(max(int(row_height * 0.28), 7))
+        for i, row in enumerate(rows):
+            top = header + margin // 2 + i * row_height
+            if top + row_height > height:
+                break
+            start, end, course, code, *_, canceled, note = row
+            middle = top + row_height // 2
+            fill = 'gray' if canceled else 'black'
+            times = f"{start:%H:%M} - {end:%H:%M}"
+            draw.text((margin, middle), times, font=font, fill=fill, anchor='lm')
+            text_width = width - 3 * margin - draw.textlength(times, font=font)
+            draw.text((width - margin, middle - row_height // 6), _fit(draw, f"{course} ({code})", font, text_width),
+                      font=font, fill=fill, anchor='rm')
+            detail = "ملغاة" + (f" - {note}" if note else '') if canceled else _doctor(row)
+            draw.text((width - margin, middle + row_height // 4), _fit(draw, detail, small, text_width),
+                      font=small, fill='red' if canceled else 'black', anchor='rm')
+            if canceled:
+                draw.line((margin, middle, width - margin, middle), fill='red', width=max(row_height // 20, 1))
+            draw.line((margin, top + row_height, width - margin, top + row_height), fill='lightgray')
+
+    buffer = io.BytesIO()
+    if image_type == 'bmp':
+        # 1-bit من غير dithering عشان الخط يفضل حاد على e-ink
+        image = image.convert('L').point(lambda value: 255 if value > 160 else 0)
+        image.convert('1', dither=Image.Dither.NONE).save(buffer, format='BMP')
+    else:
+        image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def room_image(classroom, day, size=DEFAULT_SIZE, image_type='png'):
+    """يرجع (bytes, etag). الصورة بتتعمل تاني بس لو محاضرات القاعة في اليوم ده اتغيرت."""
+    params = {'classroom': classroom.pk, 'name': classroom.name, 'day': day, 'size': size, 'type': image_type}
+    return get_fingerprinted(
+        'display-image', params,
+        load=lambda: room_day_rows(classroom, day),
+        build=lambda rows: render(classroom, day, rows, size, image_type),
+    )
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import HttpResponse, HttpResponseNotModified
+from django.test import RequestFactory
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+from .cache import get_revision
+
+logger = logging.getLogger(__name__)
+
+# ✅ آخر رد سليم لكل endpoint عام بيتحفظ على القرص، وبيترجع لو قاعدة البيانات وقعت أو بطيئة
+FALLBACK_PATHS = getattr(settings, 'DISPLAY_FALLBACK_PATHS', ('/api/schedules/', '/api/classrooms/', '/api/accounts/doctors/'))
+SNAPSHOT_DIR = getattr(settings, 'DISPLAY_SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'var', 'snapshots'))
+FRESH = getattr(settings, 'DISPLAY_SNAPSHOT_FRESH', 5)
+STALE_WHILE_REVALIDATE = getattr(settings, 'DISPLAY_STALE_WHILE_REVALIDATE', 60)
+STALE_IF_ERROR = getattr(settings, 'DISPLAY_STALE_IF_ERROR', 24 * 60 * 60)
+MAX_SNAPSHOTS = getattr(settings, 'DISPLAY_SNAPSHOT_MAX_FILES', 2000)
+# الباراميترات اللي شاشات العرض بتستخدمها؛ أي باراميتر تاني = الطلب بيعدي من غير نسخة محفوظة
+SNAPSHOT_PARAMS = ('classroom', 'doctor', 'today', 'day', 'table_id', 'shape', 'format', 'type', 'width', 'height')
+# الـ Accept بيتختصر للنوع اللي الـ renderers بتفرق بينه، مش النص كله
+SNAPSHOT_MEDIA = (
+    'application/msgpack', 'application/cbor', 'shape=columnar', 'text/html', 'text/csv', 'text/calendar', 'image/',
+)
+
+
+def _etag(response):
+    # لو الـ view حاطط ETag بنفسه (زي صور الجداول) نحتفظ بيه عشان الشاشة ما تشوفش قيمتين
+    etag = response.get('ETag')
+    if etag:
+        return etag.removeprefix('W/').strip('"')
+    return hashlib.sha1(response.content).hexdigest()
+
+
+class SnapshotStore:
+    def __init__(self, directory=None):
+        self.directory = directory or SNAPSHOT_DIR
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.snap")
+
+    def load(self, key):
+        try:
+            with open(self._path(key), 'rb') as fh:
+                meta = json.loads(fh.readline())
+                meta['body'] = fh.read()
+                return meta
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key, response, revision):
+        os.makedirs(self.directory, exist_ok=True)
+        meta = {
+            'stored_at': time.time(),
+            'revision': revision,
+            'content_type': response.get('Content-Type', 'application/json'),
+            'etag': _etag(response),
+        }
+        # كتابة ذرية: ملف مؤقت ثم rename عشان القارئ ما يشوفش ملف نصه مكتوب
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(json.dumps(meta).encode() + b'\n')
+                fh.write(response.content)
+            path = self._path(key)
+            is_new = not os.path.exists(path)
+            os.replace(tmp, path)
+            if is_new:
+                self.prune()
+        except OSError:
+            logger.warning("Could not write display snapshot %s", key, exc_info=True)
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def prune(self, max_files=None):
+        # أقدم النسخ (حسب آخر كتابة) بتتمسح لما العدد يعدي الحد
+        max_files = max_files or MAX_SNAPSHOTS
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.snap')]
+        except OSError:
+            return
+        if len(entries) <= max_files:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - max_files]:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+
+
+def serve_snapshot(request, snapshot, age, source):
+    if f'"{snapshot["etag"]}"' in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(snapshot['body'], content_type=snapshot['content_type'])
+    age = str(int(age))
+    response['Age'] = age
+    response['X-Data-Age'] = age
+    response['X-Data-Source'] = source
+    response['ETag'] = f'"{snapshot["etag"]}"'
+    # النسخة المحفوظة مختلفة حسب Accept (JSON / msgpack / columnar)
+    patch_vary_headers(response, ('Accept',))
+    response._display_snapshot = True
+    return response
+
+
+def stored_response(request, source):
+    """آخر نسخة محفوظة للطلب (لو DisplayFallbackMiddleware شافه) ولسه في مدة STALE_IF_ERROR، وإلا None."""
+    key = getattr(request, '_display_snapshot_key', None)
+    snapshot = SnapshotStore().load(key) if key else None
+    if not snapshot:
+        return None
+    age = time.time() - snapshot['stored_at']
+    if age > STALE_IF_ERROR:
+        return None
+    return serve_snapshot(request, snapshot, age, source)
+
+
+class DisplayFallbackMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.store = SnapshotStore()
+        self._revalidating = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        if not self._eligible(request):
+            return self.get_response(request)
+
+        key = self._key(request)
+        request._display_snapshot_key = key
+        snapshot = self.store.load(key)
+        revision = self._revision(snapshot)
+        age = time.time() - snapshot['stored_at'] if snapshot else None
+
+        if snapshot and not getattr(request, '_display_revalidating', False) and snapshot['revision'] == revision:
+            if age <= FRESH:
+                return serve_snapshot(request, snapshot, age, 'snapshot')
+            if age <= FRESH + STALE_WHILE_REVALIDATE:
+                self._revalidate_in_background(request, key)
+                return serve_snapshot(request, snapshot, age, 'stale-while-revalidate')
+
+        response = self.get_response(request)
+
+        if getattr(response, '_display_snapshot', False):
+            # process_exception رجّع نسخة محفوظة بالفعل
+            return response
+        if response.status_code == 200 and not response.streaming:
+            if not snapshot or age > FRESH or snapshot['revision'] != revision \
+                    or snapshot['etag'] != _etag(response):
+                self.store.save(key, response, revision)
+            response['X-Data-Age'] = '0'
+            response['X-Data-Source'] = 'live'
+        elif response.status_code >= 500 and snapshot and age <= STALE_IF_ERROR:
+            return serve_snapshot(request, snapshot, age, 'stale-if-error')
+        return response
+
+    def process_exception(self, request, exception):
+        # ✅ انقطاع قاعدة البيانات: نرجع آخر نسخة سليمة بدل 500
+        if not isinstance(exception, DatabaseError):
+            return None
+        response = stored_response(request, 'stale-if-error')
+        if response is not None:
+            logger.warning("Serving display snapshot for %s after database error: %s", request.path, exception)
+        return response
+
+    def _eligible(self, request):
+        # الطلبات المجهولة أو بتوكن شاشة عرض بس: الرد مش بيختلف حسب المستخدم
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        return (
+            request.method in ('GET', 'HEAD')
+            and (not authorization or authorization.startswith('Device '))
+            and request.path.startswith(FALLBACK_PATHS)
+            and all(param in SNAPSHOT_PARAMS for param in request.GET)
+        )
+
+    def _key(self, request):
+        # query string متغير أو Accept غريب ما يعملش ملف جديد لكل طلب
+        params = sorted((param, request.GET.get(param)) for param in request.GET)
+        if request.GET.get('today') == '1':
+            # النسخة المحفوظة لـ today=1 تخص يوم واحد بس
+            params.append(('date', timezone.localdate().isoformat()))
+        accept = request.META.get('HTTP_ACCEPT', '')
+        media = [media for media in SNAPSHOT_MEDIA if media in accept]
+        raw = json.dumps([request.path, params, media])
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _revision(self, snapshot):
+        try:
+            return get_revision()
+        except Exception:
+            # الكاش المشترك نفسه مش متاح: نعتبر النسخة المحفوظة صالحة
+            return snapshot['revision'] if snapshot else None
+
+    def _revalidate_in_background(self, request, key):
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        # طلب جديد من المسار والـ query والـ Accept بس: نسخة من الطلب الأصلي كانت بتشاركه
+        # META والكوكيز والمستخدم والـ stream وهو لسه بيترد عليه
+        background_request = RequestFactory().get(
+            request.path, request.GET, secure=request.is_secure(),
+            HTTP_HOST=request.get_host(), HTTP_ACCEPT=request.META.get('HTTP_ACCEPT', '*/*'),
+        )
+        background_request._display_revalidating = True
+
+        def run():
+            try:
+                self(background_request)
+            except Exception:
+                logger.warning("Background revalidation failed for %s", request.path, exc_info=True)
+            finally:
+                connections.close_all()
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        # مش daemon: إيقاف العملية بيستنى التحديث يخلص بدل ما يقطعه في النص
+        threading.Thread(target=run, name=f"revalidate-{key[:8]}").start()
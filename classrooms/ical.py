@@ -0,0 +1,231 @@
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils.dateparse import parse_date
+
+from .cache import get_fingerprinted
+from .models import ClassSchedule, DoctorAppointment, Table
+
+# ✅ ملفات iCalendar (.ics) للدكتور / القاعة / الجدول: المحاضرات أحداث أسبوعية (RRULE)،
+# المحاضرة الملغاة = EXDATE على أقرب مرة جاية، والمواعيد أحداث منفردة
+TERM_START = parse_date(getattr(settings, 'ICAL_TERM_START', '') or '')
+TERM_END = parse_date(getattr(settings, 'ICAL_TERM_END', '') or '')
+CALENDAR_TIMEZONE = getattr(settings, 'ICAL_TIMEZONE', '')     # فاضي = floating (توقيت جهاز المستخدم)
+UID_DOMAIN = getattr(settings, 'ICAL_UID_DOMAIN', 'university-display')
+APPOINTMENT_MINUTES = 30
+APPOINTMENTS_PAST_DAYS = 30
+FEED_KINDS = ('doctor', 'classroom', 'table')
+
+ICAL_DAYS = {'SUN': 'SU', 'MON': 'MO', 'TUE': 'TU', 'WED': 'WE', 'THU': 'TH', 'FRI': 'FR', 'SAT': 'SA'}
+WEEKDAYS = {'MON': 0, 'TUE': 1, 'WED': 2, 'THU': 3, 'FRI': 4, 'SAT': 5, 'SUN': 6}
+
+LECTURE_FIELDS = (
+    'pk', 'day', 'start_time', 'end_time', 'is_canceled', 'note',
+    'course__name', 'course__code', 'classroom__name', 'course__doctor__full_name', 'course__doctor__username',
+)
+APPOINTMENT_FIELDS = ('pk', 'appointment_date', 'appointment_time', 'location', 'available', 'description')
+
+
+def _next_weekday(start, day):
+    return start + timedelta(days=(WEEKDAYS[day] - start.weekday()) % 7)
+
+
+def _week_start(today):
+    # الأسبوع الجامعي بيبدأ الأحد
+    return today - timedelta(days=(today.weekday() + 1) % 7)
+
+
+def lecture_events(queryset, today):
+    first_week = TERM_START or _week_start(today)
+    events = []
+    for row in queryset.order_by('day', 'start_time', 'pk').values(*LECTURE_FIELDS):
+        first = _next_weekday(first_week, row['day'])
+        exdate = None
+        if row['is_canceled']:
+            # الإلغاء بيخص أقرب محاضرة جاية (النهارده أو بعد كده)
+            exdate = max(_next_weekday(today, row['day']), first)
+        events.append({
+            'uid': f"lecture-{row['pk']}",
+            'first': first,
+            'start': row['start_time'],
+            'end': row['end_time'],
+            'rrule': f"FREQ=WEEKLY;BYDAY={ICAL_DAYS[row['day']]}",
+            'exdate': exdate,
+            'summary': f"{row['course__name']} ({row['course__code']})",
+            'location': row['classroom__name'],
+            'description': row['course__doctor__full_name'] or row['course__doctor__username'] or '',
+            'note': row['note'] if row['is_canceled'] else None,
+        })
+    return events
+
+
+def appointment_events(doctor_id, today):
+    queryset = DoctorAppointment.objects.filter(
+        doctor_id=doctor_id, appointment_date__gte=today - timedelta(days=APPOINTMENTS_PAST_DAYS)
+    ).order_by('appointment_date', 'appointment_time', 'pk')
+    events = []
+    for row in queryset.values(*APPOINTMENT_FIELDS):
+        start = datetime.combine(row['appointment_date'], row['appointment_time'])
+        events.append({
+            'uid': f"appointment-{row['pk']}",
+            'first': row['appointment_date'],
+            'start': row['appointment_time'],
+            'end': (start + timedelta(minutes=APPOINTMENT_MINUTES)).time(),
+            'rrule': None,
+            'exdate': None,
+            'summary': "ساعة مكتبية" + ("" if row['available'] else " (محجوز)"),
+            'location': row['location'],
+            'description': row['description'] or '',
+            'note': None,
+        })
+    return events
+
+
+def feed_events(kind, pk, today):
+    table = Table.objects.filter(pk=pk).first() if kind == 'table' else Table.objects.filter(active=True).first()
+    lectures = ClassSchedule.objects.in_table(table) if table else ClassSchedule.objects.none()
+    if kind == 'doctor':
+        return lecture_events(lectures.filter(course__doctor_id=pk), today) + appointment_events(pk, today)
+    if kind == 'classroom':
+        return lecture_events(lectures.filter(classroom_id=pk), today)
+    return lecture_events(lectures, today)
+
+
+def _escape(text):
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    # RFC 5545: السطر أقصاه 75 octet، والباقي بيكمل في سطر بيبدأ بمسافة
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts, current = [], b''
+    for char in line:
+        piece = char.encode('utf-8')
+        if len(current) + len(piece) > (75 if not parts else 74):
+            parts.append(current.decode('utf-8'))
+            current = b''
+        current += piece
+    parts.append(current.decode('utf-8'))
+    return '\r\n '.join(parts)
+
+
+def _local(day, time_value):
+    value = datetime.combine(day, time_value).strftime('%Y%m%dT%H%M%S')
+    return f";TZID={CALENDAR_TIMEZONE}:{value}" if CALENDAR_TIMEZONE else f":{value}"
+
+
+def _offset(value):
+    sign = '-' if value < timedelta(0) else '+'
+    hours, minutes = divmod(abs(int(value.total_seconds())) // 60, 60)
+    return f"{sign}{hours:02d}{minutes:02d}"
+
+
+def _transitions(zone, start, end):
+    """(لحظة التغيير UTC، التوقيت قبل، التوقيت بعد) لكل تغيير في الـ offset بين start و end."""
+    def offset(instant):
+        return instant.astimezone(zone).utcoffset()
+
+    found = []
+    day = datetime.combine(start, time(), timezone.utc)
+    stop = datetime.combine(end, time(), timezone.utc)
+    while day < stop:
+        after = day + timedelta(days=1)
+        if offset(day) != offset(after):
+            # بحث ثنائي لحد الثانية
+            low, high = day, after
+            while high - low > timedelta(seconds=1):
+                middle = low + (high - low) / 2
+                low, high = (middle, high) if offset(middle) == offset(low) else (low, middle)
+            found.append((high, offset(low), offset(high)))
+        day = after
+    return found
+
+
+def render_timezone(tzid, start, end):
+    """VTIMEZONE للـ TZID اللي في DTSTART: observance لكل تغيير توقيت في مدة الأحداث."""
+    zone = ZoneInfo(tzid)
+    first = datetime.combine(start, time(), zone)
+    observances = [(first.replace(tzinfo=None), first.utcoffset(), first.utcoffset(), first.dst(), first.tzname())]
+    for instant, before, after in _transitions(zone, start, end):
+        local = instant.astimezone(zone)
+        observances.append(((instant + before).replace(tzinfo=None), before, after, local.dst(), local.tzname()))
+
+    lines = ['BEGIN:VTIMEZONE', f"TZID:{tzid}"]
+    for onset, before, after, dst, tzname in observances:
+        kind = 'DAYLIGHT' if dst else 'STANDARD'
+        lines += [
+            f"BEGIN:{kind}",
+            f"DTSTART:{onset:%Y%m%dT%H%M%S}",
+            f"TZOFFSETFROM:{_offset(before)}",
+            f"TZOFFSETTO:{_offset(after)}",
+        ]
+        if tzname:
+            lines.append(f"TZNAME:{tzname}")
+        lines.append(f"END:{kind}")
+    lines.append('END:VTIMEZONE')
+    return lines
+
+
+def _until():
+    # RFC 5545: مع DTSTART;TZID لازم UNTIL يبقى UTC، ومع floating بيفضل وقت محلي
+    if not CALENDAR_TIMEZONE:
+        return f"{TERM_END:%Y%m%d}T235959"
+    end = datetime.combine(TERM_END, time(23, 59, 59), ZoneInfo(CALENDAR_TIMEZONE))
+    return f"{end.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}"
+
+
+def render_calendar(name, events):
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//University Display//Schedules//AR',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f"X-WR-CALNAME:{_escape(name)}",
+    ]
+    if CALENDAR_TIMEZONE:
+        lines.append(f"X-WR-TIMEZONE:{CALENDAR_TIMEZONE}")
+        if events:
+            dates = [event['first'] for event in events]
+            end = max(dates + [TERM_END or max(dates) + timedelta(days=366)])
+            lines += render_timezone(CALENDAR_TIMEZONE, min(dates), end + timedelta(days=1))
+    for event in events:
+        lines += [
+            'BEGIN:VEVENT',
+            f"UID:{event['uid']}@{UID_DOMAIN}",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART{_local(event['first'], event['start'])}",
+            f"DTEND{_local(event['first'], event['end'])}",
+            f"SUMMARY:{_escape(event['summary'])}",
+        ]
+        if event['location']:
+            lines.append(f"LOCATION:{_escape(event['location'])}")
+        description = event['description']
+        if event['note']:
+            description = f"{description}\n{event['note']}".strip()
+        if description:
+            lines.append(f"DESCRIPTION:{_escape(description)}")
+        if event['rrule']:
+            until = f";UNTIL={_until()}" if TERM_END else ''
+            lines.append(f"RRULE:{event['rrule']}{until}")
+        if event['exdate']:
+            lines.append(f"EXDATE{_local(event['exdate'], event['start'])}")
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return ('\r\n'.join(_fold(line) for line in lines) + '\r\n').encode('utf-8')
+
+
+def calendar_feed(kind, pk, name):
+    """يرجع (bytes, etag). الملف بيتبني تاني بس لو الأحداث نفسها اتغيرت."""
+    today = date.today()
+    return get_fingerprinted(
+        'ical', {'kind': kind, 'pk': pk, 'name': name, 'today': today.isoformat(), 'tz': CALENDAR_TIMEZONE,
+                 'until': TERM_END and TERM_END.isoformat()},
+        load=lambda: feed_events(kind, pk, today),
+        build=lambda events: render_calendar(name, events),
+    )
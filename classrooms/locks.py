@@ -0,0 +1,39 @@
+import zlib
+
+from django.db import connection
+
+# ✅ أقفال استشارية (advisory) على مستوى (القاعة، اليوم) و(الدكتور، اليوم) بدل قفل الجدول كله:
+# الكتابة في قاعات مختلفة بتمشي بالتوازي، ونفس القاعة/اليوم بتتسلسل
+ROOM_NAMESPACE = 3301
+DOCTOR_NAMESPACE = 3302
+
+
+def _key(*parts):
+    # pg_advisory_xact_lock(int4, int4): نحول المفتاح لرقم 32 بت موقّع
+    return zlib.crc32(':'.join(str(part) for part in parts).encode()) - 2 ** 31
+
+
+def lock_schedule_slots(classroom_id=None, doctor_id=None, day=None):
+    """لازم تتنادى جوه transaction.atomic(): القفل بيتفك تلقائياً مع نهاية الـ transaction."""
+    if not day:
+        return
+    keys = []
+    if classroom_id:
+        keys.append((ROOM_NAMESPACE, _key(classroom_id, day)))
+    if doctor_id:
+        keys.append((DOCTOR_NAMESPACE, _key(doctor_id, day)))
+    _lock(keys)
+
+
+def lock_room_days(slots):
+    """أقفال كل (القاعة، اليوم) المستهدفة في النقل الجماعي، قبل التأكد من التعارض."""
+    _lock({(ROOM_NAMESPACE, _key(classroom_id, day)) for classroom_id, day in slots})
+
+
+def _lock(keys):
+    if connection.vendor != 'postgresql':
+        return
+    # ترتيب ثابت للأقفال عشان ما يحصلش deadlock بين طلبين
+    with connection.cursor() as cursor:
+        for namespace, key in sorted(keys):
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [namespace, key])
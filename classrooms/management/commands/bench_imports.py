@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from university_display.startup import IMPORT_BUDGET, import_benchmark
+
+
+class Command(BaseCommand):
+    help = "Measure how long a fresh process takes to import the WSGI app and URLconf"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=float, default=IMPORT_BUDGET, help="Fail above this many seconds")
+        parser.add_argument('--top', type=int, default=15)
+
+    def handle(self, *args, **options):
+        seconds, slowest, heavy = import_benchmark(top=options['top'])
+        for name, cumulative, _ in slowest:
+            self.stdout.write(f"{cumulative * 1000:8.1f} ms  {name}")
+        self.stdout.write(f"⏱️ WSGI app ready in {seconds * 1000:.0f} ms (budget {options['budget'] * 1000:.0f} ms)")
+        if heavy:
+            raise CommandError(f"heavy modules imported at startup: {', '.join(heavy)} (import them inside the feature)")
+        if seconds > options['budget']:
+            raise CommandError("import time over budget")
+        self.stdout.write(self.style.SUCCESS("✅ within budget"))
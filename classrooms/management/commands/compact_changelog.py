@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from classrooms.changelog import compact
+
+
+class Command(BaseCommand):
+    help = "Compact the schedule change log used by /api/sync/"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=30)
+
+    def handle(self, *args, **options):
+        result = compact(retention_days=options['retention_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ superseded: {result['superseded']}, pruned: {result['pruned']}"
+        ))
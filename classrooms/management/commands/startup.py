@@ -0,0 +1,31 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from university_display.startup import (
+    pending_migrations, static_fingerprint, static_is_current, write_static_fingerprint,
+)
+
+
+class Command(BaseCommand):
+    help = "Run migrate / collectstatic only when migrations or static files changed since the last start"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-migrate', action='store_true', help="Only collect static files (image build)")
+        parser.add_argument('--force', action='store_true')
+
+    def handle(self, *args, **options):
+        if not options['skip_migrate']:
+            pending = pending_migrations()
+            if pending or options['force']:
+                self.stdout.write(f"🔁 {len(pending)} pending migrations")
+                call_command('migrate', interactive=False, verbosity=options['verbosity'])
+            else:
+                self.stdout.write("✅ migrations up to date")
+
+        fingerprint = static_fingerprint()
+        if options['force'] or not static_is_current(fingerprint):
+            self.stdout.write("📦 static files changed, collecting")
+            call_command('collectstatic', interactive=False, verbosity=options['verbosity'])
+            write_static_fingerprint(fingerprint)
+        else:
+            self.stdout.write("✅ static files up to date")
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from classrooms.tests_queryplans import (
+    BASELINE_PATH, measure, save_baseline, seed, undocumented_seq_scans, unmeasured_routes,
+)
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway test database and record query counts / EXPLAIN plans of every API endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1, help="Multiply the seeded row counts")
+
+    def handle(self, *args, **options):
+        missing = unmeasured_routes()
+        if missing:
+            raise CommandError(f"GET routes missing from tests_queryplans.ENDPOINTS: {', '.join(missing)}")
+
+        # قاعدة بيانات تيست منفصلة وكاش في الذاكرة: ما بنلمسش البيانات ولا الكاش الحقيقي
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+                fixtures = seed(scale=options['scale'])
+                measurements = measure(fixtures)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        save_baseline(connection.vendor, measurements)
+        for label, row in sorted(measurements.items()):
+            self.stdout.write(f"{label:36} {row['status']}  queries={row['queries']:<5} "
+                              f"cost={row['cost']}  seq_scans={','.join(row['seq_scans']) or '-'}")
+        for problem in undocumented_seq_scans(measurements):
+            self.stdout.write(self.style.WARNING(f"⚠️ {problem}"))
+        self.stdout.write(self.style.SUCCESS(f"✅ {connection.vendor} baseline written to {BASELINE_PATH}"))
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.15 on 2026-10-19 18:52
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classrooms', '0002_alter_classroom_capacity_alter_course_num_students'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('revision', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField(blank=True, null=True)),
+                ('op', models.CharField(choices=[('insert', 'Insert'), ('update', 'Update'), ('delete', 'Delete'), ('compact', 'Compact')], max_length=10)),
+                ('data', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['revision'],
+                'indexes': [models.Index(fields=['model', 'object_id', 'revision'], name='classrooms__model_5785c6_idx')],
+            },
+        ),
+    ]
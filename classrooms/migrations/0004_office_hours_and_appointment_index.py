@@ -0,0 +1,42 @@
+# Generated by Django 4.2.15 on 2026-10-19 18:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('classrooms', '0003_changelog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfficeHourRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.CharField(choices=[('SUN', 'Sunday'), ('MON', 'Monday'), ('TUE', 'Tuesday'), ('WED', 'Wednesday'), ('THU', 'Thursday')], max_length=3, verbose_name='اليوم')),
+                ('start_time', models.TimeField(verbose_name='من')),
+                ('end_time', models.TimeField(verbose_name='إلى')),
+                ('slot_minutes', models.PositiveIntegerField(default=30, verbose_name='مدة الموعد بالدقائق')),
+                ('location', models.CharField(max_length=255, verbose_name='المكان')),
+                ('valid_from', models.DateField(verbose_name='بداية التطبيق')),
+                ('valid_until', models.DateField(verbose_name='نهاية التطبيق')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='وصف')),
+            ],
+            options={
+                'ordering': ['doctor', 'day', 'start_time'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='doctorappointment',
+            index=models.Index(fields=['doctor', 'appointment_date', 'appointment_time', 'available'], name='appointment_doctor_slot_idx'),
+        ),
+        migrations.AddField(
+            model_name='officehourrule',
+            name='doctor',
+            field=models.ForeignKey(limit_choices_to={'role__iexact': 'Doctor'}, on_delete=django.db.models.deletion.CASCADE, related_name='office_hour_rules', to=settings.AUTH_USER_MODEL, verbose_name='الدكتور المسؤول'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.15 on 2026-10-19 19:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classrooms', '0004_office_hours_and_appointment_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='table',
+            name='classroom',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tables', to='classrooms.classroom', verbose_name='القاعة'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def backfill_table_classroom(apps, schema_editor):
+    # ربط الجداول القديمة بقاعاتها عن طريق الاسم "جدول <اسم القاعة>" (مرة واحدة بس)
+    Classroom = apps.get_model('classrooms', 'Classroom')
+    Table = apps.get_model('classrooms', 'Table')
+
+    unlinked = {}
+    for table in Table.objects.filter(classroom__isnull=True).order_by('id'):
+        unlinked.setdefault(table.name, []).append(table)
+
+    for classroom in Classroom.objects.order_by('id'):
+        candidates = unlinked.get(f"جدول {classroom.name}")
+        if candidates:
+            # لو فيه قاعات بنفس الاسم كل قاعة بتاخد أقدم جدول لسه مش مربوط
+            table = candidates.pop(0)
+            table.classroom_id = classroom.id
+            table.save(update_fields=['classroom'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classrooms', '0005_table_classroom'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_table_classroom, migrations.RunPython.noop),
+    ]
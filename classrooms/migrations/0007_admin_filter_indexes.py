@@ -0,0 +1,29 @@
+# Generated by Django 4.2.15 on 2026-10-19 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classrooms', '0006_backfill_table_classroom'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classschedule',
+            index=models.Index(fields=['day', 'start_time'], name='schedule_day_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='classschedule',
+            index=models.Index(condition=models.Q(('is_canceled', True)), fields=['day'], name='schedule_canceled_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorappointment',
+            index=models.Index(fields=['appointment_date', 'appointment_time'], name='appointment_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='table',
+            index=models.Index(condition=models.Q(('active', True)), fields=['active'], name='table_active_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.15 on 2026-10-19 19:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0005_role_indexes'),
+        ('classrooms', '0007_admin_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='doctor',
+            field=models.ForeignKey(limit_choices_to={'role': 'Doctor'}, on_delete=django.db.models.deletion.CASCADE, related_name='courses_as_doctor', to=settings.AUTH_USER_MODEL, verbose_name='الدكتور المسؤول'),
+        ),
+        migrations.AlterField(
+            model_name='doctorappointment',
+            name='doctor',
+            field=models.ForeignKey(limit_choices_to={'role': 'Doctor'}, on_delete=django.db.models.deletion.CASCADE, related_name='appointments', to=settings.AUTH_USER_MODEL, verbose_name='الدكتور المسؤول'),
+        ),
+        migrations.AlterField(
+            model_name='officehourrule',
+            name='doctor',
+            field=models.ForeignKey(limit_choices_to={'role': 'Doctor'}, on_delete=django.db.models.deletion.CASCADE, related_name='office_hour_rules', to=settings.AUTH_USER_MODEL, verbose_name='الدكتور المسؤول'),
+        ),
+    ]
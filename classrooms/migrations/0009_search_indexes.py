@@ -0,0 +1,64 @@
+from django.db import DatabaseError, migrations, transaction
+
+# نفس منطق classrooms.search.normalize_arabic: حذف التشكيل والتطويل وتوحيد الهمزات والتاء المربوطة والألف المقصورة
+NORMALIZE_FUNCTION = """
+CREATE OR REPLACE FUNCTION display_normalize(value text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT translate(
+        regexp_replace(lower(coalesce(value, '')), '[ً-ْٰـ]', '', 'g'),
+        'أإآٱةىؤئ',
+        'ااااهيوي'
+    )
+$$;
+"""
+
+SEARCH_COLUMNS = (
+    ('classrooms_course', 'name'),
+    ('classrooms_course', 'code'),
+    ('classrooms_classroom', 'name'),
+    ('classrooms_classroom', 'location'),
+    ('accounts_customuser', 'full_name'),
+    ('accounts_customuser', 'username'),
+)
+
+
+def _index_name(table, column):
+    return f"{table}_{column}_trgm"
+
+
+def create_search_indexes(apps, schema_editor):
+    # SQLite والقواعد التانية بتستخدم الـ index اللي في الذاكرة (classrooms.search.TrigramIndex)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(NORMALIZE_FUNCTION)
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:
+        # من غير pg_trgm (أو صلاحيات) البحث بيرجع للـ fallback في بايثون
+        return
+    for table, column in SEARCH_COLUMNS:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {_index_name(table, column)} "
+            f"ON {table} USING gin (display_normalize({column}) gin_trgm_ops)"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in SEARCH_COLUMNS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {_index_name(table, column)}")
+    schema_editor.execute("DROP FUNCTION IF EXISTS display_normalize(text)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_role_indexes'),
+        ('classrooms', '0008_doctor_exact_role'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
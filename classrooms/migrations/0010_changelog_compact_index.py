@@ -0,0 +1,17 @@
+# Generated by Django 4.2.15 on 2026-10-19 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classrooms', '0009_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(condition=models.Q(('op', 'compact')), fields=['-revision'], name='changelog_compact_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.15 on 2026-10-19 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classrooms', '0010_changelog_compact_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='table',
+            name='retired_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الإيقاف'),
+        ),
+    ]
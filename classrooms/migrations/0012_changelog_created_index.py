@@ -0,0 +1,17 @@
+# Generated by Django 4.2.15 on 2026-10-19 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classrooms', '0011_table_retired_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['created_at'], name='changelog_created_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+
+def remove_duplicate_slots(apps, schema_editor):
+    # قبل القيد: المواعيد المكررة الفاضية (available) بتتمسح ويتسجل مسحها في سجل المزامنة.
+    # لو فيه أكتر من حجز لنفس الدكتور في نفس الوقت الـ migration بيقف ويعرض الحجوزات المتعارضة
+    DoctorAppointment = apps.get_model('classrooms', 'DoctorAppointment')
+    ChangeLog = apps.get_model('classrooms', 'ChangeLog')
+    duplicates = (
+        DoctorAppointment.objects.values('doctor_id', 'appointment_date', 'appointment_time')
+        .annotate(count=Count('id')).filter(count__gt=1)
+        .order_by('doctor_id', 'appointment_date', 'appointment_time')
+    )
+    extra_ids, conflicts = [], []
+    for slot in duplicates:
+        rows = list(
+            DoctorAppointment.objects.filter(
+                doctor_id=slot['doctor_id'], appointment_date=slot['appointment_date'],
+                appointment_time=slot['appointment_time'],
+            ).order_by('available', 'id').values_list('id', 'available')
+        )
+        booked = [pk for pk, available in rows if not available]
+        if len(booked) > 1:
+            conflicts.append(f"doctor {slot['doctor_id']} {slot['appointment_date']} {slot['appointment_time']}: {booked}")
+            continue
+        # المحجوز (لو فيه) أو الأقدم بيفضل
+        extra_ids += [pk for pk, _ in rows[1:]]
+
+    if conflicts:
+        raise RuntimeError(
+            "⚠️ حجوزات متعارضة لنفس الدكتور في نفس الوقت؛ حلها يدوياً قبل الـ migration:\n" + "\n".join(conflicts)
+        )
+    if extra_ids:
+        extra_ids.sort()
+        logger.warning("Removing %d duplicate unbooked appointments: %s", len(extra_ids), extra_ids)
+        DoctorAppointment.objects.filter(id__in=extra_ids).delete()
+        # نفس شكل record_bulk: العملاء المتزامنين يمسحوا النسخ دي عندهم
+        ChangeLog.objects.create(model='doctorappointment', op='delete', data={'ids': extra_ids})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('classrooms', '0012_changelog_created_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='doctorappointment',
+            constraint=models.UniqueConstraint(fields=('doctor', 'appointment_date', 'appointment_time'), name='appointment_doctor_slot_unique'),
+        ),
+    ]
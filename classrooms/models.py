@@ -1,4 +1,6 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from accounts.models import CustomUser  # Custom user model
 
 # جدول القاعات
@@ -23,7 +25,7 @@ class Course(models.Model):
     doctor = models.ForeignKey(
         CustomUser,
         on_delete=models.CASCADE,
-        limit_choices_to={'role__iexact': 'Doctor'},  # فقط المستخدمين الذين دورهم Doctor
+        limit_choices_to={'role': 'Doctor'},  # فقط المستخدمين الذين دورهم Doctor
         related_name='courses_as_doctor',
         verbose_name="الدكتور المسؤول"
     )
@@ -41,6 +43,58 @@ class Course(models.Model):
         return f"{self.code} - {self.name}"
 
 
+# فلترة المحاضرات المعروضة (نفس منطق /api/schedules/) عشان تتستخدم برا الـ ViewSet كمان
+class ClassScheduleQuerySet(models.QuerySet):
+    WEEKDAY_MAP = {
+        6: 'SUN',
+        0: 'MON',
+        1: 'TUE',
+        2: 'WED',
+        3: 'THU',
+        4: 'FRI',
+        5: 'SAT'
+    }
+
+    def with_related(self):
+        # ✅ كل اللي ClassScheduleSerializer بيعرضه (الكورس بالدكتور والقاعة + table_schedules) في استعلامين بدل استعلامات لكل محاضرة
+        # table_schedules مترتبة بالجدول بس: الترتيب الافتراضي بيعمل join على المحاضرات من غير لازمة
+        return self.select_related('course__doctor', 'course__classroom', 'classroom').prefetch_related(
+            models.Prefetch('table_schedules', queryset=TableSchedule.objects.order_by('table_id', 'pk'))
+        )
+
+    def in_table(self, table):
+        # semi-join بدل join + DISTINCT: من غير sort على كل أعمدة المحاضرة
+        return self.filter(pk__in=TableSchedule.objects.filter(table=table, is_active=True).values('class_schedule_id'))
+
+    def for_display(self, params, active_table=None):
+        queryset = self
+        if active_table:
+            queryset = queryset.in_table(active_table)
+
+        classroom_id = params.get('classroom')
+        if classroom_id:
+            queryset = queryset.filter(classroom_id=classroom_id)
+
+        doctor_id = params.get('doctor')
+        if doctor_id:
+            queryset = queryset.filter(course__doctor__id=doctor_id)
+
+        today_only = params.get('today')
+        day_param = params.get('day')
+
+        if today_only == '1':
+            current_day = self.WEEKDAY_MAP.get(timezone.localdate().weekday())
+            queryset = queryset.filter(day=current_day)
+        elif day_param in [d[0] for d in ClassSchedule.DAYS_OF_WEEK]:
+            queryset = queryset.filter(day=day_param)
+
+        table_id = params.get('table_id')
+        if table_id:
+            queryset = queryset.filter(table_schedules__table_id=table_id)
+
+        return queryset
+
+
 # جدول المحاضرات (الجدول الدراسي)
 class ClassSchedule(models.Model):
     DAYS_OF_WEEK = [
@@ -67,8 +121,15 @@ class ClassSchedule(models.Model):
     is_canceled = models.BooleanField(default=False, verbose_name='تم الإلغاء')
     note = models.CharField(max_length=255, blank=True, null=True, verbose_name='ملاحظة الدكتور')
 
+    objects = ClassScheduleQuerySet.as_manager()
+
     class Meta:
         ordering = ['day', 'start_time']  # ترتيب الجدول حسب الأيام والتوقيت
+        indexes = [
+            models.Index(fields=['day', 'start_time'], name='schedule_day_start_idx'),
+            # المحاضرات الملغاة قليلة: index جزئي عليها بس
+            models.Index(fields=['day'], condition=models.Q(is_canceled=True), name='schedule_canceled_day_idx'),
+        ]
 
     def __str__(self):
         status = "❌ ملغاة" if self.is_canceled else "✅ نشطة"
@@ -80,6 +141,23 @@ class Table(models.Model):
     name = models.CharField(max_length=255, verbose_name="اسم الجدول")  # اسم الجدول
     description = models.TextField(blank=True, null=True, verbose_name="وصف الجدول")  # وصف الجدول إن أردت
     active = models.BooleanField(default=False, verbose_name="جدول نشط")  # تحديد الجدول النشط
+    # الجدول المخصص لقاعة (بيتعمل تلقائياً مع القاعة ويتمسح معاها)
+    classroom = models.ForeignKey(
+        Classroom,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='tables',
+        verbose_name="القاعة"
+    )
+    # وقت ما جدول تاني اتنشر مكانه: الجداول القديمة بعد مدة بتتنقل للأرشيف (archive/archiving.py)
+    retired_at = models.DateTimeField(null=True, blank=True, verbose_name="تاريخ الإيقاف")
+
+    class Meta:
+        indexes = [
+            # كل طلب على /api/schedules/ بيدور على الجدول النشط
+            models.Index(fields=['active'], condition=models.Q(active=True), name='table_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} {'(نشط)' if self.active else ''}"
@@ -104,7 +182,7 @@ class DoctorAppointment(models.Model):
     doctor = models.ForeignKey(
         CustomUser,
         on_delete=models.CASCADE,
-        limit_choices_to={'role__iexact': 'Doctor'},  # التأكد من أن المواعيد تخص دكتور
+        limit_choices_to={'role': 'Doctor'},  # التأكد من أن المواعيد تخص دكتور
         related_name='appointments',
         verbose_name="الدكتور المسؤول"
     )
@@ -118,6 +196,78 @@ class DoctorAppointment(models.Model):
 
     class Meta:
         ordering = ['appointment_date', 'appointment_time']  # ترتيب المواعيد حسب التاريخ والوقت
+        indexes = [
+            models.Index(fields=['appointment_date', 'appointment_time'], name='appointment_date_time_idx'),
+            # ✅ البحث عن المواعيد المتاحة لدكتور في فترة زمنية
+            models.Index(
+                fields=['doctor', 'appointment_date', 'appointment_time', 'available'],
+                name='appointment_doctor_slot_idx'
+            ),
+        ]
+        constraints = [
+            # ✅ موعد واحد للدكتور في نفس التاريخ والوقت (توليد القواعد المتزامن بيعتمد عليه)
+            models.UniqueConstraint(fields=['doctor', 'appointment_date', 'appointment_time'],
+                                    name='appointment_doctor_slot_unique'),
+        ]
 
     def __str__(self):
         return f"موعد {self.doctor.username} في {self.location} بتاريخ {self.appointment_date} الساعة {self.appointment_time}"
+
+
+# قواعد الساعات المكتبية المتكررة (بتتحول لمواعيد DoctorAppointment)
+class OfficeHourRule(models.Model):
+    doctor = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        limit_choices_to={'role': 'Doctor'},
+        related_name='office_hour_rules',
+        verbose_name="الدكتور المسؤول"
+    )
+    day = models.CharField(max_length=3, choices=ClassSchedule.DAYS_OF_WEEK, verbose_name="اليوم")
+    start_time = models.TimeField(verbose_name="من")
+    end_time = models.TimeField(verbose_name="إلى")
+    slot_minutes = models.PositiveIntegerField(default=30, verbose_name="مدة الموعد بالدقائق")
+    location = models.CharField(max_length=255, verbose_name="المكان")
+    valid_from = models.DateField(verbose_name="بداية التطبيق")
+    valid_until = models.DateField(verbose_name="نهاية التطبيق")
+    description = models.TextField(blank=True, null=True, verbose_name="وصف")
+
+    class Meta:
+        ordering = ['doctor', 'day', 'start_time']
+
+    def __str__(self):
+        return f"ساعات مكتبية {self.doctor_id} ({self.day} {self.start_time}-{self.end_time})"
+
+
+# سجل التغييرات (Append-only) للمزامنة التفاضلية مع الشاشات والتطبيق
+class ChangeLog(models.Model):
+    OP_INSERT = 'insert'
+    OP_UPDATE = 'update'
+    OP_DELETE = 'delete'
+    OP_COMPACT = 'compact'  # علامة الضغط: أي عميل أقدم منها يحتاج مزامنة كاملة
+    OPS = [
+        (OP_INSERT, 'Insert'),
+        (OP_UPDATE, 'Update'),
+        (OP_DELETE, 'Delete'),
+        (OP_COMPACT, 'Compact'),
+    ]
+
+    revision = models.BigAutoField(primary_key=True)  # رقم المراجعة = ترتيب التغيير
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField(null=True, blank=True)  # فارغ في التغييرات الجماعية
+    op = models.CharField(max_length=10, choices=OPS)
+    data = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['revision']
+        indexes = [
+            models.Index(fields=['model', 'object_id', 'revision']),
+            # كل طلب /api/sync/ بيدور على آخر علامة ضغط: من غير الـ index ده بيلف على السجل كله
+            models.Index(fields=['-revision'], condition=models.Q(op='compact'), name='changelog_compact_idx'),
+            # الحد الآمن للمزامنة بيدور على أقدم تغيير لسه ما استقرش
+            models.Index(fields=['created_at'], name='changelog_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.revision} {self.op} {self.model}:{self.object_id}"
@@ -0,0 +1,195 @@
+import re
+from collections import defaultdict
+
+from django.db import transaction
+
+from .changelog import record_bulk
+from .locks import lock_room_days
+from .models import ChangeLog, Classroom, ClassSchedule
+from .rollover import check_overlaps
+
+# ✅ إعادة توزيع القاعات لتقليل المقاعد الفاضية: لكل يوم، المحاضرات اللي بتبدأ في نفس الوقت
+# بتتوزع مع بعض بـ scipy.optimize.linear_sum_assignment على القاعات الفاضية وقتها
+FORBIDDEN = 1e9
+OVERFLOW_PENALTY = 1000     # القاعة أصغر من عدد الطلاب: مسموح بس للقاعة الحالية وبتكلفة عالية
+STAY_BONUS = 0.5            # عند التساوي نفضل القاعة الحالية (نقل أقل)
+
+_NUMBER = re.compile(r'\d+')
+
+LECTURE_FIELDS = (
+    'pk', 'classroom_id', 'day', 'start_time', 'end_time', 'is_canceled', 'course_id', 'course__num_students',
+)
+
+
+def _number(value):
+    match = _NUMBER.search(value or '')
+    return int(match.group()) if match else None
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _overlaps(busy, start, end):
+    return any(start < other_end and other_start < end for other_start, other_end in busy)
+
+
+def _waste(students, capacity):
+    if students is None or capacity is None:
+        return 0, 0
+    return max(capacity - students, 0), max(students - capacity, 0)
+
+
+def _assign_day(lectures, rooms, busy):
+    """يرجع {lecture_pk: room_id} أو None لو اليوم ما ينفعش يتوزع من غير تعارض."""
+    import numpy as np
+    from scipy.optimize import linear_sum_assignment
+
+    room_ids = np.array([room_id for room_id, _ in rooms])
+    capacities = np.array([capacity for _, capacity in rooms], dtype=float)
+    assignment = {}
+
+    by_start = defaultdict(list)
+    for lecture in lectures:
+        by_start[lecture['start']].append(lecture)
+
+    for start in sorted(by_start):
+        batch = by_start[start]
+        students = np.array([lecture['students'] for lecture in batch], dtype=float)[:, None]
+
+        # تكلفة = مقاعد فاضية، والقاعة الأصغر من العدد ممنوعة إلا لو هي القاعة الحالية
+        cost = capacities[None, :] - students
+        current = room_ids[None, :] == np.array([lecture['classroom_id'] for lecture in batch])[:, None]
+        overflow = cost < 0
+        cost = np.where(overflow, -cost * OVERFLOW_PENALTY, cost) - current * STAY_BONUS
+        cost[overflow & ~current] = FORBIDDEN
+
+        # القاعة لازم تكون فاضية طول مدة المحاضرة
+        for j, room_id in enumerate(room_ids):
+            intervals = busy.get(room_id)
+            if intervals:
+                for i, lecture in enumerate(batch):
+                    if _overlaps(intervals, lecture['start'], lecture['end']):
+                        cost[i, j] = FORBIDDEN
+
+        if len(batch) > len(room_ids):
+            return None
+        rows, cols = linear_sum_assignment(cost)
+        if (cost[rows, cols] >= FORBIDDEN).any():
+            return None
+        for i, j in zip(rows, cols):
+            lecture = batch[i]
+            room_id = int(room_ids[j])
+            assignment[lecture['pk']] = room_id
+            busy.setdefault(room_id, []).append((lecture['start'], lecture['end']))
+    return assignment
+
+
+def plan_rooms(table):
+    """خطة توزيع القاعات للجدول: قائمة النقلات + ملخص المقاعد الفاضية قبل وبعد."""
+    rooms = {}
+    for room_id, capacity in Classroom.objects.values_list('pk', 'capacity'):
+        rooms[room_id] = _number(capacity)
+    known_rooms = sorted((room_id, capacity) for room_id, capacity in rooms.items() if capacity is not None)
+
+    lectures = list(ClassSchedule.objects.in_table(table).order_by().values(*LECTURE_FIELDS))
+    in_table = {lecture['pk'] for lecture in lectures}
+    # محاضرات خارج الجدول بتفضل في قاعاتها وبتحجزها
+    outside = ClassSchedule.objects.filter(classroom_id__in=rooms).exclude(pk__in=in_table).values_list(
+        'classroom_id', 'day', 'start_time', 'end_time'
+    )
+
+    days = defaultdict(lambda: {'movable': [], 'busy': defaultdict(list)})
+    for classroom_id, day, start_time, end_time in outside:
+        days[day]['busy'][classroom_id].append((_minutes(start_time), _minutes(end_time)))
+
+    for lecture in lectures:
+        lecture['start'] = _minutes(lecture['start_time'])
+        lecture['end'] = _minutes(lecture['end_time'])
+        lecture['students'] = _number(lecture['course__num_students'])
+        day = days[lecture['day']]
+        # الملغاة أو اللي عدد طلابها أو سعة قاعتها مش معروف: بتفضل مكانها
+        if lecture['is_canceled'] or lecture['students'] is None or rooms.get(lecture['classroom_id']) is None:
+            day['busy'][lecture['classroom_id']].append((lecture['start'], lecture['end']))
+        else:
+            day['movable'].append(lecture)
+
+    moves, skipped_days = [], []
+    assignment = {}
+    for day_code in sorted(days):
+        day = days[day_code]
+        if not day['movable']:
+            continue
+        result = _assign_day(day['movable'], known_rooms, dict(day['busy']))
+        if result is None:
+            skipped_days.append(day_code)
+            continue
+        assignment.update(result)
+
+    waste_before = overflow_before = waste_after = overflow_after = 0
+    for lecture in lectures:
+        target = assignment.get(lecture['pk'], lecture['classroom_id'])
+        waste, overflow = _waste(lecture['students'], rooms.get(lecture['classroom_id']))
+        waste_before, overflow_before = waste_before + waste, overflow_before + overflow
+        waste, overflow = _waste(lecture['students'], rooms.get(target))
+        waste_after, overflow_after = waste_after + waste, overflow_after + overflow
+        if target != lecture['classroom_id']:
+            moves.append({
+                'id': lecture['pk'],
+                'course_id': lecture['course_id'],
+                'day': lecture['day'],
+                'start_time': lecture['start_time'],
+                'end_time': lecture['end_time'],
+                'students': lecture['students'],
+                'from_classroom_id': lecture['classroom_id'],
+                'from_capacity': rooms.get(lecture['classroom_id']),
+                'to_classroom_id': target,
+                'to_capacity': rooms.get(target),
+            })
+
+    moves.sort(key=lambda move: move['id'])
+    return {
+        'moves': moves,
+        'summary': {
+            'lectures': len(lectures),
+            'moved': len(moves),
+            'wasted_seats_before': waste_before,
+            'wasted_seats_after': waste_after,
+            'overflow_before': overflow_before,
+            'overflow_after': overflow_after,
+            'skipped_days': skipped_days,
+        },
+    }
+
+
+def apply_plan(table):
+    """يحسب الخطة ويطبقها في transaction واحدة: UPDATE لكل قاعة مستهدفة + حدث واحد في السجل."""
+    with transaction.atomic():
+        list(ClassSchedule.objects.in_table(table).order_by('pk').select_for_update(of=('self',)).values_list('pk'))
+        plan = plan_rooms(table)
+        moves = plan['moves']
+        if not moves:
+            return plan
+
+        # تأكيد أخير إن مفيش تعارض في القاعات الجديدة (بعد قفل كل قاعة/يوم مستهدف)
+        lock_room_days({(move['to_classroom_id'], move['day']) for move in moves})
+        moved_ids = {move['id'] for move in moves}
+        targets = {move['to_classroom_id'] for move in moves}
+        fields = ('pk', 'classroom_id', 'day', 'start_time', 'end_time')
+        staying = ClassSchedule.objects.filter(classroom_id__in=targets).exclude(pk__in=moved_ids).values(*fields)
+        check_overlaps(
+            [{**row, 'source_id': row['pk']} for row in staying]
+            + [{**move, 'source_id': move['id'], 'classroom_id': move['to_classroom_id']} for move in moves]
+        )
+
+        by_target = defaultdict(list)
+        for move in moves:
+            by_target[move['to_classroom_id']].append(move['id'])
+        for target, ids in by_target.items():
+            ClassSchedule.objects.filter(pk__in=ids).update(classroom_id=target)
+
+        record_bulk(
+            ClassSchedule, moved_ids, ChangeLog.OP_UPDATE,
+            assignments={str(move['id']): move['to_classroom_id'] for move in moves},
+        )
+    return plan
@@ -0,0 +1,95 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+
+from .cache import invalidate, make_key, prime, shared_revision, view_cache_prefix
+from .changelog import serialize_instance
+from .models import ChangeLog, ClassSchedule, Table
+from .serializers import ClassScheduleSerializer
+
+DIFF_FIELDS = ('id', 'course_id', 'classroom_id', 'day', 'start_time', 'end_time', 'is_canceled', 'note')
+
+
+def _lectures(table):
+    if table is None:
+        return ClassSchedule.objects.none()
+    return ClassSchedule.objects.filter(table_schedules__table=table, table_schedules__is_active=True)
+
+
+def _same_slot(queryset):
+    # نفس المحاضرة = نفس الكورس في نفس اليوم والتوقيت (القاعة ممكن تتغير)
+    return queryset.filter(
+        course_id=OuterRef('course_id'),
+        day=OuterRef('day'),
+        start_time=OuterRef('start_time'),
+        end_time=OuterRef('end_time'),
+    )
+
+
+def diff_tables(current, candidate):
+    """الفرق بين الجدول النشط والجدول المرشح، محسوب كله في SQL بـ EXISTS."""
+    current_lectures = _lectures(current)
+    candidate_lectures = _lectures(candidate)
+
+    added = candidate_lectures.exclude(Exists(_same_slot(current_lectures)))
+    removed = current_lectures.exclude(Exists(_same_slot(candidate_lectures)))
+    moved = (
+        candidate_lectures
+        .filter(Exists(_same_slot(current_lectures)))
+        .exclude(Exists(_same_slot(current_lectures).filter(classroom_id=OuterRef('classroom_id'))))
+        .annotate(from_classroom_id=Subquery(_same_slot(current_lectures).values('classroom_id')[:1]))
+    )
+
+    return {
+        'added': list(added.values(*DIFF_FIELDS)),
+        'removed': list(removed.values_list('id', flat=True)),
+        'moved': list(moved.values(*DIFF_FIELDS, 'from_classroom_id')),
+    }
+
+
+def build_warm_entries(candidate):
+    """يجهز ردود /api/schedules/ للجدول المرشح قبل التبديل (القائمة كاملة + لكل قاعة)."""
+    prefix = view_cache_prefix('schedule', 'list')
+    # نفس queryset الـ view: من غير prefetch الـ serializer بيعمل استعلامات لكل محاضرة
+    lectures = list(ClassSchedule.objects.in_table(candidate).with_related())
+    entries = [({}, ClassScheduleSerializer(lectures, many=True).data)]
+    for classroom_id in sorted({lecture.classroom_id for lecture in lectures}):
+        room_lectures = [lecture for lecture in lectures if lecture.classroom_id == classroom_id]
+        entries.append(({'classroom': [str(classroom_id)]}, ClassScheduleSerializer(room_lectures, many=True).data))
+    return prefix, entries
+
+
+def publish_table(candidate):
+    started = shared_revision()
+
+    # ✅ التبديل كله في transaction واحدة: مفيش لحظة يكون فيها جدولين نشطين أو صفر
+    with transaction.atomic():
+        list(Table.objects.select_for_update().filter(active=True))
+        # الفرق والردود المسخنة بعد القفل: نشرين متزامنين ما يحسبوش على جدول نشط قديم
+        current = Table.objects.filter(active=True).exclude(pk=candidate.pk).first()
+        diff = diff_tables(current, candidate)
+        prefix, entries = build_warm_entries(candidate)
+        Table.objects.filter(active=True).exclude(pk=candidate.pk).update(active=False, retired_at=timezone.now())
+        Table.objects.filter(pk=candidate.pk).update(active=True, retired_at=None)
+        candidate.active = True
+        candidate.retired_at = None
+        # بنبعت للعملاء الفرق بس، مش الجدول كله
+        ChangeLog.objects.create(
+            model=Table._meta.model_name,
+            object_id=candidate.pk,
+            op=ChangeLog.OP_UPDATE,
+            data={
+                **serialize_instance(candidate),
+                'previous_id': current.pk if current else None,
+                'diff': diff,
+            },
+        )
+
+    # لو حصلت كتابة تانية وإحنا بنبني، الردود المسخنة ممكن تكون ناقصاها: نسيبها تتبني عند أول طلب
+    fresh = shared_revision() == started
+    revision = invalidate()
+    if fresh:
+        for params, data in entries:
+            prime(make_key(prefix, params, revision=revision), data)
+
+    return {'previous': current.pk if current else None, 'diff': diff}
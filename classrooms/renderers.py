@@ -0,0 +1,129 @@
+import csv
+import io
+
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_header_parameters
+
+from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer, JSONRenderer
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+_json_default = JSONEncoder().default
+
+
+class CSVRenderer(BaseRenderer):
+    """بيرندر الردود اللي على شكل {'columns': [...], 'rows': [[...]]} كـ CSV."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict) and 'columns' in data and 'rows' in data:
+            columns, rows = data['columns'], data['rows']
+        elif isinstance(data, dict):
+            # رسائل الخطأ وغيرها: مفتاح / قيمة
+            columns, rows = ['key', 'value'], list(data.items())
+        else:
+            columns, rows = ['value'], [[item] for item in data]
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        writer.writerows(rows)
+        # BOM عشان Excel يفتح العربي صح
+        return ('\ufeff' + buffer.getvalue()).encode(self.charset)
+
+
+class ImagePassthroughRenderer(BaseRenderer):
+    """عشان Accept: image/* يعدي الـ content negotiation؛ الـ view بيرجع HttpResponse بالصورة جاهزة."""
+    media_type = 'image/*'
+    format = 'image'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        return JSONRenderer().render(data)
+
+
+class ICalendarRenderer(ImagePassthroughRenderer):
+    """نفس الفكرة لتطبيقات التقويم اللي بتبعت Accept: text/calendar."""
+    media_type = 'text/calendar'
+    format = 'ics'
+    charset = 'utf-8'
+
+
+# ✅ صيغ ثنائية لشاشات العرض الضعيفة (ESP / TV): أصغر وأسرع في الفك من JSON
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        import msgpack
+        return msgpack.packb(data, default=_json_default, use_bin_type=True)
+
+
+class CBORRenderer(BaseRenderer):
+    media_type = 'application/cbor'
+    format = 'cbor'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        import cbor2
+        return cbor2.dumps(data, default=lambda encoder, value: encoder.encode(_json_default(value)))
+
+
+def _flatten(item, prefix=''):
+    # {'course': {'name': ..}} -> {'course.name': ..}
+    flat = {}
+    for key, value in item.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def to_columnar(items):
+    """قائمة dicts -> {'columns': [...], 'rows': [[...]]}: أسماء الحقول مرة واحدة بس."""
+    flat = [_flatten(item) for item in items]
+    columns = list(dict.fromkeys(key for item in flat for key in item))
+    return {'columns': columns, 'rows': [[item.get(column) for column in columns] for item in flat]}
+
+
+def wants_columnar(request):
+    media_type = getattr(request, 'accepted_media_type', None)
+    if not media_type:
+        return False
+    _, params = parse_header_parameters(media_type)
+    return params.get('shape') == 'columnar'
+
+
+class CompactResponseMixin:
+    """Accept: application/msgpack (أو application/cbor) و/أو ;shape=columnar على list و retrieve."""
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, MessagePackRenderer, CBORRenderer]
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if isinstance(response, Response) and response.status_code == 200 and wants_columnar(request):
+            data = response.data
+            if isinstance(data, list):
+                response.data = to_columnar(data)
+            elif isinstance(data, dict) and isinstance(data.get('results'), list):
+                response.data = {**data, **to_columnar(data['results'])}
+                del response.data['results']
+            elif isinstance(data, dict) and self.action == 'retrieve':
+                response.data = to_columnar([data])
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # نفس الرابط بيرجع صيغ مختلفة حسب Accept
+        patch_vary_headers(response, ('Accept',))
+        return response
@@ -0,0 +1,102 @@
+from collections import defaultdict
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .changelog import record_inserts
+from .models import Classroom, ClassSchedule, Course, Table, TableSchedule
+
+BATCH_SIZE = 1000
+
+
+def _normalize_map(mapping, model, label):
+    mapping = {int(k): int(v) for k, v in (mapping or {}).items()}
+    targets = set(mapping.values())
+    found = set(model.objects.filter(pk__in=targets).values_list('pk', flat=True))
+    missing = sorted(targets - found)
+    if missing:
+        raise serializers.ValidationError({label: f"⚠️ عناصر غير موجودة: {missing}"})
+    return mapping
+
+
+def check_overlaps(rows):
+    # بعد تغيير القاعات: مفيش محاضرتين في نفس القاعة ونفس اليوم متداخلين
+    slots = defaultdict(list)
+    for row in rows:
+        slots[(row['classroom_id'], row['day'])].append(row)
+    conflicts = []
+    for (classroom_id, day), lectures in slots.items():
+        lectures.sort(key=lambda r: r['start_time'])
+        for previous, current in zip(lectures, lectures[1:]):
+            if current['start_time'] < previous['end_time']:
+                conflicts.append({
+                    'classroom_id': classroom_id,
+                    'day': day,
+                    'lectures': [previous['source_id'], current['source_id']],
+                })
+    if conflicts:
+        raise serializers.ValidationError({'conflicts': conflicts})
+
+
+def clone_table(source, name, description=None, classroom_map=None, course_map=None,
+                reset_cancellations=True):
+    """ينسخ جدول بكل محاضراته في transaction واحدة بـ bulk_create (للترم الجديد)."""
+    classroom_map = _normalize_map(classroom_map, Classroom, 'classroom_map')
+    course_map = _normalize_map(course_map, Course, 'course_map')
+
+    links = TableSchedule.objects.filter(table=source).values(
+        'is_active',
+        'class_schedule_id',
+        'class_schedule__classroom_id',
+        'class_schedule__course_id',
+        'class_schedule__day',
+        'class_schedule__start_time',
+        'class_schedule__end_time',
+        'class_schedule__is_canceled',
+        'class_schedule__note',
+    ).order_by('class_schedule_id')
+
+    rows = []
+    for link in links.iterator(chunk_size=BATCH_SIZE):
+        classroom_id = link['class_schedule__classroom_id']
+        course_id = link['class_schedule__course_id']
+        rows.append({
+            'source_id': link['class_schedule_id'],
+            'is_active': link['is_active'],
+            'classroom_id': classroom_map.get(classroom_id, classroom_id),
+            'course_id': course_map.get(course_id, course_id),
+            'day': link['class_schedule__day'],
+            'start_time': link['class_schedule__start_time'],
+            'end_time': link['class_schedule__end_time'],
+            'is_canceled': False if reset_cancellations else link['class_schedule__is_canceled'],
+            'note': None if reset_cancellations else link['class_schedule__note'],
+        })
+
+    if classroom_map:
+        check_overlaps(rows)
+
+    with transaction.atomic():
+        table = Table.objects.create(
+            name=name,
+            description=description if description is not None else source.description,
+        )
+        lectures = ClassSchedule.objects.bulk_create([
+            ClassSchedule(
+                classroom_id=row['classroom_id'],
+                course_id=row['course_id'],
+                day=row['day'],
+                start_time=row['start_time'],
+                end_time=row['end_time'],
+                is_canceled=row['is_canceled'],
+                note=row['note'],
+            )
+            for row in rows
+        ], batch_size=BATCH_SIZE)
+        table_schedules = TableSchedule.objects.bulk_create([
+            TableSchedule(table=table, class_schedule_id=lecture.pk, is_active=row['is_active'])
+            for lecture, row in zip(lectures, rows)
+        ], batch_size=BATCH_SIZE)
+        record_inserts(lectures)
+        record_inserts(table_schedules)
+
+    return table, len(lectures)
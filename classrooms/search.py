@@ -0,0 +1,198 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import F, FloatField, Func, Lookup, Q, TextField, Value
+from django.db.models.functions import Greatest
+from django.db.models.lookups import Contains
+
+from accounts.directory import doctor_directory
+from accounts.models import CustomUser
+from .cache import LocalLRU, get_revision
+from .models import Classroom, Course
+
+# ✅ بحث عربي/إنجليزي في الكورسات والدكاترة والقاعات
+SEARCH_TYPES = ('course', 'doctor', 'classroom')
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MIN_SCORE = 0.3
+
+# التشكيل (فتحة .. سكون + ألف خنجرية) والتطويل
+_DIACRITICS = re.compile('[\u064b-\u0652\u0670\u0640]')
+_LETTERS = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ة': 'ه',
+    'ى': 'ي',
+    'ؤ': 'و',
+    'ئ': 'ي',
+})
+_WORDS = re.compile(r'\w+')
+
+
+def normalize_arabic(text):
+    """نفس منطق دالة display_normalize في PostgreSQL (migration 0009)."""
+    return _DIACRITICS.sub('', (text or '').lower()).translate(_LETTERS)
+
+
+# الحقول اللي بيتبحث فيها + إزاي النتيجة بتتعرض
+SOURCES = {
+    'course': {'fields': ('name', 'code'), 'title': 'name', 'subtitle': 'code'},
+    'doctor': {'fields': ('full_name', 'username'), 'title': 'full_name', 'subtitle': 'username'},
+    'classroom': {'fields': ('name', 'location'), 'title': 'name', 'subtitle': 'location'},
+}
+
+
+def _queryset(search_type):
+    if search_type == 'course':
+        return Course.objects.all()
+    if search_type == 'doctor':
+        return CustomUser.objects.filter(role='Doctor')
+    return Classroom.objects.all()
+
+
+def _result(search_type, row, score):
+    source = SOURCES[search_type]
+    return {
+        'type': search_type,
+        'id': row['id'],
+        'title': row[source['title']] or row[source['subtitle']],
+        'subtitle': row[source['subtitle']],
+        'score': round(score, 3),
+    }
+
+
+# ---------- PostgreSQL: pg_trgm + indexes على display_normalize(...) ----------
+
+class Normalize(Func):
+    function = 'display_normalize'
+    output_field = TextField()
+
+
+class WordSimilarity(Func):
+    function = 'word_similarity'
+    output_field = FloatField()
+
+
+class TrigramWordMatch(Lookup):
+    # text %> query: بيستخدم الـ GIN index بتاع gin_trgm_ops
+    lookup_name = 'trigram_word_match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} %%> {rhs}", [*lhs_params, *rhs_params]
+
+
+_trigram_support = {}
+
+
+def has_trigram(alias='default'):
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return False
+    if alias not in _trigram_support:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_support[alias] = cursor.fetchone() is not None
+    return _trigram_support[alias]
+
+
+def _search_postgres(search_type, query, limit):
+    source = SOURCES[search_type]
+    value = Value(query, output_field=TextField())
+    expressions = [Normalize(F(field)) for field in source['fields']]
+    scores = [WordSimilarity(value, expression) for expression in expressions]
+    condition = reduce(or_, [
+        Q(TrigramWordMatch(expression, value)) | Q(Contains(expression, query))
+        for expression in expressions
+    ])
+    rows = (
+        _queryset(search_type)
+        .filter(condition)
+        .annotate(score=Greatest(*scores) if len(scores) > 1 else scores[0])
+        .order_by('-score', 'pk')
+        .values('id', *source['fields'], 'score')[:limit]
+    )
+    return [_result(search_type, row, row['score']) for row in rows]
+
+
+# ---------- fallback: index trigrams في الذاكرة (SQLite / من غير pg_trgm) ----------
+
+def trigrams(text):
+    grams = set()
+    for word in _WORDS.findall(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    def __init__(self, rows, fields):
+        self.rows = {}
+        self.texts = {}
+        self.grams = {}
+        self.postings = {}
+        for row in rows:
+            text = ' '.join(normalize_arabic(row[field]) for field in fields if row[field])
+            self.rows[row['id']] = row
+            self.texts[row['id']] = text
+            self.grams[row['id']] = trigrams(text)
+            for gram in self.grams[row['id']]:
+                self.postings.setdefault(gram, set()).add(row['id'])
+
+    def search(self, query, limit):
+        query_grams = trigrams(query)
+        candidates = set()
+        for gram in query_grams:
+            candidates |= self.postings.get(gram, set())
+        if len(query) < 3:
+            # كلمة قصيرة جداً: trigrams مش كفاية، نكمل بمطابقة جزئية
+            candidates |= {pk for pk, text in self.texts.items() if query in text}
+
+        scored = []
+        for pk in candidates:
+            text = self.texts[pk]
+            # نسبة trigrams الكلمة المطلوبة الموجودة في النص (زي word_similarity تقريباً)
+            score = len(query_grams & self.grams[pk]) / len(query_grams) if query_grams else 0.0
+            if query in text:
+                score = max(score, 1.0 if text.startswith(query) else 0.9)
+            if score >= MIN_SCORE:
+                scored.append((score, pk))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(self.rows[pk], score) for score, pk in scored[:limit]]
+
+
+_fallback_indexes = LocalLRU(max_entries=len(SOURCES) * 2)
+
+
+def _fallback_index(search_type):
+    fields = SOURCES[search_type]['fields']
+    if search_type == 'doctor':
+        # الدكاترة من الدليل المخزن (بيتمسح مع أي حفظ لمستخدم)
+        return TrigramIndex(doctor_directory(), fields)
+    key = (search_type, get_revision())
+    index = _fallback_indexes.get(key)
+    if index is None:
+        index = TrigramIndex(_queryset(search_type).values('id', *fields), fields)
+        _fallback_indexes.set(key, index)
+    return index
+
+
+def _search_fallback(search_type, query, limit):
+    return [
+        _result(search_type, row, score)
+        for row, score in _fallback_index(search_type).search(query, limit)
+    ]
+
+
+def search(query, types=SEARCH_TYPES, limit=DEFAULT_LIMIT):
+    query = normalize_arabic(query).strip()
+    if not query:
+        return []
+    backend = _search_postgres if has_trigram() else _search_fallback
+    results = []
+    for search_type in types:
+        results.extend(backend(search_type, query, limit))
+    results.sort(key=lambda result: -result['score'])
+    return results[:limit]
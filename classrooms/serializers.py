@@ -1,6 +1,10 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from .models import Classroom, Course, ClassSchedule, Table, TableSchedule, DoctorAppointment
+from rest_framework.exceptions import PermissionDenied
+from .models import Classroom, Course, ClassSchedule, Table, TableSchedule, DoctorAppointment, OfficeHourRule
 from accounts.models import CustomUser  # استخدام CustomUser مباشرة
+from accounts.directory import get_doctor
+from .locks import lock_schedule_slots
 
 # Serializer لعرض بيانات القاعات
 class ClassroomSerializer(serializers.ModelSerializer):
@@ -17,15 +21,27 @@ class DoctorSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+# ✅ التحقق من doctor_id من دليل الدكاترة المخزن بدل استعلام لكل طلب؛ الحقل بيرجع الـ id بس (مش موديل)
+class DoctorIdField(serializers.IntegerField):
+    default_error_messages = {
+        'does_not_exist': 'Invalid pk "{pk_value}" - object does not exist.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('invalid')
+        pk = super().to_internal_value(data)
+        # ممكن الدكتور لسه متضاف والدليل المحلي قديم: نرجع لقاعدة البيانات
+        if get_doctor(pk) is None and not CustomUser.objects.filter(pk=pk, role='Doctor').exists():
+            self.fail('does_not_exist', pk_value=pk)
+        return pk
+
+
 # Serializer للكورسات
 
 class CourseSerializer(serializers.ModelSerializer):
     doctor = DoctorSerializer(read_only=True)
-    doctor_id = serializers.PrimaryKeyRelatedField(
-        queryset=CustomUser.objects.filter(role='Doctor'),
-        source='doctor',
-        write_only=True
-    )
+    doctor_id = DoctorIdField(write_only=True)
 
     classroom = ClassroomSerializer(read_only=True)  # للعرض
     classroom_id = serializers.PrimaryKeyRelatedField(  # للكتابة بنفس اسم الحقل في الواجهة
@@ -93,16 +109,25 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         # بيانات أساسية
-        classroom = data.get('classroom') or getattr(self.instance, 'classroom', None)
-        course = data.get('course') or getattr(self.instance, 'course', None)
-        day = data.get('day') or getattr(self.instance, 'day', None)
-        start_time = data.get('start_time') or getattr(self.instance, 'start_time', None)
-        end_time = data.get('end_time') or getattr(self.instance, 'end_time', None)
+        classroom, course, day, start_time, end_time = self._slot(data)
 
         # تحقق من توقيت صحيح
         if start_time and end_time and start_time >= end_time:
             raise serializers.ValidationError("🛑 وقت البداية يجب أن يكون قبل وقت النهاية!")
 
+        self._check_conflicts(classroom, course, day, start_time, end_time)
+        return data
+
+    def _slot(self, data):
+        return (
+            data.get('classroom') or getattr(self.instance, 'classroom', None),
+            data.get('course') or getattr(self.instance, 'course', None),
+            data.get('day') or getattr(self.instance, 'day', None),
+            data.get('start_time') or getattr(self.instance, 'start_time', None),
+            data.get('end_time') or getattr(self.instance, 'end_time', None),
+        )
+
+    def _check_conflicts(self, classroom, course, day, start_time, end_time):
         # تحقق من تداخل في القاعة
         room_conflict = ClassSchedule.objects.filter(
             day=day,
@@ -130,15 +155,27 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
             if doctor_conflict.exists():
                 raise serializers.ValidationError("⚠️ يوجد محاضرة أخرى لهذا الدكتور في هذا الوقت.")
 
-        return data
+    def _lock_and_recheck(self, validated_data):
+        # ✅ نفس الفحص تاني تحت قفل (القاعة، اليوم) و(الدكتور، اليوم) عشان طلبين متزامنين ما يعدوش الاتنين
+        classroom, course, day, start_time, end_time = self._slot(validated_data)
+        lock_schedule_slots(
+            classroom_id=classroom.pk if classroom else None,
+            doctor_id=course.doctor_id if course else None,
+            day=day,
+        )
+        self._check_conflicts(classroom, course, day, start_time, end_time)
 
     def create(self, validated_data):
-        return ClassSchedule.objects.create(**validated_data)
+        with transaction.atomic():
+            self._lock_and_recheck(validated_data)
+            return ClassSchedule.objects.create(**validated_data)
 
     def update(self, instance, validated_data):
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        with transaction.atomic():
+            self._lock_and_recheck(validated_data)
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
         return instance
 
 
@@ -146,10 +183,11 @@ class ClassScheduleSerializer(serializers.ModelSerializer):
 # Serializer لعرض بيانات الجداول (Tables)
 class TableSerializer(serializers.ModelSerializer):
     active = serializers.BooleanField(read_only=True)
+    classroom = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
         model = Table
-        fields = ['id', 'name', 'description', 'active']
+        fields = ['id', 'name', 'description', 'active', 'classroom']
 
 
 # Serializer لربط الجداول بالمحاضرات
@@ -197,13 +235,69 @@ class DoctorAppointmentSerializer(serializers.ModelSerializer):
         model = DoctorAppointment
         fields = ['id', 'doctor', 'location', 'appointment_date', 'appointment_time', 'available', 'description']
 
+    SLOT_TAKEN = "⚠️ عندك موعد تاني في نفس اليوم والوقت!"
+
+    def validate(self, data):
+        # نفس قيد appointment_doctor_slot_unique: 400 بدل IntegrityError
+        doctor_id = self.instance.doctor_id if self.instance else getattr(self.context['request'].user, 'pk', None)
+        appointment_date = data.get('appointment_date') or getattr(self.instance, 'appointment_date', None)
+        appointment_time = data.get('appointment_time') or getattr(self.instance, 'appointment_time', None)
+        taken = DoctorAppointment.objects.filter(
+            doctor_id=doctor_id, appointment_date=appointment_date, appointment_time=appointment_time,
+        )
+        if self.instance:
+            taken = taken.exclude(pk=self.instance.pk)
+        if doctor_id and taken.exists():
+            raise serializers.ValidationError(self.SLOT_TAKEN)
+        return data
+
     def create(self, validated_data):
         validated_data['doctor'] = self.context['request'].user  # ربط الموعد بالمستخدم الحالي
-        return DoctorAppointment.objects.create(**validated_data)
+        try:
+            with transaction.atomic():
+                return DoctorAppointment.objects.create(**validated_data)
+        except IntegrityError:
+            # طلبين متزامنين لنفس الوقت عدوا من validate
+            raise serializers.ValidationError(self.SLOT_TAKEN)
 
     def update(self, instance, validated_data):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        try:
+            with transaction.atomic():
+                instance.save()
+        except IntegrityError:
+            raise serializers.ValidationError(self.SLOT_TAKEN)
         return instance
 
+
+# Serializer لقواعد الساعات المكتبية
+class OfficeHourRuleSerializer(serializers.ModelSerializer):
+    doctor = DoctorSerializer(read_only=True)
+
+    class Meta:
+        model = OfficeHourRule
+        fields = ['id', 'doctor', 'day', 'start_time', 'end_time', 'slot_minutes', 'location',
+                  'valid_from', 'valid_until', 'description']
+
+    def validate(self, data):
+        start_time = data.get('start_time') or getattr(self.instance, 'start_time', None)
+        end_time = data.get('end_time') or getattr(self.instance, 'end_time', None)
+        valid_from = data.get('valid_from') or getattr(self.instance, 'valid_from', None)
+        valid_until = data.get('valid_until') or getattr(self.instance, 'valid_until', None)
+        slot_minutes = data.get('slot_minutes') or getattr(self.instance, 'slot_minutes', 30)
+
+        if start_time and end_time and start_time >= end_time:
+            raise serializers.ValidationError("🛑 وقت البداية يجب أن يكون قبل وقت النهاية!")
+        if valid_from and valid_until and valid_from > valid_until:
+            raise serializers.ValidationError("🛑 تاريخ البداية يجب أن يكون قبل تاريخ النهاية!")
+        if slot_minutes < 5:
+            raise serializers.ValidationError("🛑 مدة الموعد يجب ألا تقل عن 5 دقائق.")
+        return data
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        if getattr(user, 'role', None) != 'Doctor':
+            raise PermissionDenied("⚠️ الساعات المكتبية للدكاترة فقط")
+        validated_data['doctor'] = user
+        return OfficeHourRule.objects.create(**validated_data)
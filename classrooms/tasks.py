@@ -0,0 +1,68 @@
+from jobs.registry import report_progress, task
+
+from . import analytics
+from .cache import invalidate, make_key, prime
+from .changelog import compact
+from .models import Table
+from .optimizer import apply_plan
+from .publishing import build_warm_entries, publish_table
+from .rollover import clone_table as clone
+from .serializers import TableSerializer
+
+# ✅ العمليات التقيلة اللي بتتنفذ في run_worker (POST /api/jobs/ أو background=true في الـ actions)
+
+
+# محاولة واحدة: clone بيعمل commit للجدول الجديد قبل النشر، وإعادة المحاولة كانت هتنسخه تاني
+@task(max_attempts=1, concurrency=1)
+def clone_table(source_id, name, description=None, classroom_map=None, course_map=None,
+                reset_cancellations=True, publish=False):
+    source = Table.objects.get(pk=source_id)
+    report_progress(10, 'cloning lectures')
+    table, count = clone(
+        source, name=name, description=description, classroom_map=classroom_map,
+        course_map=course_map, reset_cancellations=reset_cancellations,
+    )
+    result = {'status': 'table cloned', 'table': TableSerializer(table).data, 'lectures': count}
+    if publish:
+        report_progress(70, 'publishing')
+        result.update(publish_table(table))
+    else:
+        invalidate()
+    return result
+
+
+@task(concurrency=1)
+def optimize_rooms(table_id):
+    # حدود التزامن 1: خطتين على نفس القاعات في نفس الوقت هيتعارضوا
+    plan = apply_plan(Table.objects.get(pk=table_id))
+    if plan['moves']:
+        invalidate()
+    return {'status': 'rooms reassigned', **plan}
+
+
+@task(concurrency=2)
+def analytics_report(report, table_id=None, **params):
+    """يحسب التقرير ويسخّنه في كاش /api/analytics/ بنفس المفتاح."""
+    table = Table.objects.get(pk=table_id) if table_id else Table.objects.get(active=True)
+    data = analytics.build_report(table, report, **params)
+    prime(make_key(f"analytics:{report}", {'table': table.pk, **params}), data)
+    return {'report': report, 'table': table.pk, 'rows': len(data['rows'])}
+
+
+@task(max_attempts=1)
+def rebuild_cache():
+    # مراجعة جديدة + تسخين /api/schedules/ للجدول النشط زي بعد النشر
+    revision = invalidate()
+    table = Table.objects.filter(active=True).first()
+    if table is None:
+        return {'revision': revision, 'entries': 0}
+    prefix, entries = build_warm_entries(table)
+    for index, (params, data) in enumerate(entries, 1):
+        prime(make_key(prefix, params, revision=revision), data)
+        report_progress(100 * index // len(entries), f"{index}/{len(entries)}")
+    return {'revision': revision, 'entries': len(entries)}
+
+
+@task(max_attempts=1)
+def compact_changelog(retention_days=30):
+    return compact(retention_days=retention_days)
@@ -1,3 +1,971 @@
-from django.test import TestCase
+import gzip
+import io
+import os
+import tempfile
+import threading
+import unittest
+from datetime import date, time, timedelta
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache as shared_cache
+from django.db import IntegrityError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import CustomUser
+from jobs.models import Job
+from . import (
+    analytics, appointments, bulk, cache, changelog, fallback, ical, optimizer, publishing, rollover, search,
+)
+from .models import ChangeLog, Classroom, ClassSchedule, Course, DoctorAppointment, OfficeHourRule, Table, TableSchedule
+from .serializers import ClassScheduleSerializer, CourseSerializer
+
+
+class SyncHorizonTests(TestCase):
+    def setUp(self):
+        self.start = changelog.current_revision()
+        self.room = Classroom.objects.create(name='Hall', capacity='50')
+        self.enterContext(mock.patch.object(changelog, 'SYNC_SAFETY_LAG', timedelta(0)))
+
+    def test_changes_since_returns_settled_changes(self):
+        Classroom.objects.create(name='Lab', capacity='20')
+        result = changelog.changes_since(self.start)
+        self.assertFalse(result['resync_required'])
+        self.assertEqual([change['op'] for change in result['changes']], ['insert', 'insert'])
+        self.assertEqual(result['revision'], changelog.current_revision())
+
+    def test_cursor_stops_before_unsettled_revision(self):
+        # مراجعة أصغر لسه ما استقرتش (اتعملها commit متأخر) قبل مراجعة أكبر خلصت
+        Classroom.objects.create(name='Lab', capacity='20')
+        first, second = ChangeLog.objects.filter(revision__gt=self.start).order_by('revision')
+        ChangeLog.objects.filter(pk=second.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+        ChangeLog.objects.filter(pk=first.pk).update(created_at=timezone.now() + timedelta(minutes=5))
+        result = changelog.changes_since(self.start)
+        self.assertEqual(result['changes'], [])
+        self.assertEqual(result['revision'], first.pk - 1)
+        # العميل يرجع بنفس الـ cursor وياخد الاتنين لما يستقروا
+        ChangeLog.objects.filter(pk=first.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+        result = changelog.changes_since(result['revision'])
+        self.assertEqual([change['rev'] for change in result['changes']], [first.pk, second.pk])
+
+    def test_lag_hides_recent_changes(self):
+        with mock.patch.object(changelog, 'SYNC_SAFETY_LAG', timedelta(minutes=1)):
+            result = changelog.changes_since(self.start)
+        room_revision = ChangeLog.objects.get(model='classroom', object_id=self.room.pk).revision
+        self.assertEqual(result, {'resync_required': False, 'revision': room_revision - 1, 'changes': [], 'has_more': False})
+
+    def test_stale_cursor_requires_resync(self):
+        head = changelog.current_revision()
+        self.assertTrue(changelog.changes_since(head + 10)['resync_required'])
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.invalidate()
+        self.room = Classroom.objects.create(name='Hall', capacity='50')
+
+    def test_local_lru_evicts_oldest_and_expires(self):
+        lru = cache.LocalLRU(max_entries=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+        lru.set('d', 4, ttl=-1)
+        self.assertIsNone(lru.get('d'))
+
+    def test_get_or_build_builds_once_per_revision(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            return len(calls), True
+
+        key = cache.make_key('test', {'a': 1})
+        self.assertEqual(cache.get_or_build(key, build), 1)
+        self.assertEqual(cache.get_or_build(key, build), 1)
+        cache.invalidate()
+        self.assertEqual(cache.get_or_build(cache.make_key('test', {'a': 1}), build), 2)
+
+    def test_uncacheable_result_is_not_stored(self):
+        key = cache.make_key('test', {})
+        cache.get_or_build(key, lambda: ('error', False))
+        self.assertIsNone(cache.get_cached(key))
+
+    @mock.patch.object(fallback.DisplayFallbackMiddleware, '_eligible', return_value=False)
+    def test_today_key_changes_at_midnight(self, eligible):
+        doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor')
+        course = Course.objects.create(name='Math', code='M1', doctor=doctor, classroom=self.room, num_students='30')
+        table = Table.objects.create(name='Fall', active=True)
+        lectures = {}
+        for day in ('SUN', 'MON'):
+            lectures[day] = ClassSchedule.objects.create(course=course, classroom=self.room, day=day,
+                                                         start_time=time(9), end_time=time(10))
+            TableSchedule.objects.create(table=table, class_schedule=lectures[day])
+        cache.invalidate()
+        url = reverse('schedule-list')
+        # 6 يناير 2030 حد و 7 اتنين
+        for today, day in ((date(2030, 1, 6), 'SUN'), (date(2030, 1, 7), 'MON')):
+            with self.subTest(day=day), mock.patch('django.utils.timezone.localdate', return_value=today):
+                self.assertEqual([row['id'] for row in self.client.get(url, {'today': '1'}).json()],
+                                 [lectures[day].pk])
+
+    def test_list_is_served_from_cache_until_a_write(self):
+        url = reverse('classroom-list')
+        self.assertEqual(len(self.client.get(url).json()), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get(url).json()), 1)
+        self.client.post(url, {'name': 'Lab', 'capacity': '20'}, content_type='application/json')
+        self.assertEqual(len(self.client.get(url).json()), 2)
+
+
+class DisplayFallbackTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(mock.patch.object(fallback, 'SNAPSHOT_DIR', self.directory))
+        self.calls = 0
+        self.middleware = fallback.DisplayFallbackMiddleware(self._view)
+
+    def _view(self, request):
+        self.calls += 1
+        return HttpResponse(b'[]', content_type='application/json')
+
+    def test_snapshot_is_served_while_fresh(self):
+        request = RequestFactory().get('/api/classrooms/')
+        with mock.patch.object(fallback, 'get_revision', return_value='r1'):
+            self.assertEqual(self.middleware(request)['X-Data-Source'], 'live')
+            self.assertEqual(self.middleware(RequestFactory().get('/api/classrooms/'))['X-Data-Source'], 'snapshot')
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_snapshot_is_revalidated_with_a_clean_request(self):
+        seen = []
+        middleware = fallback.DisplayFallbackMiddleware(lambda request: seen.append(request) or self._view(request))
+        factory = RequestFactory()
+        with mock.patch.object(fallback, 'get_revision', return_value='r1'):
+            middleware(factory.get('/api/schedules/?day=SUN', HTTP_ACCEPT='application/msgpack'))
+            request = factory.get('/api/schedules/?day=SUN', HTTP_ACCEPT='application/msgpack',
+                                  HTTP_COOKIE='sessionid=abc', HTTP_X_FORWARDED_FOR='10.0.0.1')
+            with mock.patch.object(fallback, 'FRESH', -1), \
+                    mock.patch.object(fallback.threading, 'Thread') as thread:
+                response = middleware(request)
+            self.assertEqual(response['X-Data-Source'], 'stale-while-revalidate')
+            self.assertNotIn('daemon', thread.call_args.kwargs)
+            thread.call_args.kwargs['target']()
+        background = seen[-1]
+        self.assertIsNot(background, request)
+        self.assertEqual((background.path, background.GET.get('day'), background.META['HTTP_ACCEPT']),
+                         ('/api/schedules/', 'SUN', 'application/msgpack'))
+        self.assertEqual(background.COOKIES, {})
+        self.assertNotIn('HTTP_X_FORWARDED_FOR', background.META)
+
+    def test_key_ignores_param_order_and_unknown_accept_values(self):
+        factory = RequestFactory()
+        first = factory.get('/api/schedules/?day=SUN&classroom=1', HTTP_ACCEPT='application/json, x/junk1')
+        second = factory.get('/api/schedules/?classroom=1&day=SUN', HTTP_ACCEPT='application/json, x/junk2')
+        self.assertEqual(self.middleware._key(first), self.middleware._key(second))
+        msgpack = factory.get('/api/schedules/?classroom=1&day=SUN', HTTP_ACCEPT='application/msgpack')
+        self.assertNotEqual(self.middleware._key(first), self.middleware._key(msgpack))
+
+    def test_unknown_params_bypass_the_store(self):
+        with mock.patch.object(fallback, 'get_revision', return_value='r1'):
+            for i in range(3):
+                self.middleware(RequestFactory().get(f'/api/classrooms/?cachebust={i}'))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_store_is_capped(self):
+        store = fallback.SnapshotStore(self.directory)
+        response = HttpResponse(b'[]')
+        with mock.patch.object(fallback, 'MAX_SNAPSHOTS', 3):
+            for i in range(5):
+                store.save(f'key{i}', response, 'r1')
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+
+
+class PublishTableTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor')
+        cls.hall = Classroom.objects.create(name='Hall', capacity='100')
+        cls.lab = Classroom.objects.create(name='Lab', capacity='30')
+        cls.math = Course.objects.create(name='Math', code='M1', doctor=doctor, classroom=cls.hall, num_students='30')
+        cls.physics = Course.objects.create(name='Physics', code='P1', doctor=doctor, classroom=cls.hall,
+                                            num_students='30')
+        cls.current = Table.objects.create(name='Fall', active=True)
+        cls.candidate = Table.objects.create(name='Spring')
+
+        def lecture(table, course, room, day):
+            schedule = ClassSchedule.objects.create(course=course, classroom=room, day=day,
+                                                    start_time=time(9), end_time=time(10))
+            TableSchedule.objects.create(table=table, class_schedule=schedule)
+            return schedule
+
+        cls.removed = lecture(cls.current, cls.physics, cls.hall, 'SUN')
+        lecture(cls.current, cls.math, cls.hall, 'MON')
+        cls.moved = lecture(cls.candidate, cls.math, cls.lab, 'MON')
+        cls.added = lecture(cls.candidate, cls.physics, cls.hall, 'TUE')
+
+    def test_diff_reports_added_removed_and_moved(self):
+        diff = publishing.diff_tables(self.current, self.candidate)
+        self.assertEqual([row['id'] for row in diff['added']], [self.added.pk])
+        self.assertEqual(diff['removed'], [self.removed.pk])
+        self.assertEqual([(row['id'], row['from_classroom_id']) for row in diff['moved']],
+                         [(self.moved.pk, self.hall.pk)])
+
+    def test_publish_swaps_active_table_and_warms_cache(self):
+        result = publishing.publish_table(self.candidate)
+        self.assertEqual(result['previous'], self.current.pk)
+        self.assertEqual(list(Table.objects.filter(active=True)), [self.candidate])
+        self.current.refresh_from_db()
+        self.assertIsNotNone(self.current.retired_at)
+        log = ChangeLog.objects.filter(model='table').latest('revision')
+        self.assertEqual(log.data['previous_id'], self.current.pk)
+        with self.assertNumQueries(0):
+            data = self.client.get(reverse('schedule-list')).json()
+        self.assertEqual({row['id'] for row in data}, {self.moved.pk, self.added.pk})
+
+    def test_warm_entries_do_not_query_per_lecture(self):
+        for day in ('SUN', 'WED', 'THU'):
+            schedule = ClassSchedule.objects.create(course=self.math, classroom=self.hall, day=day,
+                                                    start_time=time(9), end_time=time(10))
+            TableSchedule.objects.create(table=self.candidate, class_schedule=schedule)
+        # المحاضرات بالكورس والقاعات + table_schedules
+        with self.assertNumQueries(2):
+            prefix, entries = publishing.build_warm_entries(self.candidate)
+        self.assertEqual(len(entries[0][1]), 5)
+
+    def test_write_during_build_skips_priming(self):
+        build = publishing.build_warm_entries
+
+        def build_then_write(candidate):
+            result = build(candidate)
+            cache.invalidate()      # كتابة تانية وصلت وإحنا بنبني
+            return result
+
+        with mock.patch.object(publishing, 'build_warm_entries', side_effect=build_then_write):
+            publishing.publish_table(self.candidate)
+        self.assertIsNone(cache.get_cached(cache.make_key(cache.view_cache_prefix('schedule', 'list'), {})))
+
+
+class CloneTableTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor')
+        cls.hall = Classroom.objects.create(name='Hall', capacity='100')
+        cls.lab = Classroom.objects.create(name='Lab', capacity='30')
+        course = Course.objects.create(name='Math', code='M1', doctor=doctor, classroom=cls.hall, num_students='30')
+        cls.source = Table.objects.create(name='Fall', description='old term')
+        for day, canceled in (('SUN', True), ('MON', False)):
+            schedule = ClassSchedule.objects.create(course=course, classroom=cls.hall, day=day, start_time=time(9),
+                                                    end_time=time(10), is_canceled=canceled, note='x' if canceled else None)
+            TableSchedule.objects.create(table=cls.source, class_schedule=schedule, is_active=day == 'MON')
+
+    def test_clone_copies_lectures_and_maps_rooms(self):
+        table, count = rollover.clone_table(self.source, 'Spring', classroom_map={self.hall.pk: self.lab.pk})
+        self.assertEqual(count, 2)
+        self.assertEqual(table.description, 'old term')
+        links = TableSchedule.objects.filter(table=table).select_related('class_schedule').order_by('class_schedule__day')
+        self.assertEqual(
+            [(link.class_schedule.day, link.class_schedule.classroom_id, link.class_schedule.is_canceled, link.is_active)
+             for link in links],
+            [('MON', self.lab.pk, False, True), ('SUN', self.lab.pk, False, False)],
+        )
+        # المحاضرات الجديدة منفصلة عن الجدول القديم ومتسجلة في سجل المزامنة
+        self.assertEqual(ClassSchedule.objects.filter(classroom=self.hall).count(), 2)
+        self.assertEqual(ChangeLog.objects.filter(model='tableschedule', op='insert').count(), 2 + 2)
+
+    def test_clone_rejects_unknown_rooms_and_overlaps(self):
+        with self.assertRaises(ValidationError):
+            rollover.clone_table(self.source, 'Spring', classroom_map={self.hall.pk: 999999})
+        schedule = ClassSchedule.objects.create(course=Course.objects.get(), classroom=self.hall, day='MON',
+                                                start_time=time(9, 30), end_time=time(11))
+        TableSchedule.objects.create(table=self.source, class_schedule=schedule)
+        with self.assertRaises(ValidationError):
+            rollover.clone_table(self.source, 'Spring', classroom_map={self.hall.pk: self.lab.pk})
+        self.assertFalse(Table.objects.filter(name='Spring').exists())
+
+    def test_background_jobs_need_an_admin(self):
+        admin = CustomUser.objects.create(username='admin', email='admin@x.edu', role='Admin')
+        doctor = CustomUser.objects.get(username='doc')
+        requests = (
+            (reverse('table-clone', args=[self.source.pk]), {'name': 'Spring', 'background': True}),
+            (reverse('table-optimize-rooms', args=[self.source.pk]), {'background': True}),
+        )
+        for url, data in requests:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.post(url, data, content_type='application/json').status_code, 401)
+                auth = {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(doctor).access_token}"}
+                self.assertEqual(self.client.post(url, data, content_type='application/json', **auth).status_code, 403)
+                self.assertFalse(Job.objects.exists())
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(admin).access_token}"}
+        for url, data in requests:
+            self.assertEqual(self.client.post(url, data, content_type='application/json', **auth).status_code, 202)
+        self.assertEqual(sorted(Job.objects.values_list('task', 'created_by_id')),
+                         [('classrooms.clone_table', admin.pk), ('classrooms.optimize_rooms', admin.pk)])
+        # النسخ مش idempotent: ما بيتعادش لو فشل
+        self.assertEqual(Job.objects.get(task='classrooms.clone_table').max_attempts, 1)
+
+
+class OfficeHoursTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor')
+        cls.admin = CustomUser.objects.create(username='admin', email='admin@x.edu', role='Admin')
+        cls.rule = OfficeHourRule.objects.create(
+            doctor=cls.doctor, day='SUN', start_time=time(10), end_time=time(11), slot_minutes=30,
+            location='Office', valid_from=date(2030, 1, 1), valid_until=date(2030, 1, 31),
+        )
+
+    def test_expand_rule_is_idempotent(self):
+        created = appointments.expand_rule(self.rule, date(2030, 1, 1), date(2030, 1, 31))
+        # 4 أيام حد في يناير 2030 × موعدين
+        self.assertEqual(len(created), 8)
+        self.assertTrue(all(appointment.pk for appointment in created))
+        self.assertEqual(appointments.expand_rule(self.rule, date(2030, 1, 1), date(2030, 1, 31)), [])
+        self.assertEqual(DoctorAppointment.objects.count(), 8)
+
+    def test_duplicate_slot_is_rejected(self):
+        appointment = appointments.expand_rule(self.rule, date(2030, 1, 1), date(2030, 1, 7))[0]
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DoctorAppointment.objects.create(doctor=self.doctor, location='x', appointment_date=appointment.appointment_date,
+                                             appointment_time=appointment.appointment_time)
+
+    def test_booking_only_invalidates_availability(self):
+        appointment = appointments.expand_rule(self.rule, date(2030, 1, 1), date(2030, 1, 7))[0]
+        url = reverse('doctor-appointment-availability')
+        params = {'from': '2030-01-01', 'to': '2030-01-07'}
+        self.assertEqual(len(self.client.get(url, params).json()), 2)
+        revision = cache.get_revision()
+        book_url = reverse('doctor-appointment-book-appointment', args=[appointment.pk])
+        self.assertEqual(self.client.post(book_url).status_code, 200)
+        self.assertEqual(self.client.post(book_url).status_code, 409)
+        self.assertEqual(cache.get_revision(), revision)
+        self.assertEqual(len(self.client.get(url, params).json()), 1)
+
+    def test_taken_slot_is_rejected_with_400(self):
+        url = reverse('doctor-appointment-list')
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(self.doctor).access_token}"}
+        data = {'location': 'Office', 'appointment_date': '2030-01-06', 'appointment_time': '10:00'}
+        self.assertEqual(self.client.post(url, data, **auth).status_code, 201)
+        self.assertEqual(self.client.post(url, data, **auth).status_code, 400)
+        other = self.client.post(url, {**data, 'appointment_time': '11:00'}, **auth).json()
+        detail = reverse('doctor-appointment-detail', args=[other['id']])
+        response = self.client.patch(detail, {'appointment_time': '10:00'}, content_type='application/json', **auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.patch(detail, {'location': 'Lab'}, content_type='application/json', **auth).status_code, 200)
+        self.assertEqual(DoctorAppointment.objects.count(), 2)
+
+    def test_invalid_appointment_id_is_not_found(self):
+        self.assertEqual(self.client.post('/api/doctor-appointments/abc/book/').status_code, 404)
+        self.assertEqual(self.client.post(reverse('doctor-appointment-book-appointment', args=[999999])).status_code, 404)
+
+    def test_only_doctors_create_rules(self):
+        payload = {'day': 'MON', 'start_time': '10:00', 'end_time': '12:00', 'location': 'Office',
+                   'valid_from': '2030-01-01', 'valid_until': '2030-02-01'}
+        url = reverse('office-hour-list')
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(self.admin).access_token}"}
+        self.assertEqual(self.client.post(url, payload, content_type='application/json', **auth).status_code, 403)
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(self.doctor).access_token}"}
+        self.assertEqual(self.client.post(url, payload, content_type='application/json', **auth).status_code, 201)
+
+
+class ClassroomTableLinkTests(TestCase):
+    def test_room_table_follows_create_rename_and_delete(self):
+        url = reverse('classroom-list')
+        room_id = self.client.post(url, {'name': 'Hall', 'capacity': '50'}, content_type='application/json').json()['id']
+        table = Table.objects.get(classroom_id=room_id)
+        self.assertEqual(table.name, 'جدول Hall')
+        self.client.patch(reverse('classroom-detail', args=[room_id]), {'name': 'Big Hall'},
+                          content_type='application/json')
+        table.refresh_from_db()
+        self.assertEqual(table.name, 'جدول Big Hall')
+        tables = self.client.get(reverse('table-list'), {'classroom': room_id}).json()
+        self.assertEqual([row['id'] for row in tables], [table.pk])
+        self.client.delete(reverse('classroom-detail', args=[room_id]))
+        self.assertFalse(Table.objects.filter(pk=table.pk).exists())
+
+    def test_backfill_links_tables_by_name(self):
+        from django.apps import apps
+        backfill = import_module('classrooms.migrations.0006_backfill_table_classroom').backfill_table_classroom
+        first = Classroom.objects.create(name='Lab', capacity='20')
+        second = Classroom.objects.create(name='Lab', capacity='20')
+        older = Table.objects.create(name='جدول Lab')
+        newer = Table.objects.create(name='جدول Lab')
+        unrelated = Table.objects.create(name='Fall')
+        backfill(apps, None)
+        self.assertEqual(
+            [Table.objects.get(pk=pk).classroom_id for pk in (older.pk, newer.pk, unrelated.pk)],
+            [first.pk, second.pk, None],
+        )
+
+
+class CourseDoctorFieldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor')
+        cls.admin = CustomUser.objects.create(username='admin', email='admin@x.edu', role='Admin')
+        cls.room = Classroom.objects.create(name='Hall', capacity='50')
+
+    def _create(self, doctor_id, code='M1'):
+        return self.client.post(reverse('course-list'), {
+            'name': 'Math', 'code': code, 'doctor_id': doctor_id, 'classroom_id': self.room.pk, 'num_students': '30',
+        }, content_type='application/json')
+
+    def test_doctor_id_is_assigned_directly(self):
+        response = self._create(self.doctor.pk)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Course.objects.get(code='M1').doctor_id, self.doctor.pk)
+        self.assertEqual(response.json()['doctor']['username'], 'doc')
+        self.assertEqual(CourseSerializer().fields['doctor_id'].to_internal_value(str(self.doctor.pk)), self.doctor.pk)
+
+    def test_non_doctor_ids_are_rejected(self):
+        for value in (self.admin.pk, 999999, 'abc', True):
+            with self.subTest(value=value):
+                response = self._create(value)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('doctor_id', response.json())
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = CustomUser.objects.create(username='ahmed', email='a@x.edu', role='Doctor', full_name='أحمد علي')
+        CustomUser.objects.create(username='ahmad', email='b@x.edu', role='Admin', full_name='أحمد إداري')
+        cls.hall = Classroom.objects.create(name='Hall A', capacity='100', location='مبنى الهندسة')
+        cls.course = Course.objects.create(name='الرياضيات المتقدمة', code='MATH301', doctor=cls.doctor,
+                                           classroom=cls.hall, num_students='30')
+        Course.objects.create(name='Physics', code='PHY101', doctor=cls.doctor, classroom=cls.hall, num_students='30')
+
+    def setUp(self):
+        shared_cache.clear()
+        search._fallback_indexes.clear()
+
+    def test_normalize_arabic_strips_diacritics_and_letter_forms(self):
+        self.assertEqual(search.normalize_arabic('أَحْمَـد'), 'احمد')
+        self.assertEqual(search.normalize_arabic('مدرسة مستشفى'), 'مدرسه مستشفي')
+
+    def test_fallback_index_matches_normalized_and_partial_words(self):
+        with mock.patch.object(search, 'has_trigram', return_value=False):
+            courses = search.search('الرياضيات', types=['course'])
+            doctors = search.search('احمد', types=['doctor'])
+            codes = search.search('math', types=['course'])
+            misspelled = search.search('رياضيت', types=['course'])
+        self.assertEqual([row['id'] for row in courses], [self.course.pk])
+        self.assertEqual(courses[0]['score'], 1.0)
+        # الإداري مش بيظهر في نتائج الدكاترة
+        self.assertEqual([row['id'] for row in doctors], [self.doctor.pk])
+        self.assertEqual([row['subtitle'] for row in codes], ['MATH301'])
+        self.assertEqual([row['id'] for row in misspelled], [self.course.pk])
+        self.assertGreaterEqual(misspelled[0]['score'], search.MIN_SCORE)
+
+    def test_fallback_short_query_uses_substring_match(self):
+        index = search.TrigramIndex([{'id': 1, 'name': 'ab', 'code': 'x'}, {'id': 2, 'name': 'cd', 'code': 'y'}],
+                                    ('name', 'code'))
+        self.assertEqual([row['id'] for row, _ in index.search('b', 10)], [1])
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'pg_trgm needs PostgreSQL')
+    def test_postgres_and_fallback_agree_on_top_hit(self):
+        if not search.has_trigram():
+            self.skipTest('pg_trgm is not installed')
+        expected = search.search('الرياضيات', types=['course'])[0]['id']
+        with mock.patch.object(search, 'has_trigram', return_value=False):
+            self.assertEqual(search.search('الرياضيات', types=['course'])[0]['id'], expected)
+
+    def test_search_view_validates_and_caches(self):
+        url = reverse('search')
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': 'x', 'limit': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': 'x', 'types': 'table'}).status_code, 400)
+        data = self.client.get(url, {'q': 'Hall', 'types': 'classroom'}).json()
+        self.assertEqual([row['id'] for row in data['results']], [self.hall.pk])
+        with self.assertNumQueries(0):
+            self.client.get(url, {'q': 'Hall', 'types': 'classroom'})
+
+
+class AnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create(username='admin', email='admin@x.edu', role='Admin')
+        doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor', full_name='Dr. A')
+        cls.hall = Classroom.objects.create(name='Hall', capacity='40 طالب')
+        course = Course.objects.create(name='Math', code='M1', doctor=doctor, classroom=cls.hall, num_students='60')
+        cls.table = Table.objects.create(name='Fall', active=True)
+        cls.empty = Table.objects.create(name='Spring')
+        for day, canceled in (('SUN', False), ('MON', True)):
+            schedule = ClassSchedule.objects.create(course=course, classroom=cls.hall, day=day, is_canceled=canceled,
+                                                    start_time=time(9), end_time=time(10, 30))
+            TableSchedule.objects.create(table=cls.table, class_schedule=schedule)
+
+    def setUp(self):
+        shared_cache.clear()
+
+    def _rows(self, result):
+        return [dict(zip(result['columns'], row)) for row in result['rows']]
+
+    def test_reports_on_populated_table(self):
+        fill = self._rows(analytics.build_report(self.table, 'seat-fill'))
+        self.assertEqual(fill, [{'classroom_id': self.hall.pk, 'classroom': 'Hall', 'capacity': 40.0, 'lectures': 1,
+                                 'weekly_minutes': 90, 'avg_fill': 1.5, 'max_fill': 1.5, 'overbooked': 1}])
+        load = self._rows(analytics.build_report(self.table, 'doctor-load'))
+        self.assertEqual((load[0]['doctor'], load[0]['weekly_hours'], load[0]['teaching_days']), ('Dr. A', 1.5, 1))
+        rates = self._rows(analytics.build_report(self.table, 'cancellations', by='day'))
+        self.assertEqual([(row['day'], row['rate']) for row in rates], [('SUN', 0.0), ('MON', 1.0)])
+        heatmap = analytics.build_report(self.table, 'heatmap', resolution=60)
+        row = dict(zip(heatmap['columns'], heatmap['rows'][0]))
+        self.assertEqual((row['SUN 09:00'], row['SUN 10:00'], row['MON 09:00']), (1.0, 0.5, 0.0))
+
+    def test_empty_table_returns_headers_only(self):
+        for report in analytics.REPORTS:
+            with self.subTest(report=report):
+                result = analytics.build_report(self.empty, report)
+                self.assertEqual(result['rows'], [])
+                self.assertTrue(result['columns'])
+        self.assertEqual(analytics.build_report(self.empty, 'heatmap', resolution=120)['columns'][:3],
+                         ['classroom_id', 'classroom', 'SUN 00:00'])
+
+    def test_view_requires_admin_and_validates_params(self):
+        url = reverse('analytics', args=['seat-fill'])
+        self.assertIn(self.client.get(url).status_code, (401, 403))
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(self.admin).access_token}"}
+        self.assertEqual(self.client.get(reverse('analytics', args=['nope']), **auth).status_code, 404)
+        self.assertEqual(self.client.get(reverse('analytics', args=['heatmap']), {'resolution': '7'},
+                                         **auth).status_code, 400)
+        response = self.client.get(url, {'table': self.empty.pk, 'format': 'csv'}, **auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('seat-fill-table-', response['Content-Disposition'])
+        self.assertEqual(response.content.decode('utf-8-sig').splitlines()[0].split(',')[:2], ['classroom_id', 'classroom'])
+
+
+class RoomOptimizerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor')
+        cls.small = Classroom.objects.create(name='Small', capacity='20')
+        cls.large = Classroom.objects.create(name='Large', capacity='100')
+        cls.course = Course.objects.create(name='Math', code='M1', doctor=doctor, classroom=cls.small,
+                                           num_students='90')
+        cls.table = Table.objects.create(name='Fall', active=True)
+        cls.lecture = ClassSchedule.objects.create(course=cls.course, classroom=cls.small, day='SUN',
+                                                   start_time=time(9), end_time=time(10))
+        TableSchedule.objects.create(table=cls.table, class_schedule=cls.lecture)
+
+    def test_plan_moves_crowded_lecture_to_larger_room(self):
+        plan = optimizer.plan_rooms(self.table)
+        self.assertEqual([(move['id'], move['to_classroom_id']) for move in plan['moves']],
+                         [(self.lecture.pk, self.large.pk)])
+        self.assertEqual((plan['summary']['overflow_before'], plan['summary']['overflow_after']), (70, 0))
+
+    def test_apply_locks_target_room_days_before_checking(self):
+        with mock.patch.object(optimizer, 'lock_room_days', wraps=optimizer.lock_room_days) as lock:
+            optimizer.apply_plan(self.table)
+        lock.assert_called_once_with({(self.large.pk, 'SUN')})
+        self.lecture.refresh_from_db()
+        self.assertEqual(self.lecture.classroom_id, self.large.pk)
+
+    def test_apply_rejects_conflict_committed_before_lock(self):
+        # كاتب تاني حجز القاعة الكبيرة بعد حساب الخطة وقبل ما ناخد القفل
+        def book_target(slots):
+            ClassSchedule.objects.create(course=self.course, classroom=self.large, day='SUN',
+                                         start_time=time(9, 30), end_time=time(11))
+
+        with mock.patch.object(optimizer, 'lock_room_days', side_effect=book_target):
+            with self.assertRaises(ValidationError):
+                optimizer.apply_plan(self.table)
+        self.lecture.refresh_from_db()
+        self.assertEqual(self.lecture.classroom_id, self.small.pk)
+
+
+class CompactResponseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor')
+        cls.hall = Classroom.objects.create(name='Hall', capacity='100')
+        course = Course.objects.create(name='Math', code='M1', doctor=doctor, classroom=cls.hall, num_students='30')
+        for hour in range(8, 16):
+            ClassSchedule.objects.create(course=course, classroom=cls.hall, day='SUN',
+                                         start_time=time(hour), end_time=time(hour, 50))
+
+    def setUp(self):
+        shared_cache.clear()
+
+    def test_msgpack_and_cbor_match_json(self):
+        import cbor2
+        import msgpack
+
+        url = reverse('schedule-list')
+        expected = self.client.get(url).json()
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertIn('Accept', response['Vary'])
+        self.assertEqual(msgpack.unpackb(response.content), expected)
+        self.assertEqual(cbor2.loads(self.client.get(url, HTTP_ACCEPT='application/cbor').content), expected)
+
+    def test_columnar_shape_flattens_nested_fields(self):
+        expected = self.client.get(reverse('schedule-list')).json()
+        data = self.client.get(reverse('schedule-list'), HTTP_ACCEPT='application/json;shape=columnar').json()
+        self.assertEqual(len(data['rows']), len(expected))
+        row = dict(zip(data['columns'], data['rows'][0]))
+        self.assertEqual(row['course.name'], 'Math')
+        self.assertEqual(row['id'], expected[0]['id'])
+
+    def test_compression_and_conditional_get(self):
+        url = reverse('schedule-list')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertEqual(len(gzip.decompress(response.content)), len(self.client.get(url).content))
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual((not_modified.status_code, not_modified.content), (304, b''))
+
+    def test_malformed_qvalue_disables_that_encoding(self):
+        url = reverse('schedule-list')
+        for header in ('gzip;q=abc', 'gzip;q=1.2.3', 'gzip;q=0'):
+            with self.subTest(header=header):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING='br;q=abc, gzip;q=0.5')['Content-Encoding'], 'gzip')
+
+    def test_wildcard_accept_encoding(self):
+        url = reverse('schedule-list')
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING='*')['Content-Encoding'], 'br')
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING='br;q=0, *')['Content-Encoding'], 'gzip')
+        self.assertFalse(self.client.get(url, HTTP_ACCEPT_ENCODING='*;q=0').has_header('Content-Encoding'))
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, *;q=0')['Content-Encoding'], 'gzip')
+
+
+class RoomImageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor')
+        cls.hall = Classroom.objects.create(name='Hall', capacity='100')
+        course = Course.objects.create(name='Math', code='M1', doctor=doctor, classroom=cls.hall, num_students='30')
+        cls.table = Table.objects.create(name='Fall', active=True)
+        cls.lecture = ClassSchedule.objects.create(course=course, classroom=cls.hall, day='SUN',
+                                                   start_time=time(9), end_time=time(10))
+        TableSchedule.objects.create(table=cls.table, class_schedule=cls.lecture)
+
+    def setUp(self):
+        shared_cache.clear()
+        self.url = reverse('classroom-image', args=[self.hall.pk])
+
+    def test_png_and_bmp_render_at_requested_size(self):
+        from PIL import Image
+
+        response = self.client.get(self.url, {'day': 'SUN', 'width': 400, 'height': 300})
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(Image.open(io.BytesIO(response.content)).size, (400, 300))
+        bmp = Image.open(io.BytesIO(self.client.get(self.url, {'day': 'SUN', 'type': 'bmp'}).content))
+        self.assertEqual((bmp.mode, bmp.size), ('1', (800, 480)))
+
+    def test_weekend_default_day_renders_empty_image(self):
+        for day in ('FRI', 'SAT'):
+            with self.subTest(day=day), mock.patch('classrooms.views.today_code', return_value=day):
+                response = self.client.get(self.url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(self.client.get(self.url, {'day': 'XYZ'}).status_code, 400)
+
+    def test_only_whitelisted_sizes_are_rendered(self):
+        for params in ({'width': 801, 'height': 480}, {'width': 100000, 'height': 100000}, {'width': 'wide'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, {'day': 'SUN', **params}).status_code, 400)
+
+    def test_etag_changes_only_when_room_lectures_change(self):
+        first = self.client.get(self.url, {'day': 'SUN'})
+        self.assertEqual(self.client.get(self.url, {'day': 'SUN'}, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        Classroom.objects.create(name='Lab', capacity='30')
+        cache.invalidate()
+        self.assertEqual(self.client.get(self.url, {'day': 'SUN'})['ETag'], first['ETag'])
+        ClassSchedule.objects.filter(pk=self.lecture.pk).update(is_canceled=True)
+        cache.invalidate()
+        self.assertNotEqual(self.client.get(self.url, {'day': 'SUN'})['ETag'], first['ETag'])
+
+
+@mock.patch.object(ical, 'TERM_START', date(2026, 2, 1))
+@mock.patch.object(ical, 'TERM_END', date(2026, 6, 30))
+class CalendarFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor', full_name='Dr. A')
+        cls.hall = Classroom.objects.create(name='Hall', capacity='100')
+        course = Course.objects.create(name='Math', code='M1', doctor=cls.doctor, classroom=cls.hall, num_students='30')
+        cls.table = Table.objects.create(name='Fall', active=True)
+        for day, canceled in (('SUN', False), ('TUE', True)):
+            schedule = ClassSchedule.objects.create(course=course, classroom=cls.hall, day=day, is_canceled=canceled,
+                                                    start_time=time(9), end_time=time(10), note='سفر')
+            TableSchedule.objects.create(table=cls.table, class_schedule=schedule)
+        DoctorAppointment.objects.create(doctor=cls.doctor, appointment_date=date.today() + timedelta(days=1),
+                                         appointment_time=time(12), location='Office 5')
+
+    def setUp(self):
+        shared_cache.clear()
+
+    def _lines(self, kind, pk):
+        response = self.client.get(reverse('calendar-feed', args=[kind, pk]))
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split('\r\n')))
+        return body.replace('\r\n ', '').split('\r\n'), response
+
+    def test_floating_feed_has_weekly_rules_exdates_and_appointments(self):
+        lines, _ = self._lines('doctor', self.doctor.pk)
+        self.assertNotIn('BEGIN:VTIMEZONE', lines)
+        self.assertIn('DTSTART:20260201T090000', lines)
+        self.assertIn('RRULE:FREQ=WEEKLY;BYDAY=SU;UNTIL=20260630T235959', lines)
+        self.assertEqual(len([line for line in lines if line.startswith('EXDATE:')]), 1)
+        self.assertEqual(len([line for line in lines if line.startswith('UID:appointment-')]), 1)
+        self.assertIn('LOCATION:Office 5', lines)
+
+    @mock.patch.object(ical, 'CALENDAR_TIMEZONE', 'Africa/Cairo')
+    def test_timezone_feed_defines_vtimezone_and_utc_until(self):
+        lines, _ = self._lines('classroom', self.hall.pk)
+        self.assertIn('DTSTART;TZID=Africa/Cairo:20260201T090000', lines)
+        start = lines.index('BEGIN:VTIMEZONE')
+        self.assertEqual(lines[start + 1], 'TZID:Africa/Cairo')
+        zone = lines[start:lines.index('END:VTIMEZONE') + 1]
+        # الصيفي في مصر بيبدأ آخر جمعة في أبريل
+        daylight = zone.index('BEGIN:DAYLIGHT')
+        self.assertEqual(zone[daylight + 1:daylight + 4],
+                         ['DTSTART:20260424T000000', 'TZOFFSETFROM:+0200', 'TZOFFSETTO:+0300'])
+        self.assertIn('RRULE:FREQ=WEEKLY;BYDAY=SU;UNTIL=20260630T205959Z', lines)
+        self.assertTrue(any(line.startswith('EXDATE;TZID=Africa/Cairo:') for line in lines))
+
+    def test_conditional_get_and_unknown_entities(self):
+        _, response = self._lines('table', self.table.pk)
+        url = reverse('calendar-feed', args=['table', self.table.pk])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(reverse('calendar-feed', args=['doctor', 999999])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('calendar-feed', args=['room', self.hall.pk])).status_code, 404)
+
+
+class BulkScheduleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor')
+        cls.hall = Classroom.objects.create(name='Hall', capacity='100')
+        cls.lab = Classroom.objects.create(name='Lab', capacity='30')
+        cls.course = Course.objects.create(name='Math', code='M1', doctor=doctor, classroom=cls.hall, num_students='30')
+        cls.sunday = ClassSchedule.objects.create(course=cls.course, classroom=cls.hall, day='SUN',
+                                                  start_time=time(9), end_time=time(10))
+        cls.monday = ClassSchedule.objects.create(course=cls.course, classroom=cls.hall, day='MON',
+                                                  start_time=time(9), end_time=time(10))
+
+    def test_bulk_cancel_is_one_update_and_one_log_row(self):
+        ids = bulk.bulk_cancel(bulk.lectures_in_scope(classroom_id=self.hall.pk), note='maintenance')
+        self.assertEqual(ids, sorted([self.sunday.pk, self.monday.pk]))
+        self.assertEqual(ClassSchedule.objects.filter(is_canceled=True, note='maintenance').count(), 2)
+        log = ChangeLog.objects.filter(model='classschedule', object_id__isnull=True).get()
+        self.assertEqual(log.data['ids'], ids)
+        bulk.bulk_cancel(bulk.lectures_in_scope(day='SUN'), canceled=False)
+        self.sunday.refresh_from_db()
+        self.assertFalse(self.sunday.is_canceled)
+
+    def test_bulk_cancel_parses_restore_flag(self):
+        url = reverse('schedule-bulk-cancel')
+        response = self.client.post(url, {'day': 'SUN', 'restore': 'false'})
+        self.assertEqual(response.json()['status'], 'lectures canceled')
+        self.sunday.refresh_from_db()
+        self.assertTrue(self.sunday.is_canceled)
+        self.assertEqual(self.client.post(url, {'day': 'SUN', 'restore': '1'}).json()['status'], 'lectures restored')
+        self.assertEqual(self.client.post(url, {'day': 'SUN', 'restore': 'maybe'}).status_code, 400)
+
+    def test_scope_requires_a_filter(self):
+        with self.assertRaises(ValidationError):
+            bulk.lectures_in_scope()
+
+    def test_bulk_move_locks_target_slots_before_checking(self):
+        with mock.patch.object(bulk, 'lock_room_days', wraps=bulk.lock_room_days) as lock:
+            ids = bulk.bulk_move(bulk.lectures_in_scope(require_filter=False), {self.hall.pk: self.lab.pk})
+        lock.assert_called_once_with({(self.lab.pk, 'SUN'), (self.lab.pk, 'MON')})
+        self.assertEqual(ids, sorted([self.sunday.pk, self.monday.pk]))
+        self.assertEqual(ClassSchedule.objects.filter(classroom=self.lab).count(), 2)
+
+    def test_bulk_move_rejects_overlaps(self):
+        ClassSchedule.objects.create(course=self.course, classroom=self.lab, day='SUN',
+                                     start_time=time(9, 30), end_time=time(11))
+        with self.assertRaises(ValidationError):
+            bulk.bulk_move(bulk.lectures_in_scope(day='SUN'), {self.hall.pk: self.lab.pk})
+        self.assertEqual(ClassSchedule.objects.filter(classroom=self.hall).count(), 2)
+
+    def test_swap_checks_lectures_that_stay_outside_the_scope(self):
+        active = Table.objects.create(name='Active', active=True)
+        other = Table.objects.create(name='Other')
+        TableSchedule.objects.create(table=active, class_schedule=self.sunday)
+        staying = ClassSchedule.objects.create(course=self.course, classroom=self.lab, day='SUN',
+                                               start_time=time(9), end_time=time(10))
+        TableSchedule.objects.create(table=other, class_schedule=staying)
+        swap = {self.hall.pk: self.lab.pk, self.lab.pk: self.hall.pk}
+        with self.assertRaises(ValidationError):
+            bulk.bulk_move(bulk.lectures_in_scope(table=active), swap)
+        self.sunday.refresh_from_db()
+        self.assertEqual(self.sunday.classroom_id, self.hall.pk)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'concurrent row updates need PostgreSQL')
+class ConcurrentBookingTests(TransactionTestCase):
+    WORKERS = 12
+
+    def test_only_one_concurrent_booking_wins(self):
+        doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor')
+        appointment = DoctorAppointment.objects.create(doctor=doctor, location='Office', appointment_date=date(2030, 1, 6),
+                                                       appointment_time=time(10))
+        barrier = threading.Barrier(self.WORKERS)
+        results = []
+
+        def worker():
+            try:
+                barrier.wait()
+                results.append(appointments.book(appointment.pk))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results), [False] * (self.WORKERS - 1) + [True])
+        self.assertEqual(ChangeLog.objects.filter(model='doctorappointment', op='update').count(), 1)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'advisory locks need PostgreSQL')
+class ConcurrentScheduleWriteTests(TransactionTestCase):
+    WORKERS = 12
+
+    def setUp(self):
+        self.rooms = [Classroom.objects.create(name=f"Room {i}", capacity='50') for i in range(self.WORKERS)]
+        self.courses = []
+        for i in range(self.WORKERS):
+            doctor = CustomUser.objects.create(username=f"doc{i}", email=f"doc{i}@x.edu", role='Doctor')
+            self.courses.append(Course.objects.create(
+                name=f"Course {i}", code=f"C{i}", doctor=doctor, classroom=self.rooms[i], num_students='30'
+            ))
+
+    def _run_concurrently(self, payloads):
+        barrier = threading.Barrier(len(payloads))
+        results = []
+
+        def worker(payload):
+            try:
+                barrier.wait()
+                serializer = ClassScheduleSerializer(data=payload)
+                if serializer.is_valid():
+                    try:
+                        serializer.save()
+                        results.append('created')
+                        return
+                    except Exception:
+                        pass
+                results.append('rejected')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(payload,)) for payload in payloads]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _payload(self, room, course):
+        return {
+            'classroom_id': room.pk,
+            'course_id': course.pk,
+            'day': 'SUN',
+            'start_time': '08:00',
+            'end_time': '09:30',
+        }
+
+    def test_same_room_writes_serialize(self):
+        payloads = [self._payload(self.rooms[0], course) for course in self.courses]
+        results = self._run_concurrently(payloads)
+
+        self.assertEqual(results.count('created'), 1)
+        self.assertEqual(ClassSchedule.objects.filter(classroom=self.rooms[0], day='SUN').count(), 1)
+
+    def test_same_doctor_writes_serialize(self):
+        payloads = [self._payload(room, self.courses[0]) for room in self.rooms]
+        results = self._run_concurrently(payloads)
+
+        self.assertEqual(results.count('created'), 1)
+        self.assertEqual(ClassSchedule.objects.filter(course=self.courses[0], day='SUN').count(), 1)
+
+    def test_different_rooms_and_doctors_all_succeed(self):
+        payloads = [self._payload(room, course) for room, course in zip(self.rooms, self.courses)]
+        results = self._run_concurrently(payloads)
+
+        self.assertEqual(results.count('created'), self.WORKERS)
+        self.assertEqual(ClassSchedule.objects.filter(day='SUN', start_time=time(8, 0)).count(), self.WORKERS)
+
+
+# الـ manifest بتاع whitenoise مش موجود من غير collectstatic
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class AdminChangelistQueryTests(TestCase):
+    # عدد الاستعلامات لصفحة القائمة لازم يفضل ثابت مهما زاد عدد الصفوف
+    MAX_QUERIES = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(
+            username='root', email='root@x.edu', password='x', role='Admin'
+        )
+        table = Table.objects.create(name='Term', active=True)
+        days = [day for day, _ in ClassSchedule.DAYS_OF_WEEK]
+        for i in range(60):
+            doctor = CustomUser.objects.create(username=f"doc{i}", email=f"doc{i}@x.edu", role='Doctor')
+            room = Classroom.objects.create(name=f"Room {i}", capacity='50')
+            course = Course.objects.create(
+                name=f"Course {i}", code=f"C{i}", doctor=doctor, classroom=room, num_students='30'
+            )
+            lecture = ClassSchedule.objects.create(
+                course=course, classroom=room, day=days[i % len(days)],
+                start_time=time(8, 0), end_time=time(9, 30), is_canceled=i % 5 == 0,
+            )
+            TableSchedule.objects.create(table=table, class_schedule=lecture)
+            DoctorAppointment.objects.create(
+                doctor=doctor, location='Office', appointment_date=date(2025, 1, 1), appointment_time=time(10, 0)
+            )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_changelist_query_count_is_bounded(self):
+        models = [Classroom, Course, ClassSchedule, Table, TableSchedule, DoctorAppointment, CustomUser]
+        for model in models:
+            url = reverse(f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist")
+            for query in ('', '?is_canceled__exact=1' if model is ClassSchedule else ''):
+                with self.subTest(model=model.__name__, query=query):
+                    with CaptureQueriesContext(connection) as ctx:
+                        response = self.client.get(url + query)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertLessEqual(len(ctx.captured_queries), self.MAX_QUERIES)
+
+    def test_cancel_action_updates_in_bulk(self):
+        url = reverse('admin:classrooms_classschedule_changelist')
+        ids = list(ClassSchedule.objects.filter(is_canceled=False).values_list('pk', flat=True)[:10])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, {'action': 'cancel_lectures', '_selected_action': ids})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ClassSchedule.objects.filter(pk__in=ids, is_canceled=True).count(), len(ids))
+        self.assertLessEqual(len(ctx.captured_queries), self.MAX_QUERIES)
+
+    def test_change_form_and_delete_invalidate_display_cache(self):
+        room = Classroom.objects.get(name='Room 0')
+        revision = cache.get_revision()
+        response = self.client.post(reverse('admin:classrooms_classroom_change', args=[room.pk]),
+                                    {'name': 'Renamed', 'location': '', 'capacity': '50'})
+        self.assertEqual(response.status_code, 302)
+        self.assertNotEqual(cache.get_revision(), revision)
+
+        revision = cache.get_revision()
+        url = reverse('admin:classrooms_doctorappointment_changelist')
+        ids = list(DoctorAppointment.objects.values_list('pk', flat=True)[:3])
+        self.client.post(url, {'action': 'delete_selected', '_selected_action': ids, 'post': 'yes'})
+        self.assertFalse(DoctorAppointment.objects.filter(pk__in=ids).exists())
+        self.assertNotEqual(cache.get_revision(), revision)
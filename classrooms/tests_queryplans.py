@@ -0,0 +1,391 @@
+import json
+import os
+import re
+from contextlib import contextmanager
+from datetime import date, time, timedelta
+
+from django.core.cache import cache as shared_cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import URLPattern, URLResolver, reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import CustomUser, DeviceToken
+from .models import (
+    ChangeLog, Classroom, ClassSchedule, ClassScheduleQuerySet, Course, DoctorAppointment, OfficeHourRule, Table,
+    TableSchedule,
+)
+
+# ✅ مقارنة عدد الاستعلامات وخطط التنفيذ (EXPLAIN) لكل endpoint بخط أساس محفوظ:
+# أي view بيزود استعلامات، أو بيعمل seq scan على جدول كبير، أو تكلفته بتزيد = التيست بيقع
+# خط الأساس بيتحدث بـ `manage.py update_queryplan_baseline` (لكل نوع قاعدة بيانات لوحده)
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'queryplan_baseline.json')
+LARGE_TABLE_ROWS = 1000     # جدول فيه الصفوف دي أو أكتر: الـ seq scan عليه بيتحسب regression
+COST_TOLERANCE = 0.25       # PostgreSQL بس: زيادة التكلفة التقديرية أكتر من 25% = regression
+URLCONFS = ('classrooms.urls', 'accounts.urls')
+
+# (اسم في خط الأساس، اسم الـ url، kwargs، query string، المستخدم)
+# القيم بتتملى من الداتا المزروعة: {classroom} / {doctor} / ...
+ENDPOINTS = [
+    ('sync', 'sync', {}, '', None),
+    ('search', 'search', {}, 'q=Course 1', None),
+    ('analytics-heatmap', 'analytics', {'report': 'heatmap'}, '', 'admin'),
+    ('analytics-seat-fill', 'analytics', {'report': 'seat-fill'}, '', 'admin'),
+    ('analytics-doctor-load', 'analytics', {'report': 'doctor-load'}, '', 'admin'),
+    ('analytics-cancellations', 'analytics', {'report': 'cancellations'}, '', 'admin'),
+    ('calendar-doctor', 'calendar-feed', {'kind': 'doctor', 'pk': '{doctor}'}, '', None),
+    ('calendar-classroom', 'calendar-feed', {'kind': 'classroom', 'pk': '{classroom}'}, '', None),
+    ('calendar-table', 'calendar-feed', {'kind': 'table', 'pk': '{table}'}, '', None),
+    ('classroom-list', 'classroom-list', {}, '', None),
+    ('classroom-detail', 'classroom-detail', {'pk': '{classroom}'}, '', None),
+    ('classroom-image', 'classroom-image', {'pk': '{classroom}'}, 'day=SUN', None),
+    ('course-list', 'course-list', {}, '', None),
+    ('course-detail', 'course-detail', {'pk': '{course}'}, '', None),
+    ('schedule-list', 'schedule-list', {}, '', None),
+    ('schedule-list-classroom', 'schedule-list', {}, 'classroom={classroom}&day=SUN', None),
+    ('schedule-list-doctor', 'schedule-list', {}, 'doctor={doctor}', None),
+    ('schedule-detail', 'schedule-detail', {'pk': '{lecture}'}, '', None),
+    ('table-list', 'table-list', {}, '', None),
+    ('table-detail', 'table-detail', {'pk': '{table}'}, '', None),
+    ('table-diff', 'table-diff', {'pk': '{draft}'}, '', 'admin'),
+    ('table-optimize-rooms', 'table-optimize-rooms', {'pk': '{draft}'}, '', 'admin'),
+    ('table-schedule-list', 'table-schedule-list', {}, 'table={table}', None),
+    ('table-schedule-detail', 'table-schedule-detail', {'pk': '{table_schedule}'}, '', None),
+    ('doctor-appointment-list', 'doctor-appointment-list', {}, 'doctor={doctor}', None),
+    ('doctor-appointment-detail', 'doctor-appointment-detail', {'pk': '{appointment}'}, '', 'doctor'),
+    ('doctor-appointment-availability', 'doctor-appointment-availability', {}, 'doctor={doctor}', None),
+    ('admins-list', 'admins-list', {}, '', 'admin'),
+    ('admins-detail', 'admins-detail', {'pk': '{admin}'}, '', 'admin'),
+    ('office-hour-list', 'office-hour-list', {}, '', 'admin'),
+    ('office-hour-detail', 'office-hour-detail', {'pk': '{office_hour}'}, '', 'admin'),
+    ('user-profile', 'user_profile', {}, '', 'doctor'),
+    ('doctor-schedule-today', 'doctor_schedule_today', {}, '', 'doctor'),
+    ('doctor-current-lecture', 'doctor_current_lecture', {}, '', 'doctor'),
+    ('admin-lecture-list', 'admin_lecture_list_create', {}, '', 'admin'),
+    ('admin-lecture-detail', 'admin_lecture_detail', {'pk': '{lecture}'}, '', 'admin'),
+    ('admin-classroom-list', 'admin_classroom_list', {}, '', 'admin'),
+    ('doctor-list', 'doctor_list', {}, '', None),
+    ('device-token-list', 'device-token-list', {}, '', 'admin'),
+    ('device-token-detail', 'device-token-detail', {'pk': '{device}'}, '', 'admin'),
+]
+
+# الـ seq scans المقبولة في خط الأساس وسببها: أي seq scan على جدول كبير مش هنا = التيست بيقع
+_WHOLE_TABLE = "بيرجع كل محاضرات الجدول (تقريباً كل الصفوف): قراءة الجدول كله أرخص من أي index"
+_SEMI_JOIN = ("فلتر table_id بيطابق أغلب صفوف tableschedule فالـ planner بيعمل hash semi-join عليها، "
+              "والمحاضرات نفسها بتتجاب بالـ index")
+_LECTURES = {'classrooms_classschedule', 'classrooms_tableschedule'}
+ACCEPTED_SEQ_SCANS = {
+    'schedule-list': (_LECTURES, _WHOLE_TABLE),
+    'table-schedule-list': (_LECTURES, _WHOLE_TABLE),
+    'calendar-table': (_LECTURES, _WHOLE_TABLE),
+    'admin-lecture-list': (_LECTURES, _WHOLE_TABLE),
+    'analytics-heatmap': (_LECTURES, _WHOLE_TABLE),
+    'analytics-seat-fill': (_LECTURES, _WHOLE_TABLE),
+    'analytics-doctor-load': (_LECTURES, _WHOLE_TABLE),
+    'analytics-cancellations': (_LECTURES, _WHOLE_TABLE),
+    'table-diff': (_LECTURES, "بيقارن كل محاضرات جدولين ببعض"),
+    'table-optimize-rooms': ({'classrooms_classschedule'}, "بيحتاج كل محاضرات كل القاعات (المواعيد المحجوزة بره الجدول)"),
+    'calendar-classroom': ({'classrooms_tableschedule'}, _SEMI_JOIN),
+    'schedule-list-doctor': ({'classrooms_tableschedule'}, _SEMI_JOIN),
+}
+
+# مسارات مش محتاجة قياس: POST بس، أو الـ API root، أو endpoint التطوير اللي بيكتب في GET
+EXCLUDED = {'api-root', 'register', 'token_obtain_pair', 'token_refresh', 'dev/reset-password/'}
+
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+_SKIP_SQL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def seed(scale=1):
+    """بيانات بحجم جامعة حقيقية: ~200 دكتور، 150 قاعة، 800 كورس، 3000 محاضرة في الجدول النشط، 4000 موعد."""
+    n = lambda count: max(int(count * scale), 1)  # noqa: E731
+    days = [code for code, _ in ClassSchedule.DAYS_OF_WEEK]
+    slots = [(time(hour), time(hour + 1, 30)) for hour in range(8, 20, 2)]
+
+    admin = CustomUser(username='qp-admin', email='qp-admin@x.edu', role='Admin', full_name='Admin')
+    admin.set_password('qp-admin')
+    admin.save()
+    doctors = CustomUser.objects.bulk_create(
+        CustomUser(username=f"qp-doc{i}", email=f"qp-doc{i}@x.edu", role='Doctor',
+                   full_name=f"Doctor {i}", display_title='د.')
+        for i in range(n(200))
+    )
+    rooms = Classroom.objects.bulk_create(
+        Classroom(name=f"Room {i}", location=f"Building {i % 10}", capacity=str(30 + i % 8 * 20))
+        for i in range(n(150))
+    )
+    courses = Course.objects.bulk_create(
+        Course(name=f"Course {i}", code=f"QP{i:05d}", doctor=doctors[i % len(doctors)],
+               classroom=rooms[i % len(rooms)], num_students=str(20 + i % 12 * 10))
+        for i in range(n(800))
+    )
+
+    # كل قاعة ليها 5 أيام × 6 فترات من غير تداخل
+    lectures = ClassSchedule.objects.bulk_create(
+        ClassSchedule(
+            classroom=rooms[i % len(rooms)], course=courses[i % len(courses)],
+            day=days[i // len(rooms) % len(days)], start_time=slots[i // (len(rooms) * len(days)) % len(slots)][0],
+            end_time=slots[i // (len(rooms) * len(days)) % len(slots)][1],
+            is_canceled=i % 40 == 0, note='عذر طارئ' if i % 40 == 0 else None,
+        )
+        for i in range(n(3000))
+    )
+    # محاضرة طول اليوم كل يوم لدكتور الـ fixtures: /schedule/today/ و /schedule/now/ نتيجتهم ما تتغيرش بالساعة
+    hall = Classroom.objects.create(name='Hall', capacity='500')
+    lectures += ClassSchedule.objects.bulk_create(
+        ClassSchedule(classroom=hall, course=courses[0], day=day, start_time=time.min, end_time=time.max)
+        for day in ClassScheduleQuerySet.WEEKDAY_MAP.values()
+    )
+    active = Table.objects.create(name='Active term', active=True)
+    draft = Table.objects.create(name='Next term draft')
+    Table.objects.bulk_create(Table(name=f"جدول {room.name}", classroom=room) for room in rooms)
+    TableSchedule.objects.bulk_create(TableSchedule(table=active, class_schedule=lecture) for lecture in lectures)
+    TableSchedule.objects.bulk_create(
+        TableSchedule(table=draft, class_schedule=lecture) for lecture in lectures[:len(lectures) // 10]
+    )
+
+    today = date.today()
+    appointments = DoctorAppointment.objects.bulk_create(
+        DoctorAppointment(
+            doctor=doctors[i % len(doctors)], location='Office', appointment_date=today + timedelta(days=i % 28),
+            appointment_time=time(9 + i // len(doctors) % 8, 30 * (i % 2)), available=i % 3 != 0,
+        )
+        for i in range(n(4000))
+    )
+    rules = OfficeHourRule.objects.bulk_create(
+        OfficeHourRule(doctor=doctor, day=days[i % len(days)], start_time=time(10), end_time=time(12),
+                       location='Office', valid_from=today, valid_until=today + timedelta(days=90))
+        for i, doctor in enumerate(doctors)
+    )
+    ChangeLog.objects.bulk_create(
+        ChangeLog(model='classschedule', object_id=lecture.pk, op=ChangeLog.OP_UPDATE, data={'id': lecture.pk})
+        for lecture in lectures
+    )
+    device = DeviceToken.objects.create(name='Lobby screen', scopes=['display:read'], created_by=admin)
+
+    analyze()
+    return {
+        'admin': admin.pk, 'doctor': doctors[0].pk, 'classroom': rooms[0].pk, 'course': courses[0].pk,
+        'lecture': lectures[0].pk, 'table': active.pk, 'draft': draft.pk,
+        'table_schedule': TableSchedule.objects.filter(table=active).values_list('pk', flat=True).first(),
+        'appointment': appointments[0].pk, 'office_hour': rules[0].pk, 'device': device.pk,
+    }
+
+
+def analyze():
+    # الإحصائيات لازم تكون محدثة وإلا الـ planner بيفتكر الجداول فاضية
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def large_tables():
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+        large = set()
+        for table in tables:
+            cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+            if cursor.fetchone()[0] >= LARGE_TABLE_ROWS:
+                large.add(table)
+    return large
+
+
+def reset_caches():
+    """كل قياس بيبدأ من كاش فاضي: عايزين الاستعلامات الحقيقية مش الرد المتخزن."""
+    from accounts import authentication, directory
+    from university_display import throttling
+    from . import cache, compression
+
+    shared_cache.clear()
+    cache.local_cache.clear()
+    authentication._user_cache.clear()
+    authentication._device_cache.clear()
+    directory._directory_cache.clear()
+    compression._compressed.clear()
+    if isinstance(throttling.buckets, throttling.LocalBuckets):
+        throttling.buckets._data.clear()
+    throttling.db_latency.value = throttling.db_latency.updated = 0.0
+
+
+@contextmanager
+def capture_queries():
+    queries = []
+
+    def record(execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(_SKIP_SQL):
+            queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        yield queries
+
+
+def explain(sql, params, large):
+    """يرجع (الجداول الكبيرة اللي عليها seq scan، التكلفة التقديرية أو None)."""
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return set(), None
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+            plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']
+            return _pg_seq_scans(plan, large), plan['Total Cost']
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            scans = set()
+            for row in cursor.fetchall():
+                match = _SQLITE_SCAN.match(row[-1])
+                if match and match.group(1) in large:
+                    scans.add(match.group(1))
+            return scans, None
+    return set(), None
+
+
+def _pg_seq_scans(node, large):
+    scans = set()
+    if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') in large:
+        scans.add(node['Relation Name'])
+    for child in node.get('Plans', ()):
+        scans |= _pg_seq_scans(child, large)
+    return scans
+
+
+def _auth_headers(role, fixtures):
+    if role is None:
+        return {}
+    user = CustomUser.objects.get(pk=fixtures[role])
+    return {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+
+def measure(fixtures):
+    """يشغل كل endpoint في ENDPOINTS ويرجع {اسم: {status, queries, seq_scans, cost}}."""
+    large = large_tables()
+    client = Client(raise_request_exception=False)
+    plans = {}
+    result = {}
+    for label, name, kwargs, query, role in ENDPOINTS:
+        url = reverse(name, kwargs={key: value.format(**fixtures) for key, value in kwargs.items()})
+        if query:
+            url = f"{url}?{query.format(**fixtures)}"
+        headers = _auth_headers(role, fixtures)
+        reset_caches()
+        with capture_queries() as queries:
+            response = client.get(url, **headers)
+
+        seq_scans, cost = set(), None
+        for sql, params in queries:
+            key = (sql, repr(params))
+            if key not in plans:
+                plans[key] = explain(sql, params, large)
+            scans, query_cost = plans[key]
+            seq_scans |= scans
+            if query_cost is not None:
+                cost = (cost or 0) + query_cost
+        result[label] = {
+            'status': response.status_code,
+            'queries': len(queries),
+            'seq_scans': sorted(seq_scans),
+            'cost': round(cost, 1) if cost is not None else None,
+        }
+    return result
+
+
+def compare(current, baseline, tolerance=COST_TOLERANCE):
+    """يرجع قايمة بالـ regressions (فاضية = كله تمام)."""
+    problems = []
+    for label, now in current.items():
+        before = baseline.get(label)
+        if before is None:
+            problems.append(f"{label}: not in baseline, run `manage.py update_queryplan_baseline`")
+            continue
+        if now['status'] != before['status']:
+            problems.append(f"{label}: status {before['status']} -> {now['status']}")
+        if now['queries'] > before['queries']:
+            problems.append(f"{label}: {before['queries']} -> {now['queries']} queries")
+        new_scans = set(now['seq_scans']) - set(before['seq_scans'])
+        if new_scans:
+            problems.append(f"{label}: new seq scan on {', '.join(sorted(new_scans))}")
+        if now['cost'] is not None and before.get('cost') is not None \
+                and now['cost'] > before['cost'] * (1 + tolerance):
+            problems.append(f"{label}: estimated cost {before['cost']} -> {now['cost']}")
+    return problems
+
+
+def undocumented_seq_scans(measurements):
+    """seq scans في القياسات مش مذكورة في ACCEPTED_SEQ_SCANS."""
+    problems = []
+    for label, row in sorted(measurements.items()):
+        extra = set(row['seq_scans']) - ACCEPTED_SEQ_SCANS.get(label, (set(), ''))[0]
+        if extra:
+            problems.append(f"{label}: seq scan on {', '.join(sorted(extra))} is not in ACCEPTED_SEQ_SCANS")
+    return problems
+
+
+def unmeasured_routes():
+    """مسارات GET في classrooms/urls.py و accounts/urls.py مش متغطية في ENDPOINTS ولا في EXCLUDED."""
+    from importlib import import_module
+
+    measured = {name for _, name, *_ in ENDPOINTS}
+    missing = set()
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+                continue
+            if not isinstance(pattern, URLPattern) or not _allows_get(pattern.callback):
+                continue
+            name = pattern.name or str(pattern.pattern)
+            if name not in measured and name not in EXCLUDED:
+                missing.add(name)
+
+    for urlconf in URLCONFS:
+        walk(import_module(urlconf).urlpatterns)
+    return sorted(missing)
+
+
+def _allows_get(callback):
+    actions = getattr(callback, 'actions', None)
+    if actions is not None:
+        return 'get' in actions
+    view_class = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+    return view_class is None or hasattr(view_class, 'get')
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path, encoding='utf-8') as baseline:
+            return json.load(baseline)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(vendor, measurements, path=BASELINE_PATH):
+    baseline = load_baseline(path)
+    baseline[vendor] = measurements
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(baseline, output, indent=2, sort_keys=True, ensure_ascii=False)
+        output.write('\n')
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class QueryPlanRegressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.baseline = load_baseline().get(connection.vendor)
+        if cls.baseline is not None:
+            cls.fixtures = seed()
+
+    def test_every_get_route_is_measured(self):
+        self.assertEqual(unmeasured_routes(), [])
+
+    def test_baseline_seq_scans_are_documented(self):
+        for vendor, measurements in load_baseline().items():
+            with self.subTest(vendor=vendor):
+                problems = undocumented_seq_scans(measurements)
+                self.assertFalse(problems, '\n'.join(problems))
+
+    def test_endpoints_match_baseline(self):
+        if self.baseline is None:
+            self.skipTest(f"no query-plan baseline for {connection.vendor}")
+        problems = compare(measure(self.fixtures), self.baseline)
+        self.assertFalse(problems, '\n'.join(problems))
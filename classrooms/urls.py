@@ -8,6 +8,11 @@ from .views import (
     TableScheduleViewSet,
     DoctorAppointmentViewSet,
     AdminsViewSet, 
+    SyncView,
+    SearchView,
+    AnalyticsView,
+    CalendarFeedView,
+    OfficeHourRuleViewSet,
 )
 
 # إعداد الراوتر
@@ -19,8 +24,13 @@ router.register(r'tables', TableViewSet, basename='table')
 router.register(r'table-schedules', TableScheduleViewSet, basename='table-schedule')
 router.register(r'doctor-appointments', DoctorAppointmentViewSet, basename='doctor-appointment')
 router.register(r'admins', AdminsViewSet, basename='admins')  
+router.register(r'office-hours', OfficeHourRuleViewSet, basename='office-hour')
 
 # تضمين المسارات
 urlpatterns = [
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('analytics/<str:report>/', AnalyticsView.as_view(), name='analytics'),
+    path('calendar/<str:kind>/<int:pk>.ics', CalendarFeedView.as_view(), name='calendar-feed'),
     path('', include(router.urls)),
 ]
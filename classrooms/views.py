@@ -1,103 +1,116 @@
-from rest_framework import generics, viewsets, status
+from rest_framework import generics, viewsets, status, serializers
+from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from .models import Classroom, Course, ClassSchedule, Table, TableSchedule, DoctorAppointment
-from .serializers import ClassroomSerializer, CourseSerializer, ClassScheduleSerializer, TableSerializer, TableScheduleSerializer, DoctorAppointmentSerializer
-from datetime import datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from .models import Classroom, Course, ClassSchedule, Table, TableSchedule, DoctorAppointment, OfficeHourRule
+from .serializers import ClassroomSerializer, CourseSerializer, ClassScheduleSerializer, TableSerializer, TableScheduleSerializer, DoctorAppointmentSerializer, OfficeHourRuleSerializer
+from datetime import datetime, timedelta
+from django.utils.dateparse import parse_date
+from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from accounts.serializers import AdminSerializer
 from accounts.models import CustomUser
 from rest_framework import permissions
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
-
-
-class ClassroomViewSet(viewsets.ModelViewSet):
+from .changelog import changes_since, SYNC_PAGE_SIZE
+from .cache import CachedReadMixin, CacheInvalidationMixin, get_or_build, make_key, scoped_revision
+from .publishing import diff_tables, publish_table
+from .rollover import clone_table
+from .optimizer import apply_plan, plan_rooms
+from .bulk import bulk_cancel, bulk_move, lectures_in_scope
+from .appointments import available_slots, book, expand_rule, AVAILABILITY_SCOPE, MAX_EXPAND_DAYS
+from .search import search, SEARCH_TYPES, DEFAULT_LIMIT, MAX_LIMIT
+from .renderers import CSVRenderer, CompactResponseMixin, ICalendarRenderer, ImagePassthroughRenderer
+from . import analytics
+from accounts.permissions import IsAdminRole
+from .display_image import DAY_NAMES, IMAGE_TYPES, DEFAULT_SIZE, IMAGE_SIZES, room_image, today_code
+from django.http import HttpResponse, HttpResponseNotModified
+from .ical import FEED_KINDS, calendar_feed
+from accounts.directory import get_doctor
+from jobs.registry import enqueue
+from jobs.views import job_accepted
+from archive import archiving
+from django.utils.http import parse_etags
+
+
+class ClassroomViewSet(CompactResponseMixin, CachedReadMixin, CacheInvalidationMixin, viewsets.ModelViewSet):
     queryset = Classroom.objects.all()
     serializer_class = ClassroomSerializer
     permission_classes = [AllowAny]
+    read_replica_actions = ('list', 'retrieve')  # ✅ القراءة من replica لو متاحة (university_display/db_routers.py)
+
+    def perform_create(self, serializer):
+        classroom = serializer.save()
+        Table.objects.create(
+            name=f"جدول {classroom.name}",
+            description=f"جدول مخصص للقاعة {classroom.name}",
+            classroom=classroom
+        )
 
-    def create(self, request, *args, **kwargs):
-        response = super().create(request, *args, **kwargs)
-        classroom_name = response.data.get('name')
-        if classroom_name:
-            Table.objects.create(
-                name=f"جدول {classroom_name}",
-                description=f"جدول مخصص للقاعة {classroom_name}"
+    def perform_update(self, serializer):
+        old_name = serializer.instance.name
+        classroom = serializer.save()
+        if classroom.name != old_name:
+            # ✅ عن طريق الـ FK مش بمطابقة الاسم
+            Table.objects.filter(classroom=classroom).update(
+                name=f"جدول {classroom.name}",
+                description=f"جدول مخصص للقاعة {classroom.name}"
             )
-        return response
 
-    def update(self, request, *args, **kwargs):
-        instance = self.get_object()
-        old_name = instance.name
-        response = super().update(request, *args, **kwargs)
-        new_name = request.data.get('name')
-        if new_name and old_name != new_name:
-            try:
-                table = Table.objects.get(name=f"جدول {old_name}")
-                table.name = f"جدول {new_name}"
-                table.description = f"جدول مخصص للقاعة {new_name}"
-                table.save()
-            except Table.DoesNotExist:
-                pass
+    # ✅ صورة جدول القاعة لليوم: /api/classrooms/<id>/image/?type=png|bmp&width=800&height=480&day=SUN
+    @action(detail=True, methods=['get'], renderer_classes=[JSONRenderer, ImagePassthroughRenderer])
+    def image(self, request, pk=None):
+        classroom = self.get_object()
+        image_type = request.query_params.get('type', 'png')
+        day = request.query_params.get('day') or today_code()
+        if image_type not in IMAGE_TYPES:
+            return Response({'error': f"type must be one of {list(IMAGE_TYPES)}"}, status=status.HTTP_400_BAD_REQUEST)
+        # أي يوم في الأسبوع مقبول: الجمعة والسبت (أو يوم من غير محاضرات) بيرجعوا صورة "لا توجد محاضرات"
+        if day not in DAY_NAMES:
+            return Response({'error': 'invalid day'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            size = tuple(
+                int(request.query_params.get(name, default))
+                for name, default in zip(('width', 'height'), DEFAULT_SIZE)
+            )
+        except ValueError:
+            return Response({'error': 'width and height must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if size not in IMAGE_SIZES:
+            return Response({'error': f"size must be one of {sorted(f'{w}x{h}' for w, h in IMAGE_SIZES)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        body, etag = room_image(classroom, day, size=size, image_type=image_type)
+        etag = f'"{etag}"'
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type=IMAGE_TYPES[image_type])
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=60'
         return response
 
-    def destroy(self, request, *args, **kwargs):
-        instance = self.get_object()
-        classroom_name = instance.name
-        response = super().destroy(request, *args, **kwargs)
-        Table.objects.filter(name=f"جدول {classroom_name}").delete()
-        return response
+    # الحذف: جدول القاعة بيتمسح معاها تلقائياً (on_delete=CASCADE)
 
 
-class CourseViewSet(viewsets.ModelViewSet):
-    queryset = Course.objects.all()
+class CourseViewSet(CachedReadMixin, CacheInvalidationMixin, viewsets.ModelViewSet):
+    queryset = Course.objects.select_related('doctor', 'classroom')
     serializer_class = CourseSerializer
     permission_classes = [AllowAny]
+    read_replica_actions = ('list', 'retrieve')
 
 
-class ClassScheduleViewSet(viewsets.ModelViewSet):
+class ClassScheduleViewSet(CompactResponseMixin, CachedReadMixin, CacheInvalidationMixin, viewsets.ModelViewSet):
     queryset = ClassSchedule.objects.all()
     serializer_class = ClassScheduleSerializer
     permission_classes = [AllowAny]
+    read_replica_actions = ('list', 'retrieve')
 
     def get_queryset(self):
-        queryset = super().get_queryset()
         active_table = Table.objects.filter(active=True).first()
-        if active_table:
-            queryset = queryset.filter(table_schedules__table=active_table, table_schedules__is_active=True).distinct()
-
-        classroom_id = self.request.query_params.get('classroom')
-        if classroom_id:
-            queryset = queryset.filter(classroom_id=classroom_id)
-
-        doctor_id = self.request.query_params.get('doctor')
-        if doctor_id:
-            queryset = queryset.filter(course__doctor__id=doctor_id)
-
-        today_only = self.request.query_params.get('today')
-        day_param = self.request.query_params.get('day')
-
-        weekday_map = {
-            6: 'SUN',
-            0: 'MON',
-            1: 'TUE',
-            2: 'WED',
-            3: 'THU',
-            4: 'FRI',
-            5: 'SAT'
-        }
-
-        if today_only == '1':
-            current_day = weekday_map.get(datetime.today().weekday())
-            queryset = queryset.filter(day=current_day)
-        elif day_param in [d[0] for d in ClassSchedule.DAYS_OF_WEEK]:
-            queryset = queryset.filter(day=day_param)
-
-        table_id = self.request.query_params.get('table_id')
-        if table_id:
-            queryset = queryset.filter(table_schedules__table_id=table_id)
-
-        return queryset
+        return super().get_queryset().for_display(self.request.query_params, active_table).with_related()
 
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -125,11 +138,54 @@ class ClassScheduleViewSet(viewsets.ModelViewSet):
             TableSchedule.objects.create(table=active_table, class_schedule=class_schedule)
         return response
 
+    def _bulk_scope(self, data, require_filter=True):
+        if require_filter and not any(data.get(key) for key in ('table', 'day', 'classroom', 'doctor')):
+            raise ValidationError("⚠️ لازم تحدد جدول أو يوم أو قاعة أو دكتور.")
+        # لو ما اتحددش جدول بنشتغل على الجدول النشط
+        table_id = data.get('table')
+        table = get_object_or_404(Table, pk=table_id) if table_id else Table.objects.filter(active=True).first()
+        return lectures_in_scope(
+            table=table,
+            day=data.get('day'),
+            classroom_id=data.get('classroom'),
+            doctor_id=data.get('doctor'),
+            require_filter=require_filter,
+        )
+
+    # ✅ إلغاء جماعي (إجازة / يوم كامل / قاعة / دكتور): {"table", "day", "classroom", "doctor", "note", "restore"}
+    @action(detail=False, methods=['post'], url_path='bulk-cancel')
+    def bulk_cancel(self, request):
+        # "false" / "0" من form أو query = False، مش True
+        restore = serializers.BooleanField().to_internal_value(request.data.get('restore', False))
+        ids = bulk_cancel(self._bulk_scope(request.data), note=request.data.get('note', ''), canceled=not restore)
+        return Response({'status': 'lectures restored' if restore else 'lectures canceled', 'count': len(ids), 'ids': ids})
+
+    # ✅ نقل جماعي بين القاعات: {"classroom_map": {"<من>": <إلى>}, "table", "day"}
+    @action(detail=False, methods=['post'], url_path='bulk-move')
+    def bulk_move(self, request):
+        scope = self._bulk_scope({'table': request.data.get('table'), 'day': request.data.get('day')},
+                                 require_filter=False)
+        ids = bulk_move(scope, request.data.get('classroom_map') or {})
+        return Response({'status': 'lectures moved', 'count': len(ids), 'ids': ids})
+
 
-class TableViewSet(viewsets.ModelViewSet):
+class TableViewSet(CachedReadMixin, CacheInvalidationMixin, viewsets.ModelViewSet):
     queryset = Table.objects.all()
     serializer_class = TableSerializer
     permission_classes = [AllowAny]
+    read_replica_actions = ('list', 'retrieve')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        classroom_id = self.request.query_params.get('classroom')
+        if classroom_id:
+            queryset = queryset.filter(classroom_id=classroom_id)
+        return queryset
+
+    def check_enqueue_permission(self, request):
+        # ✅ background=true بيحجز مكان في طابور الـ worker: للأدمن بس (401 للمجهول، 403 لغير الأدمن)
+        if not IsAdminRole().has_permission(request, self):
+            self.permission_denied(request, message=IsAdminRole.message)
 
     @action(detail=True, methods=['post'])
     def add_schedule(self, request, pk=None):
@@ -149,37 +205,106 @@ class TableViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def set_active(self, request, pk=None):
         table = self.get_object()
-        Table.objects.update(active=False)
-        table.active = True
-        table.save()
-        return Response({'status': 'active table set', 'table': table.name})
+        result = publish_table(table)
+        response = Response({'status': 'active table set', 'table': table.name, **result})
+        response.cache_primed = True
+        return response
+
+    # ✅ معاينة الفرق قبل النشر: محاضرات مضافة / محذوفة / اتنقلت قاعة
+    @action(detail=True, methods=['get'])
+    def diff(self, request, pk=None):
+        table = self.get_object()
+        current = Table.objects.filter(active=True).exclude(pk=table.pk).first()
+        return Response({'current': current.pk if current else None, 'diff': diff_tables(current, table)})
+
+    @action(detail=True, methods=['post'])
+    def publish(self, request, pk=None):
+        return self.set_active(request, pk=pk)
+
+    # ✅ نسخ جدول كامل (ترم جديد) مع إمكانية تغيير القاعات أو الكورسات بـ mapping
+    @action(detail=True, methods=['post'])
+    def clone(self, request, pk=None):
+        source = self.get_object()
+        name = request.data.get('name')
+        if not name:
+            return Response({'error': 'name is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # جداول كبيرة: background=true بيحول النسخ للـ worker ويرجع 202 برقم المهمة
+        if request.data.get('background'):
+            self.check_enqueue_permission(request)
+            job = enqueue('classrooms.clone_table', user=request.user, kwargs={
+                'source_id': source.pk,
+                'name': name,
+                'description': request.data.get('description'),
+                'classroom_map': request.data.get('classroom_map'),
+                'course_map': request.data.get('course_map'),
+                'reset_cancellations': request.data.get('reset_cancellations', True),
+                'publish': bool(request.data.get('publish')),
+            })
+            return job_accepted(request, job)
+
+        table, count = clone_table(
+            source,
+            name=name,
+            description=request.data.get('description'),
+            classroom_map=request.data.get('classroom_map'),
+            course_map=request.data.get('course_map'),
+            reset_cancellations=request.data.get('reset_cancellations', True),
+        )
+        result = {'status': 'table cloned', 'table': TableSerializer(table).data, 'lectures': count}
+
+        if request.data.get('publish'):
+            result.update(publish_table(table))
+            response = Response(result, status=status.HTTP_201_CREATED)
+            response.cache_primed = True
+            return response
+        return Response(result, status=status.HTTP_201_CREATED)
 
 
-class TableScheduleViewSet(viewsets.ModelViewSet):
+    # ✅ إعادة توزيع القاعات حسب عدد الطلاب: GET = معاينة الخطة، POST = تطبيقها
+    @action(detail=True, methods=['get', 'post'], url_path='optimize-rooms')
+    def optimize_rooms(self, request, pk=None):
+        table = self.get_object()
+        if request.method == 'GET':
+            return Response(plan_rooms(table))
+        if request.data.get('background'):
+            self.check_enqueue_permission(request)
+            return job_accepted(request, enqueue('classrooms.optimize_rooms', kwargs={'table_id': table.pk}, user=request.user))
+        plan = apply_plan(table)
+        return Response({'status': 'rooms reassigned', **plan})
+
+class TableScheduleViewSet(CompactResponseMixin, CachedReadMixin, CacheInvalidationMixin, viewsets.ModelViewSet):
     queryset = TableSchedule.objects.all()
     serializer_class = TableScheduleSerializer
     permission_classes = [AllowAny]
+    read_replica_actions = ('list', 'retrieve')
 
     def get_queryset(self):
+        queryset = TableSchedule.objects.select_related(
+            'table', 'class_schedule__course__doctor', 'class_schedule__course__classroom', 'class_schedule__classroom'
+        ).prefetch_related(
+            Prefetch('class_schedule__table_schedules', queryset=TableSchedule.objects.order_by('table_id', 'pk'))
+        )
         table_id = self.request.query_params.get('table')
         if table_id:
-            return TableSchedule.objects.filter(table_id=table_id)
-        return TableSchedule.objects.all()
+            return queryset.filter(table_id=table_id)
+        return queryset
 
 
-class DoctorAppointmentViewSet(viewsets.ModelViewSet):
+class DoctorAppointmentViewSet(CacheInvalidationMixin, viewsets.ModelViewSet):
     queryset = DoctorAppointment.objects.all()
     serializer_class = DoctorAppointmentSerializer
     permission_classes = [AllowAny]
+    read_replica_actions = ('list', 'retrieve')
 
     def get_queryset(self):
         doctor_id = self.request.query_params.get('doctor')
         if doctor_id:
-            return DoctorAppointment.objects.filter(doctor_id=doctor_id)
+            return DoctorAppointment.objects.filter(doctor_id=doctor_id).select_related('doctor')
 
         user = self.request.user
         if user.is_authenticated and hasattr(user, 'role') and user.role == 'Doctor':
-            return DoctorAppointment.objects.filter(doctor=user)
+            return DoctorAppointment.objects.filter(doctor=user).select_related('doctor')
 
         return DoctorAppointment.objects.none()
 
@@ -193,17 +318,84 @@ class DoctorAppointmentViewSet(viewsets.ModelViewSet):
         appointment.save()
         return Response({'status': 'appointment updated', 'available': appointment.available})
 
+    # ✅ البحث عن المواعيد المتاحة لكل الدكاترة في فترة: ?from=YYYY-MM-DD&to=YYYY-MM-DD&doctor=<id>
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        start_date, end_date = _date_range(request.query_params, default_days=14)
+        if not start_date:
+            return Response({'error': 'Invalid date range'}, status=status.HTTP_400_BAD_REQUEST)
+        doctor_id = request.query_params.get('doctor')
+        if doctor_id and not doctor_id.isdigit():
+            return Response({'error': 'doctor must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        # الكاش بمراجعة المواعيد بس: الحجز بيغيرها من غير ما يمسح باقي الكاش
+        key = make_key('availability', {'from': start_date.isoformat(), 'to': end_date.isoformat(), 'doctor': doctor_id},
+                       revision=scoped_revision(AVAILABILITY_SCOPE))
+        data = get_or_build(key, lambda: (
+            self.get_serializer(available_slots(start_date, end_date, doctor_id=doctor_id), many=True).data, True,
+        ), timeout=60)
+        return Response(data)
+
+    # ✅ حجز ذري: لو طالبين حجزوا نفس الموعد في نفس اللحظة واحد بس بينجح والتاني بياخد 409
+    @action(detail=True, methods=['post'], url_path='book')
+    def book_appointment(self, request, pk=None):
+        if not str(pk).isdigit():
+            return Response({'error': 'Appointment not found'}, status=status.HTTP_404_NOT_FOUND)
+        if book(int(pk)):
+            response = Response({'status': 'appointment booked', 'id': int(pk)})
+            # book() غيّر مراجعة المواعيد المتاحة بس؛ ما نمسحش الكاش العام
+            response.cache_primed = True
+            return response
+        if not DoctorAppointment.objects.filter(pk=pk).exists():
+            return Response({'error': 'Appointment not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'error': 'Appointment is no longer available'}, status=status.HTTP_409_CONFLICT)
+
+
+def _date_range(params, default_days):
+    today = datetime.today().date()
+    start_date = parse_date(params['from']) if params.get('from') else today
+    end_date = parse_date(params['to']) if params.get('to') else start_date + timedelta(days=default_days)
+    if not start_date or not end_date or end_date < start_date \
+            or (end_date - start_date).days > MAX_EXPAND_DAYS:
+        return None, None
+    return start_date, end_date
+
+
+class OfficeHourRuleViewSet(CacheInvalidationMixin, viewsets.ModelViewSet):
+    serializer_class = OfficeHourRuleSerializer
+    permission_classes = [IsAuthenticated]
+    read_replica_actions = ('list', 'retrieve')
+
+    def get_queryset(self):
+        user = self.request.user
+        if getattr(user, 'role', None) == 'Admin':
+            return OfficeHourRule.objects.select_related('doctor')
+        return OfficeHourRule.objects.filter(doctor_id=user.id).select_related('doctor')
 
-class DoctorDashboardViewSet(viewsets.ViewSet):
+    # توليد المواعيد من القاعدة: {"from": "...", "to": "..."} (افتراضياً لحد نهاية القاعدة)
+    @action(detail=True, methods=['post'])
+    def expand(self, request, pk=None):
+        rule = self.get_object()
+        params = {'from': request.data.get('from'), 'to': request.data.get('to') or rule.valid_until.isoformat()}
+        start_date, end_date = _date_range(params, default_days=MAX_EXPAND_DAYS)
+        if not start_date:
+            return Response({'error': 'Invalid date range'}, status=status.HTTP_400_BAD_REQUEST)
+        # المواعيد الأقدم من كده اتنقلت للأرشيف: ما نرجعش نولدها تاني
+        start_date = max(start_date, timezone.localdate() - timedelta(days=archiving.APPOINTMENTS_AFTER_DAYS))
+        created = expand_rule(rule, start_date, end_date)
+        return Response({'status': 'slots created', 'created': len(created)}, status=status.HTTP_201_CREATED)
+
+
+class DoctorDashboardViewSet(CacheInvalidationMixin, viewsets.ViewSet):
     serializer_class = ClassScheduleSerializer
     permission_classes = [IsAuthenticated]
+    read_replica_actions = ('list', 'today', 'stats')
 
     def list(self, request):
         doctor = request.user
         queryset = ClassSchedule.objects.filter(
             course__doctor=doctor,
             table_schedules__is_active=True
-        ).select_related('course', 'classroom').order_by('day', 'start_time')
+        ).with_related().order_by('day', 'start_time')
 
         day = request.query_params.get('day')
         if day:
@@ -229,7 +421,7 @@ class DoctorDashboardViewSet(viewsets.ViewSet):
             course__doctor=doctor,
             day=today,
             table_schedules__is_active=True
-        ).select_related('course', 'classroom').order_by('start_time')
+        ).with_related().order_by('start_time')
 
         serializer = self.serializer_class(queryset, many=True)
         return Response(serializer.data)
@@ -295,4 +487,114 @@ class AdminsViewSet(viewsets.ModelViewSet):
     queryset = CustomUser.objects.filter(role='Admin')
     serializer_class = AdminSerializer
     permission_classes = [IsAuthenticated]
+    read_replica_actions = ('list', 'retrieve')
+
 
+# ✅ مزامنة تفاضلية: /api/sync/?since=<revision> يرجع التغييرات بعد المراجعة دي بس
+class SyncView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = min(int(request.query_params.get('limit', SYNC_PAGE_SIZE)), SYNC_PAGE_SIZE)
+        except ValueError:
+            return Response({'error': 'since and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        models = request.query_params.get('models')
+        models = [m.strip().lower() for m in models.split(',') if m.strip()] if models else None
+        return Response(changes_since(since, limit=max(limit, 1), models=models))
+
+
+# ✅ بحث موحد: /api/search/?q=<نص>&types=course,doctor,classroom&limit=20
+class SearchView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        types = request.query_params.get('types')
+        types = [t.strip().lower() for t in types.split(',') if t.strip()] if types else list(SEARCH_TYPES)
+        unknown = set(types) - set(SEARCH_TYPES)
+        if unknown:
+            return Response({'error': f"unknown types: {sorted(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        key = make_key('search', {'q': query, 'types': sorted(types), 'limit': limit})
+        # مدة قصيرة: تعديل بيانات دكتور ما بيغيرش مراجعة الكاش
+        results = get_or_build(key, lambda: (search(query, types=types, limit=limit), True), timeout=30)
+        return Response({'query': query, 'results': results})
+
+
+# ✅ تقارير الاستخدام: /api/analytics/<report>/?table=<id>&resolution=30&by=doctor (&format=csv)
+class AnalyticsView(APIView):
+    permission_classes = [IsAdminRole]
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, CSVRenderer]
+
+    def get(self, request, report):
+        if report not in analytics.REPORTS:
+            return Response({'error': f"unknown report, expected one of {list(analytics.REPORTS)}"},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        table_id = request.query_params.get('table')
+        table = get_object_or_404(Table, pk=table_id) if table_id else Table.objects.filter(active=True).first()
+        if table is None:
+            return Response({'error': 'لا يوجد جدول نشط'}, status=status.HTTP_404_NOT_FOUND)
+
+        params = {'table': table.pk}
+        if report == 'heatmap':
+            try:
+                params['resolution'] = int(request.query_params.get('resolution', analytics.DEFAULT_RESOLUTION))
+            except ValueError:
+                params['resolution'] = None
+            if params['resolution'] not in analytics.RESOLUTIONS:
+                return Response({'error': f"resolution must be one of {list(analytics.RESOLUTIONS)}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+        if report == 'cancellations':
+            params['by'] = request.query_params.get('by', 'doctor')
+            if params['by'] not in analytics.CANCELLATION_GROUPS:
+                return Response({'error': f"by must be one of {list(analytics.CANCELLATION_GROUPS)}"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        key = make_key(f"analytics:{report}", params)
+        data = get_or_build(key, lambda: (analytics.build_report(table, report, **{
+            k: v for k, v in params.items() if k != 'table'
+        }), True))
+
+        response = Response({'report': report, 'table': table.pk, **data})
+        if request.accepted_renderer.format == 'csv':
+            response['Content-Disposition'] = f'attachment; filename="{report}-table-{table.pk}.csv"'
+        return response
+
+
+# ✅ تقويم .ics للاشتراك: /api/calendar/<doctor|classroom|table>/<id>.ics
+class CalendarFeedView(APIView):
+    permission_classes = [AllowAny]
+    renderer_classes = [JSONRenderer, ICalendarRenderer]
+
+    def get(self, request, kind, pk):
+        if kind not in FEED_KINDS:
+            return Response({'error': f"kind must be one of {list(FEED_KINDS)}"}, status=status.HTTP_404_NOT_FOUND)
+        if kind == 'doctor':
+            doctor = get_doctor(pk)
+            if doctor is None:
+                return Response({'error': 'الدكتور غير موجود'}, status=status.HTTP_404_NOT_FOUND)
+            name = doctor['full_name'] or doctor['username']
+        else:
+            name = get_object_or_404(Classroom if kind == 'classroom' else Table, pk=pk).name
+
+        body, etag = calendar_feed(kind, pk, name)
+        etag = f'"{etag}"'
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+            response['Content-Disposition'] = f'inline; filename="{kind}-{pk}.ics"'
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=300'
+        return response
@@ -11,14 +11,13 @@ done
 
 echo "✅ PostgreSQL is ready!"
 
-# تشغيل المايجريشن
-echo "🔁 Running Django migrations..."
-python manage.py migrate --noinput
-
-# تجميع الملفات الثابتة
-echo "📦 Collecting static files..."
-python manage.py collectstatic --noinput
+# ✅ migrate و collectstatic بس لو فيه مايجريشن جديدة أو ملفات static اتغيرت (الـ image بيتبني وهي متجمعة)
+echo "🔁 Checking migrations and static files..."
+python manage.py startup
 
 # تشغيل السيرفر
+# الطلبات التقيلة (نسخ الجداول، التقارير...) بتتنفذ في run_worker، فالطلب العادي ما يعديش GUNICORN_TIMEOUT
 echo "🚀 Starting Gunicorn..."
-exec gunicorn university_display.wsgi:application --bind 0.0.0.0:$PORT
+# --preload: التطبيق بيتحمل مرة واحدة في الـ master والـ workers بتتعمل منه fork
+exec gunicorn university_display.wsgi:application --bind 0.0.0.0:$PORT --preload \
+  --timeout "${GUNICORN_TIMEOUT:-30}" --graceful-timeout "${GUNICORN_GRACEFUL_TIMEOUT:-30}"
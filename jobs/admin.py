@@ -0,0 +1,21 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from classrooms.admin import ScalableAdmin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(ScalableAdmin):
+    list_display = ('id', 'task', 'status', 'progress', 'attempts', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'task')
+    list_select_related = ('created_by',)
+    readonly_fields = ('result', 'error', 'worker', 'started_at', 'heartbeat_at', 'finished_at', 'created_at')
+    actions = ['requeue']
+
+    @admin.action(description="إعادة تشغيل المهام المحددة")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=Job.STATUS_RUNNING).update(
+            status=Job.STATUS_QUEUED, attempts=0, run_after=timezone.now(), finished_at=None, error='',
+        )
+        self.message_user(request, f"✅ {updated} مهمة رجعت للطابور")
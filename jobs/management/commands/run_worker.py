@@ -0,0 +1,21 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from jobs.registry import TASKS
+from jobs.worker import POLL_INTERVAL, Worker
+
+
+class Command(BaseCommand):
+    help = "Run background jobs (exports, cloning, analytics, cache rebuilds) on a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL)
+        parser.add_argument('--burst', action='store_true', help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        worker = Worker(processes=options['processes'], poll_interval=options['poll_interval'])
+        self.stdout.write(f"🚀 worker {worker.name}: {worker.processes} processes, tasks: {', '.join(sorted(TASKS))}")
+        worker.run(burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS("✅ worker stopped"))
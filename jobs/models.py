@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+# ✅ طابور مهام بسيط في قاعدة البيانات: العمليات التقيلة بتتنفذ في run_worker بدل طلب gunicorn
+class Job(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELED = 'canceled'
+    STATUSES = [
+        (STATUS_QUEUED, 'في الانتظار'),
+        (STATUS_RUNNING, 'قيد التنفيذ'),
+        (STATUS_SUCCEEDED, 'تم'),
+        (STATUS_FAILED, 'فشل'),
+        (STATUS_CANCELED, 'ملغي'),
+    ]
+    FINISHED = (STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELED)
+
+    task = models.CharField(max_length=100, verbose_name="المهمة")
+    kwargs = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUSES, default=STATUS_QUEUED)
+    priority = models.SmallIntegerField(default=0)  # الأكبر بيتنفذ الأول
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)  # تأجيل إعادة المحاولة
+    progress = models.PositiveSmallIntegerField(default=0)  # 0..100
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs',
+    )
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-pk']
+        indexes = [
+            # الـ worker بيدور على المهام المنتظرة بس
+            models.Index(fields=['-priority', 'run_after'], condition=models.Q(status='queued'), name='job_queued_idx'),
+            models.Index(fields=['task'], condition=models.Q(status='running'), name='job_running_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
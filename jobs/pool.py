@@ -0,0 +1,12 @@
+# ✅ الدوال اللي بتتبعت لعمليات الـ pool: الموديول ده لازم يتعمل له import قبل django.setup()
+# (spawn بيفك الـ pickle الأول)، فمفيش import لموديلات هنا
+
+
+def init_process():
+    import django
+    django.setup()
+
+
+def run_job(job_id):
+    from .worker import execute
+    execute(job_id)
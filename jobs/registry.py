@@ -0,0 +1,66 @@
+import time
+from contextvars import ContextVar
+
+from django.utils import timezone
+
+from .models import Job
+
+# ✅ سجل المهام: @task بيسجل الدالة باسم "<app>.<function>"، والـ worker بينفذها بالاسم
+TASKS = {}
+PROGRESS_INTERVAL = 0.5     # أقل مدة (ثواني) بين تحديثين للتقدم في قاعدة البيانات
+
+_current_job = ContextVar('current_job', default=None)
+_last_progress = ContextVar('last_progress', default=0.0)
+
+
+class Task:
+    def __init__(self, name, func, max_attempts, retry_delay, concurrency):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay      # ثواني، بتتضاعف مع كل محاولة
+        self.concurrency = concurrency      # أقصى عدد بيتنفذ في نفس الوقت على كل الـ workers (None = مفتوح)
+
+    def retry_after(self, attempts):
+        return self.retry_delay * 2 ** max(attempts - 1, 0)
+
+
+def task(name=None, max_attempts=3, retry_delay=30, concurrency=None):
+    def decorator(func):
+        task_name = name or f"{func.__module__.split('.')[0]}.{func.__name__}"
+        TASKS[task_name] = Task(task_name, func, max_attempts, retry_delay, concurrency)
+        func.task_name = task_name
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return TASKS[name]
+    except KeyError:
+        raise ValueError(f"unknown task: {name}")
+
+
+def enqueue(name, kwargs=None, user=None, priority=0):
+    spec = get_task(name)
+    return Job.objects.create(
+        task=spec.name,
+        kwargs=kwargs or {},
+        priority=priority,
+        max_attempts=spec.max_attempts,
+        created_by=user if getattr(user, 'is_authenticated', False) and getattr(user, 'pk', None) else None,
+    )
+
+
+def report_progress(percent, message=''):
+    """تتنادى من جوه المهمة؛ بره الـ worker (زي التيستات) مالهاش أي تأثير."""
+    job_id = _current_job.get()
+    if job_id is None:
+        return
+    now = time.monotonic()
+    if percent < 100 and now - _last_progress.get() < PROGRESS_INTERVAL:
+        return
+    _last_progress.set(now)
+    Job.objects.filter(pk=job_id).update(
+        progress=min(max(int(percent), 0), 100), message=message[:255], heartbeat_at=timezone.now()
+    )
@@ -0,0 +1,24 @@
+from rest_framework import serializers
+
+from .models import Job
+from .registry import TASKS
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'task', 'kwargs', 'status', 'priority', 'attempts', 'max_attempts', 'progress', 'message',
+            'result', 'error', 'created_by', 'worker', 'run_after', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = [field for field in fields if field not in ('task', 'kwargs', 'priority')]
+
+    def validate_task(self, value):
+        if value not in TASKS:
+            raise serializers.ValidationError(f"unknown task, expected one of {sorted(TASKS)}")
+        return value
+
+    def validate_kwargs(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("kwargs must be an object")
+        return value
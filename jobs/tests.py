@@ -0,0 +1,127 @@
+import threading
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from . import registry, worker
+from .models import Job
+
+
+@registry.task(name='jobs.echo', max_attempts=3, retry_delay=10)
+def echo(value=None, fail=False):
+    if fail:
+        raise RuntimeError('boom')
+    return {'value': value}
+
+
+@registry.task(name='jobs.single', concurrency=1)
+def single():
+    return None
+
+
+class ClaimTests(TestCase):
+    def test_claims_by_priority_and_skips_delayed_jobs(self):
+        low = registry.enqueue('jobs.echo')
+        high = registry.enqueue('jobs.echo', priority=5)
+        Job.objects.create(task='jobs.echo', run_after=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(worker.claim(5, 'w1'), [high.pk, low.pk])
+        low.refresh_from_db()
+        self.assertEqual((low.status, low.attempts, low.worker), (Job.STATUS_RUNNING, 1, 'w1'))
+        self.assertEqual(worker.claim(5, 'w2'), [])
+
+    def test_concurrency_limit_counts_running_jobs(self):
+        first = registry.enqueue('jobs.single')
+        second = registry.enqueue('jobs.single')
+        self.assertEqual(worker.claim(5, 'w1'), [first.pk])
+        self.assertEqual(worker.claim(5, 'w2'), [])
+        Job.objects.filter(pk=first.pk).update(status=Job.STATUS_SUCCEEDED)
+        self.assertEqual(worker.claim(5, 'w2'), [second.pk])
+
+    def test_unknown_tasks_are_left_queued(self):
+        Job.objects.create(task='gone.task')
+        self.assertEqual(worker.claim(5, 'w1'), [])
+
+
+class RetryTests(TestCase):
+    def _running(self, attempts, **kwargs):
+        job = registry.enqueue('jobs.echo', kwargs=kwargs)
+        Job.objects.filter(pk=job.pk).update(status=Job.STATUS_RUNNING, attempts=attempts, worker='w1')
+        job.refresh_from_db()
+        return job
+
+    def test_failed_job_is_retried_with_doubling_delay(self):
+        for attempts, delay in ((1, 10), (2, 20)):
+            with self.subTest(attempts=attempts):
+                job = self._running(attempts)
+                before = timezone.now()
+                worker.fail(job, 'boom')
+                job.refresh_from_db()
+                self.assertEqual((job.status, job.worker, job.error), (Job.STATUS_QUEUED, '', 'boom'))
+                self.assertAlmostEqual((job.run_after - before).total_seconds(), delay, delta=1)
+
+    def test_last_attempt_marks_job_failed(self):
+        job = self._running(3)
+        worker.fail(job, 'boom')
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    # execute بيقفل الاتصالات القديمة (في عملية الـ pool)، وده بيقفل اتصال التيست جوه الـ transaction
+    @mock.patch.object(worker, 'close_old_connections')
+    def test_execute_records_result_or_schedules_retry(self, close_old_connections):
+        done = self._running(1, value=7)
+        worker.execute(done.pk)
+        done.refresh_from_db()
+        self.assertEqual((done.status, done.result, done.progress), (Job.STATUS_SUCCEEDED, {'value': 7}, 100))
+        failed = self._running(1, fail=True)
+        worker.execute(failed.pk)
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, Job.STATUS_QUEUED)
+        self.assertIn('RuntimeError: boom', failed.error)
+
+
+class StaleJobTests(TestCase):
+    def test_running_jobs_without_heartbeat_are_requeued(self):
+        now = timezone.now()
+        stale = registry.enqueue('jobs.echo')
+        alive = registry.enqueue('jobs.echo')
+        Job.objects.filter(pk=stale.pk).update(status=Job.STATUS_RUNNING, attempts=1, worker='dead',
+                                               heartbeat_at=now - timedelta(seconds=worker.STALE_AFTER + 1))
+        Job.objects.filter(pk=alive.pk).update(status=Job.STATUS_RUNNING, attempts=1, worker='w1', heartbeat_at=now)
+        with self.assertLogs('jobs.worker', 'WARNING'):
+            worker.requeue_stale()
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((stale.status, stale.error), (Job.STATUS_QUEUED, 'worker dead stopped responding'))
+        self.assertEqual(alive.status, Job.STATUS_RUNNING)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'SKIP LOCKED needs PostgreSQL')
+class ConcurrentClaimTests(TransactionTestCase):
+    def test_claim_skips_rows_locked_by_another_worker(self):
+        locked = registry.enqueue('jobs.echo', priority=5)
+        free = registry.enqueue('jobs.echo')
+        holding, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    list(Job.objects.select_for_update().filter(pk=locked.pk))
+                    holding.set()
+                    release.wait(5)
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        try:
+            self.assertTrue(holding.wait(5))
+            self.assertEqual(worker.claim(5, 'w1'), [free.pk])
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(worker.claim(5, 'w2'), [locked.pk])
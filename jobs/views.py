@@ -0,0 +1,65 @@
+from django.urls import reverse
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from accounts.permissions import IsAdminRole
+from .models import Job
+from .registry import enqueue
+from .serializers import JobSerializer
+
+PROGRESS_FIELDS = ('id', 'task', 'status', 'progress', 'message', 'attempts')
+
+
+def job_accepted(request, job):
+    """رد 202 للعمليات اللي اتحولت للـ worker: العميل يتابع /api/jobs/<id>/progress/"""
+    response = Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    response['Location'] = request.build_absolute_uri(reverse('job-detail', args=[job.pk]))
+    return response
+
+
+# ✅ متابعة المهام: /api/jobs/ (الأدمن بيشوف الكل، غيره بيشوف مهامه بس)
+class JobViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = Job.objects.all()
+        if getattr(self.request.user, 'role', None) != 'Admin':
+            queryset = queryset.filter(created_by_id=self.request.user.pk)
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        return queryset
+
+    def get_permissions(self):
+        if self.action in ('create', 'cancel'):
+            return [IsAdminRole()]
+        return super().get_permissions()
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = enqueue(
+            serializer.validated_data['task'],
+            kwargs=serializer.validated_data.get('kwargs'),
+            user=request.user,
+            priority=serializer.validated_data.get('priority', 0),
+        )
+        return job_accepted(request, job)
+
+    # استعلام خفيف للـ polling من الواجهة
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        job = self.get_queryset().filter(pk=pk).values(*PROGRESS_FIELDS).first()
+        if job is None:
+            return Response({'error': 'المهمة غير موجودة'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        updated = Job.objects.filter(pk=pk, status=Job.STATUS_QUEUED).update(status=Job.STATUS_CANCELED)
+        if not updated:
+            return Response({'error': 'only queued jobs can be canceled'}, status=status.HTTP_409_CONFLICT)
+        return Response({'status': 'job canceled'})
@@ -0,0 +1,173 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.db import close_old_connections, connection, connections, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+from .pool import init_process, run_job
+from .registry import TASKS, _current_job, get_task
+
+logger = logging.getLogger(__name__)
+
+# ✅ الـ worker: العملية الرئيسية بتحجز المهام (SKIP LOCKED) وبتوزعها على process pool بعدد الأنوية
+POLL_INTERVAL = 1.0         # ثواني بين كل مرة بيدور فيها على مهام جديدة
+STALE_AFTER = 5 * 60        # مهمة running من غير heartbeat المدة دي = الـ worker بتاعها مات
+CLAIM_LOCK = 3303           # قفل استشاري عشان حدود التزامن (concurrency) تتحسب صح بين أكتر من worker
+
+
+def execute(job_id):
+    """بتتنفذ جوه عملية من الـ pool (عمليات الـ pool بتتعمل بـ spawn ومش بتورث حاجة من الـ worker)."""
+    close_old_connections()
+    job = Job.objects.get(pk=job_id)
+    token = _current_job.set(job.pk)
+    try:
+        result = get_task(job.task).func(**job.kwargs)
+    except Exception:
+        fail(job, traceback.format_exc())
+    else:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.STATUS_SUCCEEDED, result=result, progress=100, error='', finished_at=timezone.now()
+        )
+    finally:
+        _current_job.reset(token)
+        close_old_connections()
+
+
+def fail(job, error):
+    # إعادة المحاولة بتأخير بيتضاعف لحد max_attempts
+    now = timezone.now()
+    spec = TASKS.get(job.task)
+    if spec is not None and job.attempts < job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.STATUS_QUEUED, error=error, worker='',
+            run_after=now + timedelta(seconds=spec.retry_after(job.attempts)),
+        )
+    else:
+        Job.objects.filter(pk=job.pk).update(status=Job.STATUS_FAILED, error=error, finished_at=now)
+
+
+def claim(limit, worker_name):
+    """يحجز لحد limit مهمة منتظرة ويعلّمها running. يرجع قايمة الـ ids."""
+    now = timezone.now()
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [CLAIM_LOCK])
+
+        running = dict(
+            Job.objects.filter(status=Job.STATUS_RUNNING).order_by()
+            .values_list('task').annotate(count=Count('pk'))
+        )
+        free = {
+            name: spec.concurrency - running.get(name, 0)
+            for name, spec in TASKS.items() if spec.concurrency is not None
+        }
+        saturated = [name for name, slots in free.items() if slots <= 0]
+        candidates = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.STATUS_QUEUED, run_after__lte=now, task__in=list(TASKS))
+            .exclude(task__in=saturated)
+            .order_by('-priority', 'run_after', 'pk')
+            .values_list('pk', 'task')[:limit * 2]
+        )
+
+        claimed = []
+        for job_id, name in candidates:
+            if name in free:
+                if free[name] <= 0:
+                    continue
+                free[name] -= 1
+            claimed.append(job_id)
+            if len(claimed) == limit:
+                break
+
+        if claimed:
+            Job.objects.filter(pk__in=claimed).update(
+                status=Job.STATUS_RUNNING, attempts=F('attempts') + 1, worker=worker_name,
+                started_at=now, heartbeat_at=now, progress=0, message='',
+            )
+    return claimed
+
+
+def requeue_stale():
+    # مهام running من worker وقع من غير ما يخلصها
+    cutoff = timezone.now() - timedelta(seconds=STALE_AFTER)
+    stale = Job.objects.filter(status=Job.STATUS_RUNNING, heartbeat_at__lt=cutoff)
+    for job in stale:
+        logger.warning("Requeueing stale job %s (worker %s)", job.pk, job.worker)
+        fail(job, f"worker {job.worker} stopped responding")
+
+
+class Worker:
+    def __init__(self, processes=None, poll_interval=POLL_INTERVAL, name=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+
+    def stop(self, *args):
+        logger.info("Worker %s stopping after running jobs finish", self.name)
+        self.stopping = True
+
+    def _pool(self):
+        # العمليات الفرعية ما بتورثش اتصال قاعدة البيانات
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_process,
+        )
+
+    def run(self, burst=False):
+        """burst: يخلص المهام الموجودة ويقفل (للتيستات و cron)."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        pool = self._pool()
+        running = {}
+        last_recovery = None
+        try:
+            while True:
+                now = timezone.now()
+                if last_recovery is None or now - last_recovery > timedelta(seconds=STALE_AFTER / 5):
+                    requeue_stale()
+                    last_recovery = now
+
+                if not self.stopping and len(running) < self.processes:
+                    for job_id in claim(self.processes - len(running), self.name):
+                        running[pool.submit(run_job, job_id)] = job_id
+
+                if running:
+                    Job.objects.filter(pk__in=running.values(), status=Job.STATUS_RUNNING).update(heartbeat_at=now)
+                elif self.stopping or burst:
+                    break
+
+                if not running:
+                    time.sleep(self.poll_interval)
+                    continue
+                done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    job_id = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        # العملية الفرعية ماتت (مثلاً OOM) قبل ما تسجل النتيجة
+                        broken = broken or isinstance(error, BrokenProcessPool)
+                        fail(Job.objects.get(pk=job_id), ''.join(traceback.format_exception(error)))
+                if broken:
+                    for future, job_id in running.items():
+                        fail(Job.objects.get(pk=job_id), 'worker process pool broke')
+                    running.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._pool()
+        finally:
+            pool.shutdown(wait=True)
@@ -0,0 +1,87 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# ✅ توجيه القراءات لنسخ القراءة (replicas): الـ view بيحدد الـ actions الآمنة بـ read_replica_actions،
+# والـ middleware بيختار replica واحدة للطلب كله. أي كتابة بتروح للـ primary دايماً
+REPLICAS = tuple(getattr(settings, 'DATABASE_REPLICAS', ()))
+STICKY_SECONDS = getattr(settings, 'DB_REPLICA_STICKY_SECONDS', 10)
+STICKY_COOKIE = 'db_primary'
+# بعد أي كتابة ناجحة (مراجعة كاش جديدة) الـ replicas ممكن تكون لسه متأخرة: القراءات منها بتتخدم عادي
+# بس ما بتتخزنش في الكاش المشترك، عشان ما يتبنيش كاش قديم تحت المراجعة الجديدة
+RECENT_WRITE_KEY = 'db:recent-write'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def current_read_alias():
+    return _read_alias.get()
+
+
+def mark_recent_write():
+    if REPLICAS:
+        shared_cache.set(RECENT_WRITE_KEY, time.time(), timeout=STICKY_SECONDS)
+
+
+def replica_may_be_stale():
+    return _read_alias.get() is not None and shared_cache.get(RECENT_WRITE_KEY) is not None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        # جوه transaction على الـ primary لازم القراءة تشوف نفس البيانات
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _view_action(view_func, method):
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    actions = getattr(view_func, 'actions', None)
+    if actions is not None:
+        # ViewSet: {'get': 'list'} / {'get': 'retrieve', 'put': 'update', ...}
+        return view_class, actions.get(method.lower())
+    return view_class, method.lower()
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.set(None)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            # read-your-writes: نفس العميل (بالكوكي) يقرا من الـ primary لحد ما الـ replicas تلحق
+            response.set_cookie(STICKY_COOKIE, '1', max_age=STICKY_SECONDS, httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _read_alias.set(None)
+        if request.method not in SAFE_METHODS or not REPLICAS or request.COOKIES.get(STICKY_COOKIE):
+            return None
+        view_class, action = _view_action(view_func, request.method)
+        if action not in getattr(view_class, 'read_replica_actions', ()):
+            return None
+        _read_alias.set(random.choice(REPLICAS))
+        return None
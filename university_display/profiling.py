@@ -0,0 +1,246 @@
+import random
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from contextlib import ExitStack
+from html import escape
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse, JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.authentication import ClaimsJWTAuthentication
+from accounts.permissions import IsAdminRole
+
+# ✅ بروفايل لطلب واحد عند الطلب (Admin بس): X-Profile: store|svg|json أو ?_profile=...
+# sampler بيقرا stack الـ thread بتاع الطلب كل INTERVAL ويطلع flame graph + جدول زمني للـ SQL.
+# PROFILING_ENABLED=False (الافتراضي) = الـ middleware مش بيتحمل أصلاً (MiddlewareNotUsed)
+ENABLED = getattr(settings, 'PROFILING_ENABLED', False)
+SAMPLE_RATE = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)     # نسبة الطلبات اللي بتتسجل تلقائياً
+INTERVAL = getattr(settings, 'PROFILING_INTERVAL_MS', 5) / 1000
+KEEP = getattr(settings, 'PROFILING_KEEP', 20)                      # عدد أبطأ الطلبات المحفوظة
+TTL = 24 * 60 * 60
+HEADER = 'HTTP_X_PROFILE'
+QUERY_FLAG = '_profile'
+MODES = ('store', 'svg', 'json')
+SLOWEST_KEY = 'profiling:slowest'
+MAX_DEPTH = 200
+MAX_SQL = 500
+_store_lock = threading.Lock()
+
+
+class Sampler:
+    """بيسجل stacks الـ thread المستهدف في Counter بالشكل المطوي (folded): 'a;b;c' -> عدد العينات."""
+
+    def __init__(self, thread_id, root_frame, interval=INTERVAL):
+        self.thread_id = thread_id
+        self.root = root_frame
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._fold(frame)] += 1
+
+    def _fold(self, frame):
+        # من الـ middleware لتحت بس (frames الـ WSGI server فوقه مش مفيدة)
+        names = []
+        while frame is not None and frame is not self.root and len(names) < MAX_DEPTH:
+            code = frame.f_code
+            names.append(f"{frame.f_globals.get('__name__', '?')}.{code.co_name}")
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+
+class SQLTimeline:
+    def __init__(self, started):
+        self.started = started
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            end = time.perf_counter()
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'start_ms': round((start - self.started) * 1000, 2),
+                'duration_ms': round((end - start) * 1000, 2),
+                'sql': sql[:MAX_SQL],
+            })
+
+
+def flame_graph(stacks, title='', width=1200, row=16):
+    """SVG بسيط من الـ stacks المطوية: العرض = نسبة العينات، والعمق لتحت."""
+    total = sum(stacks.values())
+    if not total:
+        return f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="40"><text x="4" y="24">no samples</text></svg>'
+
+    tree = {}
+    for stack, count in stacks.items():
+        node = tree
+        for name in stack.split(';'):
+            entry = node.setdefault(name, [0, {}])
+            entry[0] += count
+            node = entry[1]
+
+    rects, depth = [], [0]
+
+    def walk(node, x, level):
+        depth[0] = max(depth[0], level + 1)
+        for name, (count, children) in sorted(node.items()):
+            w = count / total * width
+            if w >= 0.5:
+                rects.append((x, level, w, name, count))
+                walk(children, x, level + 1)
+            x += w
+
+    walk(tree, 0.0, 0)
+    height = (depth[0] + 2) * row
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="monospace" font-size="11">',
+        f'<text x="4" y="{row - 4}">{escape(title)} ({total} samples)</text>',
+    ]
+    for x, level, w, name, count in rects:
+        y = height - (level + 1) * row
+        hue = 10 + zlib.crc32(name.split('.')[0].encode()) % 50
+        label = escape(name) if w > 40 else ''
+        parts.append(
+            f'<g><title>{escape(name)} ({count} samples, {count / total:.1%})</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row - 1}" fill="hsl({hue},80%,60%)"/>'
+            f'<text x="{x + 2:.1f}" y="{y + row - 4}">{label[:int(w // 7)]}</text></g>'
+        )
+    parts.append('</svg>')
+    return '\n'.join(parts)
+
+
+def save_profile(profile):
+    shared_cache.set(f"profiling:{profile['id']}", profile, timeout=TTL)
+    summary = {key: profile[key] for key in ('id', 'method', 'path', 'status', 'duration_ms', 'sql_ms', 'queries', 'at')}
+    with _store_lock:
+        # تقريبي بين العمليات (get ثم set) زي الـ throttling المشترك
+        slowest = [entry for entry in shared_cache.get(SLOWEST_KEY, []) if entry['id'] != profile['id']]
+        slowest.append(summary)
+        slowest.sort(key=lambda entry: entry['duration_ms'], reverse=True)
+        for dropped in slowest[KEEP:]:
+            shared_cache.delete(f"profiling:{dropped['id']}")
+        shared_cache.set(SLOWEST_KEY, slowest[:KEEP], timeout=TTL)
+
+
+def get_profile(profile_id):
+    return shared_cache.get(f"profiling:{profile_id}")
+
+
+def _is_admin(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_superuser or getattr(user, 'role', None) == 'Admin'
+    # الـ middleware قبل DRF: نتحقق من الـ JWT بنفسنا (بنفس كاش المستخدمين)
+    try:
+        result = ClaimsJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return result is not None and getattr(result[0], 'role', None) == 'Admin'
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = request.META.get(HEADER) or request.GET.get(QUERY_FLAG)
+        if mode:
+            mode = mode if mode in MODES else 'store'
+            if not _is_admin(request):
+                return self.get_response(request)
+        elif SAMPLE_RATE and random.random() < SAMPLE_RATE:
+            mode = 'store'
+        else:
+            return self.get_response(request)
+        return self._profile(request, mode)
+
+    def _profile(self, request, mode):
+        started = time.perf_counter()
+        timeline = SQLTimeline(started)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timeline))
+            with Sampler(threading.get_ident(), sys._getframe()) as sampler:
+                response = self.get_response(request)
+        duration = (time.perf_counter() - started) * 1000
+        sql_ms = sum(query['duration_ms'] for query in timeline.queries)
+
+        profile = {
+            'id': uuid.uuid4().hex[:12],
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration_ms': round(duration, 2),
+            'sql_ms': round(sql_ms, 2),
+            'queries': len(timeline.queries),
+            'at': time.time(),
+            'interval_ms': INTERVAL * 1000,
+            'stacks': dict(sampler.stacks),
+            'sql': timeline.queries,
+        }
+        save_profile(profile)
+
+        if mode == 'svg':
+            response = HttpResponse(flame_graph(sampler.stacks, f"{request.method} {profile['path']}"),
+                                    content_type='image/svg+xml')
+        elif mode == 'json':
+            response = JsonResponse(profile, json_dumps_params={'ensure_ascii': False})
+        response['X-Profile-Id'] = profile['id']
+        response['Server-Timing'] = (
+            f'total;dur={duration:.1f}, db;dur={sql_ms:.1f};desc="{len(timeline.queries)} queries"'
+        )
+        return response
+
+
+# /api/profiles/ = أبطأ الطلبات اللي اتسجلت، /api/profiles/<id>/ = التفاصيل، ?view=svg|folded = الـ flame graph
+class SlowestRequestsView(APIView):
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        return Response(shared_cache.get(SLOWEST_KEY, []))
+
+
+class ProfileDetailView(APIView):
+    permission_classes = [IsAdminRole]
+
+    def get(self, request, profile_id):
+        profile = get_profile(profile_id)
+        if profile is None:
+            return Response({'error': 'Profile not found or expired'}, status=status.HTTP_404_NOT_FOUND)
+        if request.query_params.get('view') == 'svg':
+            title = f"{profile['method']} {profile['path']}"
+            return HttpResponse(flame_graph(Counter(profile['stacks']), title), content_type='image/svg+xml')
+        if request.query_params.get('view') == 'folded':
+            # نفس صيغة flamegraph.pl / speedscope
+            body = '\n'.join(f"{stack} {count}" for stack, count in profile['stacks'].items())
+            return HttpResponse(body, content_type='text/plain; charset=utf-8')
+        return Response(profile)
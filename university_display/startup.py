@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import pkgutil
+import re
+import subprocess
+import sys
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import DatabaseError
+
+# ✅ تشغيل الكونتينر من الصفر (scale-to-zero): migrate و collectstatic بيتنفذوا بس لو حاجة اتغيرت
+STATIC_FINGERPRINT = '.fingerprint'
+# مكتبات تقيلة لازم تفضل lazy جوه الـ features اللي بتستخدمها (التحليلات، توزيع القاعات، الصور)
+HEAVY_MODULES = ('pandas', 'numpy', 'scipy', 'sklearn', 'PIL')
+IMPORT_BUDGET = 1.0     # ثواني لحد ما الـ WSGI app والـ urls يبقوا جاهزين
+
+_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+_BENCH_SCRIPT = """
+import time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(time.perf_counter() - started)
+"""
+
+
+def disk_migrations():
+    # أسماء الملفات بس من غير ما نعمل import للمايجريشنز نفسها (ده اللي بيتقل migrate)
+    found = set()
+    for app_config in apps.get_app_configs():
+        try:
+            module = import_module(f"{app_config.name}.migrations")
+        except ImportError:
+            continue
+        for info in pkgutil.iter_modules(getattr(module, '__path__', [])):
+            if not info.ispkg and info.name[0] not in '_~':
+                found.add((app_config.label, info.name))
+    return found
+
+
+def pending_migrations(using=DEFAULT_DB_ALIAS):
+    """المايجريشنز اللي على الديسك ومش متسجلة في django_migrations (استعلام واحد)."""
+    connection = connections[using]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT app, name FROM django_migrations")
+            applied = set(cursor.fetchall())
+    except DatabaseError:
+        # قاعدة بيانات جديدة (مفيش django_migrations لسه)
+        return disk_migrations()
+    return disk_migrations() - applied
+
+
+def static_fingerprint():
+    """hash لمسارات وأحجام وتواريخ كل ملفات static المصدر + إعدادات التخزين."""
+    from django.contrib.staticfiles.finders import get_finders
+
+    digest = hashlib.sha256(json.dumps([settings.STATICFILES_STORAGE, str(settings.STATIC_URL)]).encode())
+    entries = []
+    for finder in get_finders():
+        for path, storage in finder.list(['CVS', '.*', '*~']):
+            stat = os.stat(storage.path(path))
+            entries.append(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}")
+    for entry in sorted(entries):
+        digest.update(entry.encode())
+    return digest.hexdigest()
+
+
+def _fingerprint_path():
+    return os.path.join(settings.STATIC_ROOT, STATIC_FINGERPRINT)
+
+
+def static_is_current(fingerprint):
+    try:
+        with open(_fingerprint_path(), encoding='utf-8') as stored:
+            return stored.read().strip() == fingerprint
+    except OSError:
+        return False
+
+
+def write_static_fingerprint(fingerprint):
+    os.makedirs(settings.STATIC_ROOT, exist_ok=True)
+    with open(_fingerprint_path(), 'w', encoding='utf-8') as output:
+        output.write(fingerprint)
+
+
+def import_benchmark(top=15):
+    """يشغل عملية جديدة بـ `python -X importtime` ويرجع (الزمن، أبطأ الموديولات، المكتبات التقيلة اللي اتحملت)."""
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _BENCH_SCRIPT],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(2)) / 1_000_000, len(match.group(3)) // 2))
+    loaded = {name.split('.')[0] for name, _, _ in modules}
+    slowest = sorted((entry for entry in modules if entry[2] == 0), key=lambda entry: entry[1], reverse=True)
+    return float(result.stdout.strip().splitlines()[-1]), slowest[:top], sorted(loaded & set(HEAVY_MODULES))
@@ -0,0 +1,223 @@
+import time as time_module
+import unittest
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache as shared_cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import CustomUser
+from classrooms import cache, fallback
+from classrooms.models import Classroom
+from classrooms.views import ClassroomViewSet, SearchView
+from . import db_routers, profiling, startup, throttling
+
+
+@mock.patch.object(db_routers, 'REPLICAS', ('replica_0',))
+class ReadReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        shared_cache.delete(db_routers.RECENT_WRITE_KEY)
+        self.addCleanup(db_routers._read_alias.set, None)
+
+    def _read_alias(self, view, method='GET', cookies=None):
+        request = RequestFactory().generic(method, '/api/classrooms/')
+        request.COOKIES.update(cookies or {})
+        db_routers.ReplicaRoutingMiddleware(lambda request: HttpResponse()).process_view(request, view, (), {})
+        return db_routers.ReplicaRouter().db_for_read(Classroom)
+
+    def _write(self, status_code):
+        middleware = db_routers.ReplicaRoutingMiddleware(lambda request: HttpResponse(status=status_code))
+        return middleware(RequestFactory().post('/api/classrooms/'))
+
+    def test_opted_in_reads_use_replica(self):
+        self.assertEqual(self._read_alias(ClassroomViewSet.as_view({'get': 'list'})), 'replica_0')
+        self.assertEqual(self._read_alias(ClassroomViewSet.as_view({'get': 'retrieve'})), 'replica_0')
+
+    def test_other_actions_use_primary(self):
+        self.assertEqual(self._read_alias(ClassroomViewSet.as_view({'get': 'image'})), 'default')
+        self.assertEqual(self._read_alias(SearchView.as_view()), 'default')
+
+    def test_only_the_writing_client_is_pinned_after_success(self):
+        response = self._write(201)
+        sticky = {db_routers.STICKY_COOKIE: response.cookies[db_routers.STICKY_COOKIE].value}
+        self.assertEqual(self._read_alias(ClassroomViewSet.as_view({'get': 'list'}), cookies=sticky), 'default')
+        # باقي العملاء بيكملوا على الـ replica
+        self.assertEqual(self._read_alias(ClassroomViewSet.as_view({'get': 'list'})), 'replica_0')
+
+    def test_failed_or_anonymous_rejected_writes_do_not_pin(self):
+        for status_code in (400, 401, 403):
+            with self.subTest(status_code=status_code):
+                self.assertNotIn(db_routers.STICKY_COOKIE, self._write(status_code).cookies)
+        self.assertIsNone(shared_cache.get(db_routers.RECENT_WRITE_KEY))
+        self.assertEqual(self._read_alias(ClassroomViewSet.as_view({'post': 'create'}), method='POST'), 'default')
+        self.assertIsNone(shared_cache.get(db_routers.RECENT_WRITE_KEY))
+
+    def test_replica_reads_are_not_cached_right_after_a_revision_change(self):
+        self.assertEqual(self._read_alias(ClassroomViewSet.as_view({'get': 'list'})), 'replica_0')
+        self.assertFalse(db_routers.replica_may_be_stale())
+        cache.invalidate()
+        self.assertTrue(db_routers.replica_may_be_stale())
+        db_routers._read_alias.set(None)
+        self.assertFalse(db_routers.replica_may_be_stale())
+
+    def test_writes_always_use_primary(self):
+        self._read_alias(ClassroomViewSet.as_view({'get': 'list'}))
+        self.assertEqual(db_routers.ReplicaRouter().db_for_write(Classroom), 'default')
+
+
+# ✅ قاعدة replica حقيقية من DB_REPLICA_URLS (في التيستات TEST MIRROR على default)، مثلاً:
+# DB_REPLICA_URLS=sqlite:///replica.sqlite3 python manage.py test university_display
+@unittest.skipUnless(db_routers.REPLICAS, 'DB_REPLICA_URLS is not set')
+class ReplicaAliasTests(TransactionTestCase):
+    databases = {'default', *db_routers.REPLICAS}
+
+    def setUp(self):
+        cache.invalidate()
+        self.enterContext(mock.patch.object(fallback.DisplayFallbackMiddleware, '_eligible', return_value=False))
+
+    def test_opted_in_list_reads_through_the_replica_alias(self):
+        Classroom.objects.create(name='Hall', capacity='50')
+        alias = db_routers.REPLICAS[0]
+        with mock.patch.object(db_routers.random, 'choice', return_value=alias), \
+                CaptureQueriesContext(connections[alias]) as replica, \
+                CaptureQueriesContext(connections['default']) as primary:
+            data = self.client.get(reverse('classroom-list')).json()
+        self.assertEqual([row['name'] for row in data], ['Hall'])
+        self.assertTrue(any('classrooms_classroom' in query['sql'] for query in replica.captured_queries))
+        self.assertFalse(any('classrooms_classroom' in query['sql'] for query in primary.captured_queries))
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create(username='admin', email='admin@x.edu', role='Admin')
+        cls.doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor')
+
+    def setUp(self):
+        shared_cache.delete(profiling.SLOWEST_KEY)
+        self.enterContext(mock.patch.object(profiling, 'ENABLED', True))
+        self.middleware = profiling.ProfilingMiddleware(self._view)
+
+    def _view(self, request):
+        list(Classroom.objects.all())
+        return HttpResponse('ok')
+
+    def _get(self, user=None, **extra):
+        if user is not None:
+            extra['HTTP_AUTHORIZATION'] = f"Bearer {RefreshToken.for_user(user).access_token}"
+        return self.middleware(RequestFactory().get('/api/classrooms/', **extra))
+
+    def test_disabled_middleware_is_removed(self):
+        with mock.patch.object(profiling, 'ENABLED', False):
+            with self.assertRaises(MiddlewareNotUsed):
+                profiling.ProfilingMiddleware(self._view)
+
+    def test_only_admins_can_profile(self):
+        self.assertNotIn('X-Profile-Id', self._get(HTTP_X_PROFILE='store'))
+        self.assertNotIn('X-Profile-Id', self._get(self.doctor, HTTP_X_PROFILE='store'))
+        response = self._get(self.admin, HTTP_X_PROFILE='store')
+        self.assertEqual(response.content, b'ok')
+        profile = profiling.get_profile(response['X-Profile-Id'])
+        self.assertEqual(profile['queries'], 1)
+        self.assertEqual([entry['id'] for entry in shared_cache.get(profiling.SLOWEST_KEY)], [profile['id']])
+
+    def test_svg_mode_returns_flame_graph(self):
+        response = self._get(self.admin, HTTP_X_PROFILE='svg')
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertIn(b'<svg', response.content)
+
+
+class ThrottlingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = CustomUser.objects.create(username='doc', email='doc@x.edu', role='Doctor')
+
+    def setUp(self):
+        state = (throttling.db_latency.value, throttling.db_latency.updated)
+        self.addCleanup(setattr, throttling.db_latency, 'value', state[0])
+        self.addCleanup(setattr, throttling.db_latency, 'updated', state[1])
+        throttling.db_latency.value, throttling.db_latency.updated = 0.0, 0.0
+        self.enterContext(mock.patch.object(throttling, 'buckets', throttling.LocalBuckets()))
+        self.auth = {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(self.doctor).access_token}"}
+
+    def _request(self, method='get', path='/api/search/', **extra):
+        request = getattr(RequestFactory(), method)(path, **extra)
+        SessionMiddleware(lambda request: None).process_request(request)
+        AuthenticationMiddleware(lambda request: None).process_request(request)
+        return request
+
+    def test_bucket_allows_burst_then_refills(self):
+        bucket = throttling.LocalBuckets()
+        with mock.patch.object(throttling.time, 'monotonic', return_value=100.0):
+            self.assertEqual([bucket.take('k', 2, 3) for _ in range(3)], [0, 0, 0])
+            self.assertAlmostEqual(bucket.take('k', 2, 3), 0.5)
+        with mock.patch.object(throttling.time, 'monotonic', return_value=100.5):
+            self.assertEqual(bucket.take('k', 2, 3), 0)
+
+    def test_priority_needs_verified_credentials(self):
+        self.assertEqual(throttling._header_priority(self._request(**self.auth)), throttling.PRIORITY_USER)
+        self.assertEqual(throttling._header_priority(self._request('post', **self.auth)), throttling.PRIORITY_WRITE)
+        for extra in ({'HTTP_AUTHORIZATION': 'Bearer forged'}, {'HTTP_AUTHORIZATION': 'Device abc'},
+                      {'HTTP_COOKIE': f"{settings.SESSION_COOKIE_NAME}=made-up"}):
+            with self.subTest(extra=extra):
+                self.assertEqual(throttling._header_priority(self._request('post', **extra)), throttling.PRIORITY_ANON)
+        self.client.force_login(self.doctor)
+        cookie = {'HTTP_COOKIE': f"{settings.SESSION_COOKIE_NAME}={self.client.session.session_key}"}
+        self.assertEqual(throttling._header_priority(self._request(**cookie)), throttling.PRIORITY_USER)
+
+    def test_only_anonymous_queries_feed_the_latency_average(self):
+        def view(request):
+            list(Classroom.objects.all())
+            return HttpResponse()
+
+        middleware = throttling.LoadSheddingMiddleware(view)
+        with mock.patch.object(throttling.db_latency, 'observe') as observe:
+            middleware(self._request(**self.auth))
+            observe.assert_not_called()
+            middleware(self._request(HTTP_AUTHORIZATION='Bearer forged'))
+            observe.assert_called_once()
+
+    def test_slow_database_sheds_anonymous_reads_with_retry_after(self):
+        throttling.db_latency.value = throttling.SHED_LATENCY * 1.5
+        throttling.db_latency.updated = time_module.monotonic() + 60
+        # من غير نسخ محفوظة (DisplayFallbackMiddleware) عشان نوصل للـ 503
+        self.enterContext(mock.patch.object(fallback.DisplayFallbackMiddleware, '_eligible', return_value=False))
+        url = reverse('search')
+        response = self.client.get(url, {'q': 'x'}, HTTP_AUTHORIZATION='Bearer forged')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(throttling.RETRY_AFTER))
+        # المستخدم المسجل بيتخفف عند ضعف الحد بس، والكتابة ما بتتخففش
+        self.assertEqual(self.client.get(url, {'q': 'x'}, **self.auth).status_code, 200)
+        throttling.db_latency.value = throttling.SHED_LATENCY * 3
+        self.assertEqual(self.client.get(url, {'q': 'x'}, **self.auth).status_code, 503)
+        response = self.client.post(reverse('classroom-list'), {'name': 'Lab', 'capacity': '20'}, **self.auth)
+        self.assertEqual(response.status_code, 201)
+        # list متكاشة: من الكاش لو موجود، وإلا 503 من غير قاعدة البيانات
+        shared_cache.clear()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('classroom-list'))
+        self.assertEqual((response.status_code, response['Retry-After']), (503, str(throttling.RETRY_AFTER)))
+
+    def test_anonymous_bucket_returns_429(self):
+        with mock.patch.dict(throttling.BUCKETS, {throttling.PRIORITY_ANON: (0.001, 2)}):
+            statuses = [self.client.get(reverse('search'), {'q': 'x'}).status_code for _ in range(3)]
+            self.assertEqual(self.client.get(reverse('search'), {'q': 'x'}, **self.auth).status_code, 200)
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+class ColdStartTests(TestCase):
+    def test_migrated_database_has_nothing_pending(self):
+        self.assertEqual(startup.pending_migrations(), set())
+
+    def test_heavy_modules_stay_lazy(self):
+        # عملية جديدة بتحمل الـ WSGI app والـ urls: pandas/numpy/scipy/PIL ما يتحملوش غير مع الـ feature
+        _, _, heavy = startup.import_benchmark()
+        self.assertEqual(heavy, [])
@@ -0,0 +1,230 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.db import connections
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from accounts.authentication import ClaimsJWTAuthentication
+from classrooms.cache import CachedReadMixin
+from classrooms.fallback import stored_response
+
+# ✅ حدود الطلبات (token bucket) + تخفيف الحمل لما قاعدة البيانات تبطأ
+# الأولوية: كتابة من مستخدم مسجل > قراءة مستخدم مسجل > زوار وشاشات العرض (anon)
+PRIORITY_WRITE, PRIORITY_USER, PRIORITY_ANON = 'write', 'user', 'anon'
+BUCKETS = getattr(settings, 'THROTTLE_BUCKETS', {
+    # (طلبات في الثانية، أقصى دفعة)
+    PRIORITY_WRITE: (10, 50),
+    PRIORITY_USER: (20, 100),
+    PRIORITY_ANON: (5, 50),
+    'route': (200, 400),    # كل الـ anon على endpoint واحد
+})
+SHARED = getattr(settings, 'THROTTLE_SHARED', False)
+SHED_LATENCY = getattr(settings, 'LOAD_SHED_LATENCY_MS', 250) / 1000
+SOFT_LATENCY = SHED_LATENCY / 2     # من هنا معدلات الـ anon بتبدأ تقل تدريجياً
+RETRY_AFTER = getattr(settings, 'LOAD_SHED_RETRY_AFTER', 5)
+EWMA_ALPHA = 0.2
+PROBE_INTERVAL = 1.0    # وقت التخفيف: طلب واحد كل ثانية بيعدي عشان نقيس قاعدة البيانات تاني
+MAX_BUCKETS = 10000
+
+
+class LocalBuckets:
+    """جوه العملية بس: من غير أي I/O، بس كل عملية gunicorn ليها حدودها."""
+
+    def __init__(self, max_entries=MAX_BUCKETS):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        """يرجع 0 لو الطلب مسموح، وإلا عدد الثواني لحد ما يبقى فيه token."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._data.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            self._data[key] = (tokens - 1 if not wait else tokens, now)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return wait
+
+
+class SharedBuckets:
+    """مشتركة بين العمليات عن طريق CACHES['default'] (THROTTLE_SHARED=True). تقريبية: مفيش قفل بين get و set."""
+
+    def take(self, key, rate, burst):
+        now = time.time()
+        cache_key = f"throttle:{key}"
+        tokens, last = shared_cache.get(cache_key) or (burst, now)
+        tokens = min(burst, tokens + (now - last) * rate)
+        wait = 0 if tokens >= 1 else (1 - tokens) / rate
+        shared_cache.set(cache_key, (tokens - 1 if not wait else tokens, now), timeout=int(burst / rate) + 1)
+        return wait
+
+
+buckets = SharedBuckets() if SHARED else LocalBuckets()
+
+
+# الاستعلامات اللي بتدخل في المتوسط: طلبات الـ anon (أو طلب probe) بس، عشان تقارير الأدمن التقيلة
+# ما تخليش السيرفر يخفف الحمل على شاشات العرض
+_measuring = ContextVar('measuring', default=False)
+
+
+class LatencyMonitor:
+    """متوسط متحرك (EWMA) لزمن استعلامات قاعدة البيانات في العملية دي، بيتقاس بـ execute_wrapper."""
+
+    def __init__(self, alpha=EWMA_ALPHA):
+        self.alpha = alpha
+        self.value = 0.0
+        self.updated = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.value = seconds if not self.updated else self.value + self.alpha * (seconds - self.value)
+            self.updated = time.monotonic()
+
+    def __call__(self, execute, sql, params, many, context):
+        if not _measuring.get():
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+db_latency = LatencyMonitor()
+
+
+def load_factor():
+    """1 = طبيعي؛ أقل من 1 لما قاعدة البيانات تبطأ، ومعدل الـ anon بيتضرب فيه."""
+    if db_latency.value <= SOFT_LATENCY:
+        return 1.0
+    return max(SOFT_LATENCY / db_latency.value, 0.1)
+
+
+def request_priority(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and getattr(user, 'role', None) != 'Device':
+        return PRIORITY_WRITE if request.method not in SAFE_METHODS else PRIORITY_USER
+    return PRIORITY_ANON
+
+
+def _header_priority(request):
+    # في الـ middleware الـ JWT لسه ما اتراجعش في DRF: بنتحقق منه بنفسنا (بنفس كاش المستخدمين)،
+    # والـ session من AuthenticationMiddleware. أي هيدر أو كوكي مش صحيح = anon
+    user = None
+    if request.COOKIES.get(settings.SESSION_COOKIE_NAME):
+        user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            result = ClaimsJWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            result = None
+        user = result[0] if result else None
+    if user is not None and user.is_authenticated and getattr(user, 'role', None) != 'Device':
+        return PRIORITY_WRITE if request.method not in SAFE_METHODS else PRIORITY_USER
+    return PRIORITY_ANON
+
+
+class ClientRateThrottle(BaseThrottle):
+    """Bucket لكل عميل (مستخدم / شاشة عرض / IP) حسب فئة الأولوية."""
+
+    def allow_request(self, request, view):
+        priority = request_priority(request)
+        rate, burst = BUCKETS[priority]
+        if priority == PRIORITY_ANON:
+            rate *= load_factor()
+        self.wait_time = buckets.take(f"client:{priority}:{self._client(request)}", rate, burst)
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+    def _client(self, request):
+        user = request.user
+        if getattr(user, 'device_id', None) is not None:
+            return f"device:{user.device_id}"
+        if user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+
+class RouteRateThrottle(BaseThrottle):
+    """Bucket مشترك لكل endpoint لطلبات الـ anon: شاشات كتير على نفس المسار ما توقعش قاعدة البيانات."""
+
+    def allow_request(self, request, view):
+        if request_priority(request) != PRIORITY_ANON:
+            return True
+        rate, burst = BUCKETS['route']
+        route = f"{type(view).__name__}:{getattr(view, 'action', None) or request.method}"
+        self.wait_time = buckets.take(f"route:{route}", rate * load_factor(), burst)
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class LoadSheddingMiddleware:
+    """لما متوسط زمن الاستعلامات يعدي LOAD_SHED_LATENCY_MS: طلبات الـ anon بتاخد آخر نسخة محفوظة أو الكاش،
+    وإلا 503 + Retry-After. قراءات المستخدمين بتتخفف عند ضعف الحد، والكتابة ما بتتخففش أبداً."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._last_probe = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        request.load_priority = _header_priority(request)
+        token = _measuring.set(request.load_priority == PRIORITY_ANON)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(db_latency))
+                return self.get_response(request)
+        finally:
+            _measuring.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        priority = getattr(request, 'load_priority', None) or _header_priority(request)
+        if priority == PRIORITY_WRITE:
+            return None
+        threshold = SHED_LATENCY if priority == PRIORITY_ANON else SHED_LATENCY * 2
+        if db_latency.value < threshold:
+            return None
+        if self._probe():
+            # الطلب اللي بيقيس قاعدة البيانات تاني لازم يتحسب في المتوسط مهما كانت أولويته
+            _measuring.set(True)
+            return None
+
+        if request.method in SAFE_METHODS:
+            response = stored_response(request, 'load-shedding')
+            if response is not None:
+                return response
+            # list/retrieve المتكاشة: cache_response بيرد من الكاش أو 503 من غير ما يلمس قاعدة البيانات
+            view_class = getattr(view_func, 'cls', None)
+            action = (getattr(view_func, 'actions', None) or {}).get(request.method.lower())
+            if view_class and issubclass(view_class, CachedReadMixin) and action in ('list', 'retrieve'):
+                request.load_shedding = RETRY_AFTER
+                return None
+
+        response = JsonResponse({'error': 'الخادم مشغول، حاول مرة أخرى'}, status=503)
+        response['Retry-After'] = str(RETRY_AFTER)
+        return response
+
+    def _probe(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - max(db_latency.updated, self._last_probe) >= PROBE_INTERVAL:
+                self._last_probe = now
+                return True
+        return False
@@ -17,8 +17,14 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .profiling import ProfileDetailView, SlowestRequestsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('classrooms.urls')),   # ← هذا يربط الراوتر اللي أرسلته
     path('api/accounts/', include('accounts.urls')),
+    path('api/jobs/', include('jobs.urls')),
+    path('api/archive/', include('archive.urls')),
+    path('api/profiles/', SlowestRequestsView.as_view(), name='profile-list'),
+    path('api/profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='profile-detail'),
 ]